@@ -0,0 +1,128 @@
+"""
+Per-route admission control for endpoints that make slow outbound calls.
+
+Each limited route gets an ``AdmissionLimiter``: at most ``limit`` requests
+run at once, up to ``max_queue`` more wait in FIFO order, and none waits
+longer than ``max_wait`` seconds. A request is shed with ``Overloaded``
+(served as 503 with ``Retry-After``) when the queue is full, when the
+expected wait, estimated from the queue length and recent service times,
+already exceeds ``max_wait``, or when its wait actually runs out. Routes
+without a limiter, such as the catalog reads, are never queued behind the
+slow ones.
+"""
+import asyncio
+import functools
+import math
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+
+class Overloaded(Exception):
+    """A request was shed by admission control."""
+
+    def __init__(self, route: str, reason: str, retry_after: float):
+        super().__init__(f"{route} is overloaded ({reason}); retry in {retry_after:.0f}s")
+        self.route = route
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionLimiter:
+    """Concurrency limit plus a bounded, deadline-aware wait queue."""
+
+    def __init__(self, route: str, limit: int, max_queue: int, max_wait: float):
+        self.route = route
+        self.limit = limit
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.active = 0
+        self._waiters: deque = deque()
+        # Smoothed seconds per request, used to predict queue waits
+        self.service_time: Optional[float] = None
+        self.admitted = 0
+        self.queued = 0
+        self.shed: Dict[str, int] = {'queue_full': 0, 'deadline': 0, 'timeout': 0}
+
+    def expected_wait(self, position: int) -> float:
+        """Predicted seconds until the request at queue ``position`` (1-based) starts."""
+        if self.service_time is None:
+            return 0.0
+        return math.ceil(position / self.limit) * self.service_time
+
+    def _reject(self, reason: str, retry_after: float):
+        self.shed[reason] += 1
+        raise Overloaded(self.route, reason, max(retry_after, 1.0))
+
+    async def acquire(self):
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            self.admitted += 1
+            return
+
+        position = len(self._waiters) + 1
+        estimate = self.expected_wait(position)
+        if position > self.max_queue:
+            self._reject('queue_full', estimate or self.max_wait)
+        if estimate > self.max_wait:
+            # It would time out anyway; fail now instead of holding the client
+            self._reject('deadline', estimate)
+
+        self.queued += 1
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait({waiter}, timeout=self.max_wait)
+        except asyncio.CancelledError:
+            # The client went away while queued
+            if waiter.done():
+                # ...just as a slot was handed over; pass it on
+                self.release()
+            else:
+                waiter.cancel()
+                self._waiters.remove(waiter)
+            raise
+        if not waiter.done():
+            waiter.cancel()
+            self._waiters.remove(waiter)
+            self._reject('timeout', self.expected_wait(len(self._waiters) + 1) or self.max_wait)
+        self.admitted += 1
+
+    def release(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                # Hand the slot straight to the next waiter
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def record(self, seconds: float):
+        self.service_time = seconds if self.service_time is None \
+            else 0.8 * self.service_time + 0.2 * seconds
+
+    def __call__(self, handler):
+        """Decorate an async route handler so it runs under this limiter."""
+        @functools.wraps(handler)
+        async def limited(*args, **kwargs):
+            await self.acquire()
+            start = time.monotonic()
+            try:
+                return await handler(*args, **kwargs)
+            finally:
+                self.record(time.monotonic() - start)
+                self.release()
+        return limited
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'limit': self.limit,
+            'max_queue': self.max_queue,
+            'max_wait': self.max_wait,
+            'active': self.active,
+            'waiting': len(self._waiters),
+            'service_time': None if self.service_time is None else round(self.service_time, 3),
+            'admitted': self.admitted,
+            'queued': self.queued,
+            'shed': dict(self.shed),
+        }
@@ -0,0 +1,105 @@
+"""
+Server-sent event stream of catalog changes behind ``GET /agents/events``.
+
+Subscribers do not get a queue of their own. Each connection keeps a cursor
+(the last catalog version it sent) and, when woken by a change, reads what
+is new straight from the ``ChangeLog``. So an idle subscriber costs one
+suspended generator, and a slow one never buffers anything. It falls
+behind, and when it catches up it gets the latest state of each changed agent
+coalesced. If it falls so far behind that the log no longer covers its cursor,
+it gets a ``resync`` event instead. Event ids are catalog versions, so a
+reconnecting ``EventSource`` resumes from ``Last-Event-ID`` the same way.
+"""
+import asyncio
+import json
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Tuple
+
+from change_log import ChangeLog
+
+
+class AgentEvents:
+    """Fan-out of change log entries to SSE subscribers."""
+
+    def __init__(self, log: ChangeLog, encode: Callable[[Dict[str, Any]], str],
+                 heartbeat: float = 15.0, retry_ms: int = 3000):
+        self.log = log
+        self.encode = encode
+        self.heartbeat = heartbeat
+        self.retry_ms = retry_ms
+        self.subscribers = 0
+        self.sent = 0
+        self.resyncs = 0
+        # Replaced on every change; waiting on the current one is a wakeup for all
+        self._changed = asyncio.Event()
+        self._encoded: Dict[Tuple[int, str], bytes] = {}
+        log.subscribe(self._notify)
+
+    def _notify(self):
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+        if len(self._encoded) > 2 * max(len(self.log), 1):
+            self._encoded = {key: data for key, data in self._encoded.items()
+                             if key[0] > self.log.floor}
+
+    def _event(self, entry: Dict[str, Any]) -> bytes:
+        # Encode each change once, however many subscribers send it
+        key = (entry['version'], entry['type'])
+        data = self._encoded.get(key)
+        if data is None:
+            data = (f"id: {entry['version']}\nevent: {entry['type']}\n"
+                    f"data: {self.encode(entry)}\n\n").encode('utf-8')
+            self._encoded[key] = data
+        return data
+
+    def _control(self, event: str) -> bytes:
+        data = json.dumps({'version': self.log.version})
+        return f"id: {self.log.version}\nevent: {event}\ndata: {data}\n\n".encode('utf-8')
+
+    @staticmethod
+    def parse_last_event_id(value: Optional[str]) -> Optional[int]:
+        try:
+            return int(value) if value else None
+        except ValueError:
+            return None
+
+    async def stream(self, last_event_id: Optional[int] = None) -> AsyncIterator[bytes]:
+        """Yield SSE frames until the client disconnects (the generator is cancelled)."""
+        self.subscribers += 1
+        try:
+            yield f"retry: {self.retry_ms}\n\n".encode('utf-8')
+            if last_event_id is None:
+                # Fresh subscriber: start from now and tell it which version that is
+                cursor = self.log.version
+                yield self._control('ready')
+            else:
+                cursor = last_event_id
+
+            while True:
+                changed = self._changed
+                if cursor != self.log.version:
+                    changes = self.log.since(cursor)
+                    if changes is None:
+                        self.resyncs += 1
+                        cursor = self.log.version
+                        yield self._control('resync')
+                        continue
+                    for entry in changes:
+                        # Each yield waits for the client to take the previous frame
+                        yield self._event(entry)
+                        cursor = entry['version']
+                        self.sent += 1
+                    continue
+                try:
+                    await asyncio.wait_for(changed.wait(), self.heartbeat)
+                except asyncio.TimeoutError:
+                    yield b": ping\n\n"
+        finally:
+            self.subscribers -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'subscribers': self.subscribers,
+            'events_sent': self.sent,
+            'resyncs': self.resyncs,
+            'version': self.log.version,
+        }
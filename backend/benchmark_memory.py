@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark for the in-memory catalog store.
+
+Builds synthetic agent documents (100k by default), decodes each from JSON as
+it would arrive from Cosmos DB or a snapshot, and measures bytes per agent
+held as plain dicts versus in a CompactCatalog. Also checks that every
+document reads back unchanged and validates to the same Agent model, and
+times reads from both stores, including the cached document list and hash
+map the backend reads in mock mode.
+"""
+import argparse
+import gc
+import hashlib
+import json
+import random
+import time
+import tracemalloc
+
+from benchmark_search import make_agent
+from compact_catalog import CompactCatalog
+
+MODES = [['text'], ['text', 'data'], ['text', 'file'], ['text/plain', 'application/json']]
+
+
+def make_document(rng: random.Random, i: int) -> dict:
+    """A stored agent document shaped like the ones the backend writes."""
+    agent = make_agent(rng, i)
+    url = f"https://agents.example.com/{agent['agent_id']}"
+    doc = {
+        'agent_id': agent['agent_id'],
+        'name': agent['name'],
+        'description': agent['description'],
+        'homepage_url': url,
+        'openapi_url': f"{url}/openapi.json",
+        'version': rng.choice(['1.0.0', '1.1.0', '2.0.0']),
+        # Some agents list bare skill names, as sample agent configs do
+        'skills': agent['skills'] if i % 5 else [s['id'] for s in agent['skills']],
+        'streaming': bool(i % 2),
+        'protocol_version': 'v0.2.6',
+        'input_modes': rng.choice(MODES),
+        'output_modes': rng.choice(MODES),
+        'supports_auth': i % 7 == 0,
+    }
+    doc['content_hash'] = hashlib.sha256(json.dumps(doc, sort_keys=True).encode()).hexdigest()
+    doc['id'] = doc['agent_id']
+    return doc
+
+
+def measure(build):
+    """Return (result, bytes allocated and still held by it)."""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, held
+
+
+def time_reads(label: str, store, sample):
+    start = time.perf_counter()
+    for agent_id in sample:
+        store.get(agent_id)
+    get_us = (time.perf_counter() - start) / len(sample) * 1e6
+    start = time.perf_counter()
+    listed = list(store.values())
+    scan_ms = (time.perf_counter() - start) * 1000
+    print(f"   {label:<15} get {get_us:6.2f} µs   list all {scan_ms:7.1f} ms "
+          f"({len(listed):,} agents)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--agents', type=int, default=100_000)
+    parser.add_argument('--validate', type=int, default=2_000,
+                        help="Agents to compare through the Agent model (default: 2000)")
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    blobs = [json.dumps(make_document(rng, i)) for i in range(args.agents)]
+    print(f"{args.agents:,} agents, {sum(map(len, blobs)) / args.agents:.0f} bytes of JSON each")
+
+    plain, plain_bytes = measure(
+        lambda: {doc['id']: doc for doc in map(json.loads, blobs)})
+
+    def build_compact():
+        catalog = CompactCatalog()
+        for blob in blobs:
+            doc = json.loads(blob)
+            catalog[doc['id']] = doc
+        return catalog
+    compact, compact_bytes = measure(build_compact)
+
+    print(f"   plain dicts:    {plain_bytes / 2 ** 20:8.1f} MiB  "
+          f"{plain_bytes / args.agents:7.0f} bytes/agent")
+    print(f"   CompactCatalog: {compact_bytes / 2 ** 20:8.1f} MiB  "
+          f"{compact_bytes / args.agents:7.0f} bytes/agent  "
+          f"({100 * (1 - compact_bytes / plain_bytes):.0f}% smaller)")
+    print(f"   shared: {compact.stats()}")
+
+    mismatches = sum(compact[agent_id] != doc for agent_id, doc in plain.items())
+    print(f"Round trip: {mismatches} of {len(plain):,} documents differ")
+
+    from main import Agent
+    sample = rng.sample(list(plain), min(args.validate, len(plain)))
+    model_mismatches = sum(Agent(**compact[agent_id]) != Agent(**plain[agent_id])
+                           for agent_id in sample)
+    print(f"Agent model: {model_mismatches} of {len(sample):,} sampled agents differ")
+
+    time_reads('plain dicts', plain, sample)
+    # Time each store with only that store alive, since garbage collection
+    # passes walk everything in the heap
+    del plain
+    gc.collect()
+    time_reads('CompactCatalog', compact, sample)
+
+    # What get_all_agents and get_agent_hashes use in mock mode
+    agent_id = sample[0]
+    doc = compact[agent_id]
+
+    def write_then_list():
+        compact[agent_id] = doc
+        return compact.documents()
+    for label, read in (('documents (first call)', compact.documents),
+                        ('documents (cached)', compact.documents),
+                        ('write, then documents', write_then_list),
+                        ('hashes', compact.hashes)):
+        start = time.perf_counter()
+        read()
+        print(f"   {label:<24} {(time.perf_counter() - start) * 1000:8.1f} ms")
+    # The same documents documents() keeps once called
+    _, cache_bytes = measure(lambda: [compact.record(a).to_dict() for a in compact])
+    print(f"   cached documents hold {cache_bytes / len(compact):.0f} bytes/agent; "
+          f"store plus cache {(compact_bytes + cache_bytes) / len(compact):.0f} bytes/agent "
+          f"({100 * (1 - (compact_bytes + cache_bytes) / plain_bytes):.0f}% smaller than plain dicts)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Latency benchmark for the /agents/match skill index.
+
+Builds a SkillIndex over synthetic agents (10k by default), then times
+queries and incremental add/remove against the latency budget.
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+
+from search import SkillIndex
+
+DOMAINS = ['finance', 'calendar', 'task', 'weather', 'travel', 'email', 'crm', 'sales',
+           'support', 'legal', 'hr', 'invoice', 'inventory', 'shipping', 'marketing']
+VERBS = ['schedule', 'analyze', 'report', 'track', 'create', 'update', 'forecast',
+         'summarize', 'translate', 'search', 'book', 'approve', 'notify', 'reconcile']
+OBJECTS = ['meeting', 'expense', 'stock', 'ticket', 'order', 'flight', 'contract',
+           'invoice', 'lead', 'shipment', 'campaign', 'payroll', 'reminder', 'budget']
+QUERIES = ['schedule a meeting tomorrow', 'what is the stock price of AAPL',
+           'reconcile last month invoices', 'book a flight to Berlin',
+           'track my shipment', 'summarize support tickets', 'forecast sales budget']
+
+
+def make_agent(rng: random.Random, i: int) -> dict:
+    domain = rng.choice(DOMAINS)
+    skills = []
+    for s in range(rng.randint(1, 4)):
+        verb, obj = rng.choice(VERBS), rng.choice(OBJECTS)
+        skills.append({
+            'id': f"{verb}_{obj}_{s}",
+            'name': f"{verb.title()} {obj}",
+            'description': f"{verb.title()} {obj}s for {domain} teams",
+            'examples': [f"{verb} the {obj} for {rng.choice(DOMAINS)}"],
+            'tags': [domain, obj],
+        })
+    return {
+        'agent_id': f"agent_{i}",
+        'name': f"{domain.title()} agent {i}",
+        'description': f"Handles {domain} work: " + ', '.join(
+            rng.sample(VERBS, 3)) + ' ' + ', '.join(rng.sample(OBJECTS, 3)),
+        'skills': skills,
+    }
+
+
+def timed_ms(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--agents', type=int, default=10_000)
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--max-match-ms', type=float, default=5.0,
+                        help="Fail if the median match latency exceeds this")
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    agents = [make_agent(rng, i) for i in range(args.agents)]
+    index = SkillIndex()
+    start = time.perf_counter()
+    index.add_all(agents)
+    print(f"Indexed {len(index):,} agents in {time.perf_counter() - start:.2f}s")
+
+    worst = 0.0
+    for query in QUERIES:
+        ms = timed_ms(lambda: index.match(query, 10), args.repeat)
+        worst = max(worst, ms)
+        print(f"   {ms:7.3f} ms  match {query!r}")
+
+    extra = [make_agent(rng, args.agents + i) for i in range(args.repeat)]
+    add_ms = timed_ms(lambda: index.add(extra.pop()), args.repeat)
+    ids = [f"agent_{i}" for i in rng.sample(range(args.agents), args.repeat)]
+    remove_ms = timed_ms(lambda: index.remove(ids.pop()), args.repeat)
+    print(f"   {add_ms:7.3f} ms  add one agent")
+    print(f"   {remove_ms:7.3f} ms  remove one agent")
+
+    if worst > args.max_match_ms:
+        print(f"❌ Slowest median match {worst:.2f} ms exceeds {args.max_match_ms} ms")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Benchmark the batched Cosmos DB write path against a fake container.
+
+The fake container sleeps for a simulated network latency on every request,
+so the numbers show what sequential versus batched hydration and
+registration cost in round-trip time without an Azure account.
+"""
+import argparse
+import asyncio
+import copy
+import threading
+import time
+
+from azure.cosmos import exceptions
+
+from catalog_sync import sync_agents
+from database import CosmosDBManager
+
+
+class FakeContainer:
+    """Thread-safe in-memory stand-in for a Cosmos container with fixed latency."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.items = {}
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def _round_trip(self):
+        with self._lock:
+            self.requests += 1
+        time.sleep(self.latency)
+
+    def create_item(self, body):
+        self._round_trip()
+        with self._lock:
+            if body["id"] in self.items:
+                raise exceptions.CosmosResourceExistsError(message="Conflict")
+            self.items[body["id"]] = copy.deepcopy(body)
+
+    def upsert_item(self, body):
+        self._round_trip()
+        with self._lock:
+            self.items[body["id"]] = copy.deepcopy(body)
+
+    def read_item(self, item, partition_key):
+        self._round_trip()
+        with self._lock:
+            if item not in self.items:
+                raise exceptions.CosmosResourceNotFoundError(message="Not found")
+            return copy.deepcopy(self.items[item])
+
+    def query_items(self, query, enable_cross_partition_query=False):
+        # Only the projection used by get_agent_hashes is supported
+        self._round_trip()
+        with self._lock:
+            return [{"id": i["id"], "content_hash": i.get("content_hash")}
+                    for i in self.items.values()]
+
+    def delete_item(self, item, partition_key):
+        self._round_trip()
+        with self._lock:
+            if self.items.pop(item, None) is None:
+                raise exceptions.CosmosResourceNotFoundError(message="Not found")
+
+
+def fake_manager(latency: float, max_parallel: int) -> CosmosDBManager:
+    manager = CosmosDBManager()
+    manager.client = object()  # anything but None leaves mock mode
+    manager.agents_container = FakeContainer(latency)
+    manager.config_container = FakeContainer(latency)
+    manager.max_parallel = max_parallel
+    return manager
+
+
+def make_agents(count: int):
+    return [{"agent_id": f"agent_{i}", "name": f"Agent {i}", "description": "",
+             "homepage_url": f"http://agents.example.com/{i}", "skills": []}
+            for i in range(count)]
+
+
+async def run(args):
+    latency = args.latency_ms / 1000
+
+    sequential = fake_manager(latency, args.max_parallel)
+    start = time.perf_counter()
+    for agent in make_agents(args.agents):
+        await sequential.create_agent(agent)
+    sequential_s = time.perf_counter() - start
+
+    batched = fake_manager(latency, args.max_parallel)
+    start = time.perf_counter()
+    results = await batched.create_agents(make_agents(args.agents))
+    batched_s = time.perf_counter() - start
+    assert all(results) and len(batched.agents_container.items) == args.agents
+
+    print(f"Hydrating {args.agents:,} agents at {args.latency_ms:g} ms per request:")
+    for name, seconds in (("sequential", sequential_s), ("batched", batched_s)):
+        print(f"   {name:<11}{seconds:8.2f}s  "
+              f"≈ {seconds / latency:8.0f} round trips of wall time")
+
+    print("\nRestart sync against the hydrated container:")
+    for label, agents in (("no hashes", make_agents(args.agents)),
+                          ("unchanged", make_agents(args.agents)),
+                          ("1% changed", [dict(a, description="v2") if i % 100 == 0 else a
+                                          for i, a in enumerate(make_agents(args.agents))])):
+        container = batched.agents_container
+        before = container.requests
+        start = time.perf_counter()
+        report = await sync_agents(batched, agents)
+        print(f"   {label:<11}{time.perf_counter() - start:8.2f}s  "
+              f"{container.requests - before:5d} requests  "
+              f"{report['written']} written, {report['skipped']} skipped")
+
+    agent = make_agents(1)[0] | {"agent_id": "new_agent"}
+    start = time.perf_counter()
+    await sequential.create_agent(dict(agent))
+    await sequential.add_agent_to_config("new_agent", agent["homepage_url"])
+    add_sequential_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    await batched.register_agent(dict(agent), agent["homepage_url"])
+    add_batched_ms = (time.perf_counter() - start) * 1000
+
+    stored = await batched.get_agent("new_agent")
+    start = time.perf_counter()
+    await sequential.delete_agent("new_agent")
+    await sequential.remove_agent_from_config("new_agent")
+    delete_sequential_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    await batched.unregister_agent(stored)
+    delete_batched_ms = (time.perf_counter() - start) * 1000
+
+    print("\nSingle-agent mutations (agent write + configuration rewrite):")
+    print(f"   add     {add_sequential_ms:7.1f} ms sequential  {add_batched_ms:7.1f} ms batched")
+    print(f"   delete  {delete_sequential_ms:7.1f} ms sequential  "
+          f"{delete_batched_ms:7.1f} ms batched")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--agents', type=int, default=5000)
+    parser.add_argument('--latency-ms', type=float, default=5.0,
+                        help="Simulated latency per Cosmos request (default: 5)")
+    parser.add_argument('--max-parallel', type=int, default=16,
+                        help="Concurrent requests for batched writes (default: 16)")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
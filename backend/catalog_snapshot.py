@@ -0,0 +1,162 @@
+"""
+Warm-start snapshot of the parsed catalog on local disk.
+
+The snapshot holds the stored agent documents plus per-agent card metadata
+(URL, when the card was last fetched, whether the host answered, content
+hash). It is a small binary file:
+
+    magic (8 bytes) | format version (u16) | CRC-32 (u32) | length (u32) | payload
+
+where the payload is zlib-compressed JSON. Readers reject unknown versions,
+bad checksums and truncated files, so a corrupt snapshot is set aside and
+the backend simply starts cold. Writes go to a temporary file that is then
+renamed over the old snapshot, so a crash mid-write never leaves a torn file.
+"""
+import asyncio
+import json
+import logging
+import os
+import struct
+import time
+import zlib
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'AGCATSNP'
+VERSION = 1
+_HEADER = struct.Struct('>8sHII')
+
+
+class SnapshotError(ValueError):
+    """The snapshot file is corrupt or in an unsupported format."""
+
+
+def encode_snapshot(agents: List[Dict[str, Any]], cards: Dict[str, Dict[str, Any]]) -> bytes:
+    payload = zlib.compress(json.dumps(
+        {'saved_at': time.time(), 'agents': agents, 'cards': cards},
+        separators=(',', ':'), default=str).encode('utf-8'))
+    return _HEADER.pack(MAGIC, VERSION, zlib.crc32(payload), len(payload)) + payload
+
+
+def decode_snapshot(data: bytes) -> Dict[str, Any]:
+    if len(data) < _HEADER.size:
+        raise SnapshotError("file is shorter than the snapshot header")
+    magic, version, checksum, length = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise SnapshotError("not a catalog snapshot")
+    if version != VERSION:
+        raise SnapshotError(f"unsupported snapshot version {version} (expected {VERSION})")
+    payload = data[_HEADER.size:]
+    if len(payload) != length or zlib.crc32(payload) != checksum:
+        raise SnapshotError("checksum mismatch or truncated payload")
+    try:
+        snapshot = json.loads(zlib.decompress(payload))
+    except (zlib.error, ValueError) as e:
+        raise SnapshotError(f"unreadable payload: {e}") from e
+    if not isinstance(snapshot.get('agents'), list) or not isinstance(snapshot.get('cards'), dict):
+        raise SnapshotError("payload is missing agents or cards")
+    return snapshot
+
+
+def save_snapshot(path: str, agents: List[Dict[str, Any]],
+                  cards: Dict[str, Dict[str, Any]]) -> int:
+    """Atomically write a snapshot; returns its size in bytes."""
+    data = encode_snapshot(agents, cards)
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return len(data)
+
+
+def load_snapshot(path: str) -> Optional[Dict[str, Any]]:
+    """Read a snapshot, or return None if it is missing or unusable.
+
+    A corrupt or incompatible file is renamed to ``<path>.corrupt`` so it is
+    not retried on every start but remains available for inspection.
+    """
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+    except OSError as e:
+        logger.warning(f"Cannot read catalog snapshot {path}: {e}")
+        return None
+
+    try:
+        return decode_snapshot(data)
+    except SnapshotError as e:
+        logger.warning(f"Ignoring catalog snapshot {path}: {e}")
+        try:
+            os.replace(path, f"{path}.corrupt")
+        except OSError:
+            pass
+        return None
+
+
+class CatalogSnapshots:
+    """Card metadata plus periodic, change-driven snapshot saving for the backend."""
+
+    def __init__(self, path: Optional[str], interval: float = 60.0):
+        self.path = path
+        self.interval = interval
+        self.cards: Dict[str, Dict[str, Any]] = {}
+        self.last_saved_at: Optional[float] = None
+        self.last_size: Optional[int] = None
+        self._dirty = False
+
+    def record_card(self, agent_id: str, url: str, reachable: bool,
+                    content_hash: Optional[str] = None):
+        previous = self.cards.get(agent_id, {})
+        self.cards[agent_id] = {
+            'url': url,
+            'reachable': reachable,
+            'fetched_at': time.time() if reachable else previous.get('fetched_at'),
+            'content_hash': content_hash or previous.get('content_hash'),
+        }
+        self._dirty = True
+
+    def forget_card(self, agent_id: str):
+        self.cards.pop(agent_id, None)
+        self._dirty = True
+
+    def restore(self) -> Optional[List[Dict[str, Any]]]:
+        """Load the snapshot's card metadata and return its agents (None if unavailable)."""
+        if not self.path:
+            return None
+        start = time.perf_counter()
+        snapshot = load_snapshot(self.path)
+        if snapshot is None:
+            return None
+        self.cards = snapshot['cards']
+        logger.info(f"Restored {len(snapshot['agents'])} agents from catalog snapshot "
+                    f"in {(time.perf_counter() - start) * 1000:.1f} ms")
+        return snapshot['agents']
+
+    async def save(self, db) -> bool:
+        """Write a snapshot if anything changed since the last one."""
+        if not self.path or not self._dirty:
+            return False
+        self._dirty = False
+        agents = await db.get_all_agents()
+        try:
+            self.last_size = await asyncio.to_thread(
+                save_snapshot, self.path, agents, dict(self.cards))
+        except OSError as e:
+            self._dirty = True
+            logger.warning(f"Could not write catalog snapshot {self.path}: {e}")
+            return False
+        self.last_saved_at = time.time()
+        return True
+
+    async def run(self, db):
+        """Save periodically until cancelled."""
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.save(db)
@@ -0,0 +1,92 @@
+"""
+Diff-based catalog hydration.
+
+Every stored agent document carries a ``content_hash`` of its catalog
+fields. On startup the freshly parsed agents are hashed and compared with
+the stored hashes, so only new or changed agents are written; unchanged ones
+cost nothing, and stored agents no longer in the configuration are reported
+as orphans rather than silently kept or deleted.
+"""
+import hashlib
+import json
+import logging
+from typing import Any, Dict, Iterable, List
+
+logger = logging.getLogger(__name__)
+
+# Fields that identify or annotate a document rather than describe the agent
+_NOT_HASHED = frozenset({'id', 'content_hash'})
+
+
+def content_hash(agent: Dict[str, Any]) -> str:
+    """Stable hash of an agent's catalog fields, ignoring Cosmos system fields."""
+    content = {key: value for key, value in agent.items()
+               if key not in _NOT_HASHED and not key.startswith('_')}
+    encoded = json.dumps(content, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+async def sync_agents(db, agents: List[Dict[str, Any]],
+                      unreachable: Iterable[str] = ()) -> Dict[str, Any]:
+    """Write only the agents whose content differs from what is stored.
+
+    ``unreachable`` lists agents whose card could not be fetched; their
+    placeholder data is only written when nothing is stored for them yet, so a
+    host being down at startup never overwrites a good stored card.
+    """
+    unreachable = set(unreachable)
+    stored = await db.get_agent_hashes()
+    listed = stored is not None
+    stored = stored or {}
+
+    new, changed, skipped, kept = [], [], [], []
+    for agent in agents:
+        agent_id = agent.get('agent_id') or agent.get('id')
+        agent['content_hash'] = content_hash(agent)
+        if agent_id in stored and agent_id in unreachable:
+            kept.append(agent_id)
+        elif agent_id not in stored:
+            new.append(agent)
+        elif stored[agent_id] != agent['content_hash']:
+            changed.append(agent)
+        else:
+            skipped.append(agent_id)
+
+    if listed:
+        results = await db.create_agents(new) + await db.upsert_agents(changed)
+    else:
+        # Without the stored hashes, upsert everything rather than risk
+        # conflicts, except placeholders: creating those fails on any stored
+        # document, which is then kept
+        fetched = [a for a in new if (a.get('agent_id') or a.get('id')) not in unreachable]
+        placeholders = [a for a in new if (a.get('agent_id') or a.get('id')) in unreachable]
+        created = await db.create_agents(placeholders)
+        kept += [a.get('agent_id') or a.get('id')
+                 for a, ok in zip(placeholders, created) if not ok]
+        new = fetched + [a for a, ok in zip(placeholders, created) if ok]
+        results = await db.upsert_agents(fetched) + [True] * (len(new) - len(fetched))
+    written = sum(results)
+    # Results line up with new + changed in both branches
+    ok = iter(results)
+    created_ids = [a.get('agent_id') or a.get('id') for a in new if next(ok)]
+    updated_ids = [a.get('agent_id') or a.get('id') for a in changed if next(ok)]
+
+    configured = {agent.get('agent_id') or agent.get('id') for agent in agents}
+    report = {
+        'written': written,
+        'created': len(new),
+        'updated': len(changed),
+        'skipped': len(skipped),
+        'unreachable_kept': len(kept),
+        'failed': len(results) - written,
+        'orphans': sorted(set(stored) - configured),
+        'created_ids': created_ids,
+        'updated_ids': updated_ids,
+    }
+    logger.info("Catalog sync: %(written)d written (%(created)d new, %(updated)d changed), "
+                "%(skipped)d unchanged, %(unreachable_kept)d kept while unreachable, "
+                "%(failed)d failed", report)
+    if report['orphans']:
+        logger.warning("Stored agents missing from the configuration: %s",
+                       ', '.join(report['orphans']))
+    return report
@@ -0,0 +1,79 @@
+"""
+Bounded log of catalog changes behind ``GET /agents/changes``.
+
+Every write to the catalog bumps a monotonically increasing version and
+appends an entry (created, updated or deleted, the latter as a tombstone
+without the agent). Clients that mirror the catalog remember the version
+they are at and ask only for what changed since. The log keeps the last
+``size`` entries; a client whose version predates the oldest retained entry
+is told to resync by re-reading ``/agents``.
+
+Versions start from the startup time in milliseconds rather than zero, so
+they keep increasing across restarts and a version handed out by a previous
+process falls below the new log's floor and triggers a resync.
+"""
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+CREATED = 'created'
+UPDATED = 'updated'
+DELETED = 'deleted'
+
+
+class ChangeLog:
+    """Catalog version counter plus the most recent changes."""
+
+    def __init__(self, size: int = 1000, start_version: Optional[int] = None):
+        self.version = int(time.time() * 1000) if start_version is None else start_version
+        # Changes after this version are all still in the log
+        self.floor = self.version
+        self._entries: deque = deque(maxlen=size)
+        self._listeners: List[Callable[[], None]] = []
+
+    def subscribe(self, listener: Callable[[], None]):
+        """Call ``listener`` after every recorded change."""
+        self._listeners.append(listener)
+
+    def record(self, change: str, agent_id: str,
+               agent: Optional[Dict[str, Any]] = None) -> int:
+        """Append a change and return the new catalog version."""
+        if len(self._entries) == self._entries.maxlen:
+            # The oldest entry is about to fall off the log
+            self.floor = self._entries[0]['version']
+        self.version += 1
+        self._entries.append({
+            'version': self.version,
+            'type': change,
+            'agent_id': agent_id,
+            'agent': None if change == DELETED else agent,
+        })
+        for listener in self._listeners:
+            listener()
+        return self.version
+
+    def covers(self, since: int) -> bool:
+        """Whether every change after ``since`` is still in the log."""
+        return self.floor <= since <= self.version
+
+    def since(self, since: int) -> Optional[List[Dict[str, Any]]]:
+        """Changes after ``since``, one per agent with its latest state.
+
+        Returns None when the log no longer covers ``since`` (or the version
+        is from another process) and the client has to resync.
+        """
+        if not self.covers(since):
+            return None
+        latest: Dict[str, Dict[str, Any]] = {}
+        for entry in self._entries:
+            if entry['version'] <= since:
+                continue
+            previous = latest.pop(entry['agent_id'], None)
+            if previous is not None and previous['type'] == CREATED and entry['type'] == UPDATED:
+                # New to this client, however often it changed since
+                entry = dict(entry, type=CREATED)
+            latest[entry['agent_id']] = entry
+        return list(latest.values())
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,189 @@
+"""
+Per-host circuit breakers and negative caching for agent card fetches.
+
+A host's breaker opens after ``failure_threshold`` consecutive transport
+failures (connection errors, timeouts, 5xx). While open, requests to the host
+fail immediately; after ``reset_timeout`` seconds a single half-open probe is
+let through, closing the breaker on success and re-opening it on failure.
+Independently, a failed URL is remembered for ``negative_ttl`` seconds so
+repeated clicks or retries get the cached error instead of a new request.
+
+Both are keyed by caller-supplied URLs, so both are bounded: at most
+``max_hosts`` breakers (least recently used closed ones are dropped first)
+and ``max_negative`` cached failures (expired ones are dropped as new ones
+arrive, then the oldest).
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """A request was refused without touching the network."""
+
+    def __init__(self, host: str, reason: str, retry_after: float):
+        super().__init__(f"{host} is unavailable ({reason}); retry in {retry_after:.0f}s")
+        self.host = host
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def host_of(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}".lower()
+
+
+class CircuitBreaker:
+    """Failure tracking and open/half-open/closed state for one host."""
+
+    def __init__(self, host: str, failure_threshold: int, reset_timeout: float):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.last_error: Optional[str] = None
+        self.successes = 0
+        self.failures = 0
+        self.rejected = 0
+
+    def acquire(self):
+        """Raise ``CircuitOpenError`` unless a request may go to this host now."""
+        if self.state == CLOSED:
+            return
+        remaining = self.opened_at + self.reset_timeout - time.monotonic()
+        if self.state == OPEN and remaining <= 0:
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN and not self.probe_in_flight:
+            self.probe_in_flight = True
+            return
+        self.rejected += 1
+        raise CircuitOpenError(self.host, self.last_error or 'circuit open',
+                               max(remaining, 1.0))
+
+    def release(self):
+        """Forget a half-open probe that ended without a verdict (e.g. cancelled)."""
+        self.probe_in_flight = False
+
+    def record_success(self):
+        self.successes += 1
+        self.consecutive_failures = 0
+        self.probe_in_flight = False
+        self.state = CLOSED
+
+    def record_failure(self, error: str):
+        self.failures += 1
+        self.consecutive_failures += 1
+        self.last_error = error
+        self.probe_in_flight = False
+        if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+
+    def snapshot(self) -> Dict[str, Any]:
+        retry_after = None
+        if self.state == OPEN:
+            retry_after = max(self.opened_at + self.reset_timeout - time.monotonic(), 0.0)
+        return {
+            'host': self.host,
+            'state': self.state,
+            'consecutive_failures': self.consecutive_failures,
+            'retry_after': retry_after,
+            'last_error': self.last_error,
+            'successes': self.successes,
+            'failures': self.failures,
+            'rejected': self.rejected,
+        }
+
+
+class HostBreakers:
+    """Circuit breakers keyed by host plus a short-lived cache of failed URLs."""
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0,
+                 negative_ttl: float = 15.0, max_hosts: int = 1024,
+                 max_negative: int = 4096):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.negative_ttl = negative_ttl
+        self.max_hosts = max_hosts
+        self.max_negative = max_negative
+        # Least recently used first
+        self._breakers: 'OrderedDict[str, CircuitBreaker]' = OrderedDict()
+        # url -> (expires at, error); one TTL, so insertion order is expiry order
+        self._negative: 'OrderedDict[str, Tuple[float, str]]' = OrderedDict()
+        self.negative_hits = 0
+        self.evicted_hosts = 0
+        self.evicted_negative = 0
+
+    def breaker(self, url: str) -> CircuitBreaker:
+        host = host_of(url)
+        breaker = self._breakers.get(host)
+        if breaker is not None:
+            self._breakers.move_to_end(host)
+            return breaker
+        if len(self._breakers) >= self.max_hosts:
+            self._evict_breaker()
+        breaker = self._breakers[host] = CircuitBreaker(
+            host, self.failure_threshold, self.reset_timeout)
+        return breaker
+
+    def _evict_breaker(self):
+        # Keep breakers that are protecting against a failing host if possible
+        victim = next((host for host, b in self._breakers.items()
+                       if b.state == CLOSED and not b.probe_in_flight),
+                      next(iter(self._breakers)))
+        del self._breakers[victim]
+        self.evicted_hosts += 1
+
+    def check_negative(self, url: str):
+        """Raise ``CircuitOpenError`` if ``url`` failed within the negative TTL."""
+        cached = self._negative.get(url)
+        if cached is None:
+            return
+        remaining = cached[0] - time.monotonic()
+        if remaining <= 0:
+            del self._negative[url]
+            return
+        self.negative_hits += 1
+        raise CircuitOpenError(host_of(url), cached[1], remaining)
+
+    def remember_failure(self, url: str, error: str):
+        now = time.monotonic()
+        self._negative.pop(url, None)
+        while self._negative:
+            oldest = next(iter(self._negative.values()))
+            if oldest[0] > now and len(self._negative) < self.max_negative:
+                break
+            if oldest[0] > now:
+                self.evicted_negative += 1
+            self._negative.popitem(last=False)
+        self._negative[url] = (now + self.negative_ttl, error)
+
+    def forget(self, url: str):
+        self._negative.pop(url, None)
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        for url in [u for u, (expires, _) in self._negative.items() if expires <= now]:
+            del self._negative[url]
+        return {
+            'failure_threshold': self.failure_threshold,
+            'reset_timeout': self.reset_timeout,
+            'negative_ttl': self.negative_ttl,
+            'max_hosts': self.max_hosts,
+            'max_negative': self.max_negative,
+            'evicted_hosts': self.evicted_hosts,
+            'evicted_negative': self.evicted_negative,
+            'hosts': [b.snapshot() for b in self._breakers.values()],
+            'negative_cache': [
+                {'url': url, 'error': error, 'expires_in': expires - now}
+                for url, (expires, error) in self._negative.items()],
+            'negative_hits': self.negative_hits,
+        }
@@ -0,0 +1,232 @@
+"""
+Compact in-memory store for agent documents.
+
+Stored agents are mostly repetition: every document carries the same
+protocol version, a handful of distinct input/output mode lists, and skills
+and tags shared with many other agents. ``CompactCatalog`` keeps each agent
+as a slotted ``AgentRecord`` whose strings are interned and whose mode lists,
+tag lists and skills are shared, deduplicated tuples and ``SkillRecord``
+objects. Reads rebuild the original document, with the same keys in the same
+order and the same values, so the store is a drop-in for a dict of documents
+and what it returns validates into the ``Agent`` model exactly as before.
+"""
+import sys
+from collections.abc import MutableMapping
+from operator import attrgetter
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Document keys kept in AgentRecord slots; everything else goes to ``extra``
+_STRING_FIELDS = ('name', 'description', 'homepage_url', 'openapi_url', 'version',
+                  'protocol_version', 'content_hash')
+_INTERNED_FIELDS = frozenset({'version', 'protocol_version'})
+_FLAG_FIELDS = ('streaming', 'supports_auth')
+_MODE_FIELDS = ('input_modes', 'output_modes')
+_SKILL_KEYS = ('id', 'name', 'description', 'examples', 'tags')
+_SLOTTED = frozenset(('id', 'agent_id', 'skills') + _STRING_FIELDS + _FLAG_FIELDS + _MODE_FIELDS)
+
+
+class SkillRecord:
+    """An immutable skill shared by every agent that declares it."""
+
+    __slots__ = _SKILL_KEYS
+
+    def __init__(self, id: str, name: str, description: str,
+                 examples: Tuple[str, ...], tags: Tuple[str, ...]):
+        self.id = id
+        self.name = name
+        self.description = description
+        self.examples = examples
+        self.tags = tags
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'id': self.id, 'name': self.name, 'description': self.description,
+                'examples': list(self.examples), 'tags': list(self.tags)}
+
+
+class AgentRecord:
+    """One agent document in compact form."""
+
+    __slots__ = ('layout', 'id') + _STRING_FIELDS + _FLAG_FIELDS + _MODE_FIELDS + (
+        'skills', 'extra')
+
+    def to_dict(self) -> Dict[str, Any]:
+        if self.extra is None:
+            return {key: get(self) for key, get in _read_plan(self.layout)}
+        doc = {}
+        for key in self.layout:
+            if key in ('id', 'agent_id'):
+                doc[key] = self.id if self.extra is None or key not in self.extra \
+                    else self.extra[key]
+            elif self.extra is not None and key in self.extra:
+                doc[key] = self.extra[key]
+            elif key == 'skills':
+                doc[key] = [s.to_dict() if isinstance(s, SkillRecord) else s
+                            for s in self.skills]
+            elif key in _MODE_FIELDS:
+                doc[key] = list(getattr(self, key))
+            else:
+                doc[key] = getattr(self, key)
+        return doc
+
+
+def _skill_dicts(record: AgentRecord) -> list:
+    return [s.to_dict() if isinstance(s, SkillRecord) else s for s in record.skills]
+
+
+def _getter(key: str):
+    if key in ('id', 'agent_id'):
+        return attrgetter('id')
+    if key == 'skills':
+        return _skill_dicts
+    if key in _MODE_FIELDS:
+        get = attrgetter(key)
+        return lambda record: list(get(record))
+    return attrgetter(key)
+
+
+_read_plans: Dict[Tuple[str, ...], tuple] = {}
+
+
+def _read_plan(layout: Tuple[str, ...]) -> tuple:
+    """(key, getter) pairs rebuilding a document with this key layout."""
+    plan = _read_plans.get(layout)
+    if plan is None:
+        plan = _read_plans[layout] = tuple((key, _getter(key)) for key in layout)
+    return plan
+
+
+def _is_str_list(value) -> bool:
+    return isinstance(value, list) and all(isinstance(v, str) for v in value)
+
+
+class CompactCatalog(MutableMapping):
+    """Mapping of agent ID to agent document, stored as ``AgentRecord``s."""
+
+    def __init__(self, documents: Optional[Dict[str, Dict[str, Any]]] = None):
+        self._records: Dict[str, AgentRecord] = {}
+        # Shared pools; entries stay for the life of the catalog
+        self._tuples: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+        self._skills: Dict[tuple, SkillRecord] = {}
+        self._layouts: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+        # Rebuilt documents by agent ID once documents() has been called;
+        # writes then update just their own entry
+        self._documents: Optional[Dict[str, Dict[str, Any]]] = None
+        if documents:
+            self.update(documents)
+
+    def _strings(self, values) -> Tuple[str, ...]:
+        key = tuple(sys.intern(v) for v in values)
+        return self._tuples.setdefault(key, key)
+
+    def _skill(self, skill):
+        if isinstance(skill, str):
+            return sys.intern(skill)
+        if (isinstance(skill, dict) and tuple(skill) == _SKILL_KEYS
+                and all(isinstance(skill[k], str) for k in ('id', 'name', 'description'))
+                and _is_str_list(skill['examples']) and _is_str_list(skill['tags'])):
+            key = (sys.intern(skill['id']), sys.intern(skill['name']), skill['description'],
+                   self._strings(skill['examples']), self._strings(skill['tags']))
+            record = self._skills.get(key)
+            if record is None:
+                record = self._skills[key] = SkillRecord(*key)
+            return record
+        # Anything unusual is kept as given
+        return skill
+
+    def pack(self, doc: Dict[str, Any]) -> AgentRecord:
+        """Convert a document to a record without storing it."""
+        record = AgentRecord()
+        layout = tuple(doc)
+        record.layout = self._layouts.setdefault(layout, layout)
+        extra: Dict[str, Any] = {}
+
+        agent_id = doc.get('agent_id', doc.get('id'))
+        record.id = sys.intern(agent_id) if isinstance(agent_id, str) else agent_id
+        if 'id' in doc and 'agent_id' in doc and doc['id'] != doc['agent_id']:
+            extra['id'] = doc['id']
+
+        for key in _STRING_FIELDS:
+            value = doc.get(key)
+            if key in doc and not isinstance(value, str):
+                extra[key] = value
+                value = None
+            elif value is not None and key in _INTERNED_FIELDS:
+                value = sys.intern(value)
+            setattr(record, key, value)
+        for key in _FLAG_FIELDS:
+            value = doc.get(key)
+            if key in doc and not isinstance(value, bool):
+                extra[key] = value
+                value = None
+            setattr(record, key, value)
+        for key in _MODE_FIELDS:
+            value = doc.get(key, [])
+            if _is_str_list(value):
+                setattr(record, key, self._strings(value))
+            else:
+                extra[key] = value
+                setattr(record, key, ())
+
+        skills = doc.get('skills', [])
+        if isinstance(skills, list):
+            record.skills = tuple(self._skill(s) for s in skills)
+        else:
+            extra['skills'] = skills
+            record.skills = ()
+
+        for key, value in doc.items():
+            if key not in _SLOTTED:
+                extra[key] = value
+        record.extra = extra or None
+        return record
+
+    def __setitem__(self, agent_id: str, doc: Dict[str, Any]):
+        record = self._records[agent_id] = self.pack(doc)
+        if self._documents is not None:
+            self._documents[agent_id] = record.to_dict()
+
+    def __getitem__(self, agent_id: str) -> Dict[str, Any]:
+        return self._records[agent_id].to_dict()
+
+    def __delitem__(self, agent_id: str):
+        del self._records[agent_id]
+        if self._documents is not None:
+            del self._documents[agent_id]
+
+    def __contains__(self, agent_id) -> bool:
+        return agent_id in self._records
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._records)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def record(self, agent_id: str) -> Optional[AgentRecord]:
+        return self._records.get(agent_id)
+
+    def documents(self) -> List[Dict[str, Any]]:
+        """All documents, in insertion order.
+
+        The first call rebuilds every document; after that each write
+        rebuilds only its own, so later calls just copy the list. The
+        documents are shared between calls.
+        """
+        if self._documents is None:
+            self._documents = {agent_id: record.to_dict()
+                               for agent_id, record in self._records.items()}
+        return list(self._documents.values())
+
+    def hashes(self) -> Dict[str, Optional[str]]:
+        """Map every agent ID to its ``content_hash`` without rebuilding documents."""
+        hashes = {}
+        for agent_id, record in self._records.items():
+            if record.extra is not None and 'content_hash' in record.extra:
+                hashes[agent_id] = record.extra['content_hash']
+            else:
+                hashes[agent_id] = record.content_hash
+        return hashes
+
+    def stats(self) -> Dict[str, int]:
+        return {'agents': len(self._records), 'shared_skills': len(self._skills),
+                'shared_lists': len(self._tuples), 'layouts': len(self._layouts)}
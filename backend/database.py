@@ -1,9 +1,13 @@
 import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from azure.cosmos import CosmosClient, PartitionKey, exceptions
-from typing import List, Dict, Optional, Any
+from typing import Callable, List, Dict, Optional, Any, Tuple
 import json
 from dotenv import load_dotenv
 import logging
+from compact_catalog import CompactCatalog
+from tracing import traced
 
 # Load environment variables
 load_dotenv()
@@ -23,6 +27,11 @@ class CosmosDBManager:
             "COSMOS_AGENTS_CONTAINER", "agents")
         self.config_container_name = os.getenv(
             "COSMOS_CONFIG_CONTAINER", "configuration")
+        # Upper bound on concurrent Cosmos requests issued by batched writes
+        self.max_parallel = int(os.getenv("COSMOS_MAX_PARALLEL", "16"))
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # The configuration is one document rewritten whole; edits take turns
+        self._config_lock = asyncio.Lock()
 
         if not self.endpoint or not self.key:
             logger.warning("Cosmos DB credentials not found. Using mock mode.")
@@ -30,7 +39,7 @@ class CosmosDBManager:
             self.database = None
             self.agents_container = None
             self.config_container = None
-            self._mock_agents = {}
+            self._mock_agents = CompactCatalog()
             self._mock_config = {"agents": []}
         else:
             self._initialize_cosmos_client()
@@ -85,17 +94,18 @@ class CosmosDBManager:
             self.database = None
             self.agents_container = None
             self.config_container = None
-            self._mock_agents = {}
+            self._mock_agents = CompactCatalog()
             self._mock_config = {"agents": []}
 
     def is_mock_mode(self) -> bool:
         """Check if the database is running in mock mode."""
         return self.client is None
 
+    @traced("db.get_all_agents")
     async def get_all_agents(self) -> List[Dict[str, Any]]:
         """Retrieve all agents from the database."""
         if self.is_mock_mode():
-            return list(self._mock_agents.values())
+            return self._mock_agents.documents()
 
         try:
             items = list(self.agents_container.read_all_items())
@@ -104,6 +114,41 @@ class CosmosDBManager:
             logger.error(f"Error retrieving agents: {str(e)}")
             return []
 
+    @traced("db.restore_agents")
+    async def restore_agents(self, agents: List[Dict[str, Any]]) -> int:
+        """Seed storage from a warm-start snapshot; returns the number restored.
+
+        Only the in-memory mock store needs this: Cosmos DB is persistent and
+        remains the source of truth.
+        """
+        if not self.is_mock_mode():
+            return 0
+        self._mock_agents = CompactCatalog(
+            {agent["id"]: agent for agent in agents if agent.get("id")})
+        # Build the document list now, during startup, rather than on the first read
+        self._mock_agents.documents()
+        return len(self._mock_agents)
+
+    @traced("db.get_agent_hashes")
+    async def get_agent_hashes(self) -> Optional[Dict[str, Optional[str]]]:
+        """Map every stored agent ID to its ``content_hash`` (None if it has none).
+
+        Returns None if the stored agents could not be listed.
+        """
+        if self.is_mock_mode():
+            return self._mock_agents.hashes()
+
+        try:
+            # Project just the two fields so the scan stays cheap in RU
+            items = self.agents_container.query_items(
+                query="SELECT c.id, c.content_hash FROM c",
+                enable_cross_partition_query=True)
+            return {item["id"]: item.get("content_hash") for item in items}
+        except Exception as e:
+            logger.error(f"Error listing agent hashes: {str(e)}")
+            return None
+
+    @traced("db.get_agent")
     async def get_agent(self, agent_id: str) -> Optional[Dict[str, Any]]:
         """Retrieve a specific agent by ID."""
         if self.is_mock_mode():
@@ -119,6 +164,35 @@ class CosmosDBManager:
             logger.error(f"Error retrieving agent {agent_id}: {str(e)}")
             return None
 
+    @traced("db.get_agents")
+    async def get_agents(self, agent_ids: List[str]) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Retrieve several agents in one read, keyed by ID.
+
+        IDs that are not stored are left out. Returns None if the read failed.
+        """
+        if self.is_mock_mode():
+            return {agent_id: agent for agent_id in agent_ids
+                    if (agent := self._mock_agents.get(agent_id)) is not None}
+        if not agent_ids:
+            return {}
+
+        try:
+            return await self._in_pool(self._query_agents, list(agent_ids))
+        except Exception as e:
+            logger.error(f"Error retrieving {len(agent_ids)} agents: {str(e)}")
+            return None
+
+    def _query_agents(self, agent_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        # One cross-partition query instead of a point read per agent
+        names = [f"@id{i}" for i in range(len(agent_ids))]
+        items = self.agents_container.query_items(
+            query=f"SELECT * FROM c WHERE c.id IN ({', '.join(names)})",
+            parameters=[{"name": name, "value": agent_id}
+                        for name, agent_id in zip(names, agent_ids)],
+            enable_cross_partition_query=True)
+        return {item["id"]: item for item in items}
+
+    @traced("db.create_agent")
     async def create_agent(self, agent_data: Dict[str, Any]) -> bool:
         """Create a new agent in the database."""
         # Use agent_id as the primary key, but also set id for Cosmos DB
@@ -142,6 +216,7 @@ class CosmosDBManager:
             logger.error(f"Error creating agent: {str(e)}")
             return False
 
+    @traced("db.update_agent")
     async def update_agent(self, agent_id: str, agent_data: Dict[str, Any]) -> bool:
         """Update an existing agent in the database."""
         # Ensure both id and agent_id are set for compatibility
@@ -161,6 +236,7 @@ class CosmosDBManager:
             logger.error(f"Error updating agent {agent_id}: {str(e)}")
             return False
 
+    @traced("db.delete_agent")
     async def delete_agent(self, agent_id: str) -> bool:
         """Delete an agent from the database."""
         if self.is_mock_mode():
@@ -179,6 +255,7 @@ class CosmosDBManager:
             logger.error(f"Error deleting agent {agent_id}: {str(e)}")
             return False
 
+    @traced("db.get_configuration")
     async def get_configuration(self) -> Dict[str, Any]:
         """Retrieve the agent configuration."""
         if self.is_mock_mode():
@@ -197,6 +274,7 @@ class CosmosDBManager:
             logger.error(f"Error retrieving configuration: {str(e)}")
             return {"agents": []}
 
+    @traced("db.update_configuration")
     async def update_configuration(self, config_data: Dict[str, Any]) -> bool:
         """Update the agent configuration."""
         if self.is_mock_mode():
@@ -212,32 +290,202 @@ class CosmosDBManager:
             logger.error(f"Error updating configuration: {str(e)}")
             return False
 
+    @traced("db.add_agent_to_config")
     async def add_agent_to_config(self, agent_id: str, agent_url: str) -> bool:
         """Add an agent to the configuration."""
-        config = await self.get_configuration()
-
-        # Check if agent already exists in config
-        agent_exists = any(
-            a.get('id') == agent_id for a in config.get('agents', []))
-        if not agent_exists:
-            if 'agents' not in config:
-                config['agents'] = []
-            config['agents'].append({
-                "id": agent_id,
-                "url": agent_url
-            })
-            return await self.update_configuration(config)
-        return True
+        async with self._config_lock:
+            config = await self.get_configuration()
+
+            # Check if agent already exists in config
+            agent_exists = any(
+                a.get('id') == agent_id for a in config.get('agents', []))
+            if not agent_exists:
+                if 'agents' not in config:
+                    config['agents'] = []
+                config['agents'].append({
+                    "id": agent_id,
+                    "url": agent_url
+                })
+                return await self.update_configuration(config)
+            return True
 
+    @traced("db.remove_agent_from_config")
     async def remove_agent_from_config(self, agent_id: str) -> bool:
         """Remove an agent from the configuration."""
-        config = await self.get_configuration()
+        async with self._config_lock:
+            config = await self.get_configuration()
+
+            if 'agents' in config:
+                config['agents'] = [a for a in config['agents']
+                                    if a.get('id') != agent_id]
+                return await self.update_configuration(config)
+            return True
+
+    # -- batched writes ------------------------------------------------------
+    #
+    # Agents are partitioned by their own id, so a transactional batch can
+    # only ever hold one agent. Batched writes instead fan the per-item
+    # requests out over a bounded thread pool (the Cosmos SDK is synchronous),
+    # which turns N sequential round trips into about N / max_parallel.
+
+    def _pool(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_parallel, thread_name_prefix="cosmos")
+        return self._executor
+
+    async def _in_pool(self, fn: Callable, *args) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self._pool(), fn, *args)
+
+    def _create_item(self, agent_data: Dict[str, Any]) -> bool:
+        try:
+            self.agents_container.create_item(body=agent_data)
+            return True
+        except exceptions.CosmosResourceExistsError:
+            logger.info(f"Agent {agent_data['id']} already exists; not overwritten")
+            return False
+        except Exception as e:
+            logger.error(f"Error creating agent {agent_data['id']}: {str(e)}")
+            return False
+
+    def _upsert_item(self, agent_data: Dict[str, Any]) -> bool:
+        try:
+            self.agents_container.upsert_item(body=agent_data)
+            return True
+        except Exception as e:
+            logger.error(f"Error updating agent {agent_data['id']}: {str(e)}")
+            return False
+
+    def _delete_item(self, agent_id: str) -> bool:
+        try:
+            self.agents_container.delete_item(item=agent_id, partition_key=agent_id)
+            return True
+        except exceptions.CosmosResourceNotFoundError:
+            return False
+        except Exception as e:
+            logger.error(f"Error deleting agent {agent_id}: {str(e)}")
+            return False
+
+    def _edit_config(self, edit: Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]]
+                     ) -> Tuple[bool, bool]:
+        """Read the configuration, replace its agent list with ``edit(agents)`` and write it back.
 
-        if 'agents' in config:
-            config['agents'] = [a for a in config['agents']
-                                if a.get('id') != agent_id]
-            return await self.update_configuration(config)
-        return True
+        Returns (succeeded, changed); an edit that returns the list it was
+        given leaves the configuration untouched.
+        """
+        try:
+            try:
+                config = self.config_container.read_item(
+                    item="main_config", partition_key="main_config")
+            except exceptions.CosmosResourceNotFoundError:
+                config = {"id": "main_config", "agents": []}
+            agents = config.get("agents", [])
+            edited = edit(agents)
+            if edited is agents:
+                return True, False
+            config["agents"] = edited
+            config["id"] = "main_config"
+            self.config_container.upsert_item(body=config)
+            return True, True
+        except Exception as e:
+            logger.error(f"Error updating configuration: {str(e)}")
+            return False, False
+
+    async def _edit_config_in_turn(self, edit) -> Tuple[bool, bool]:
+        """Run ``_edit_config`` in the pool, one configuration edit at a time."""
+        async with self._config_lock:
+            return await self._in_pool(self._edit_config, edit)
+
+    @staticmethod
+    def _with_agent(agent_id: str, agent_url: str):
+        def edit(agents):
+            if any(a.get('id') == agent_id for a in agents):
+                return agents
+            return agents + [{"id": agent_id, "url": agent_url}]
+        return edit
+
+    @staticmethod
+    def _without_agent(agent_id: str):
+        def edit(agents):
+            if not any(a.get('id') == agent_id for a in agents):
+                return agents
+            return [a for a in agents if a.get('id') != agent_id]
+        return edit
+
+    async def _write_agents(self, agents: List[Dict[str, Any]],
+                            write: Callable[[Dict[str, Any]], bool]) -> List[bool]:
+        results = []
+        documents = []
+        for agent_data in agents:
+            agent_id = agent_data.get("agent_id") or agent_data.get("id")
+            if not agent_id:
+                logger.error("Agent data missing both 'id' and 'agent_id' fields")
+            else:
+                agent_data["id"] = agent_id
+                agent_data["agent_id"] = agent_id
+                documents.append(agent_data)
+            results.append(bool(agent_id))
+
+        if self.is_mock_mode():
+            for agent_data in documents:
+                self._mock_agents[agent_data["id"]] = agent_data
+            return results
+
+        written = iter(await asyncio.gather(
+            *(self._in_pool(write, doc) for doc in documents)))
+        return [ok and next(written) for ok in results]
+
+    @traced("db.create_agents")
+    async def create_agents(self, agents: List[Dict[str, Any]]) -> List[bool]:
+        """Create many agents with bounded parallelism; returns per-agent success."""
+        return await self._write_agents(agents, self._create_item)
+
+    @traced("db.upsert_agents")
+    async def upsert_agents(self, agents: List[Dict[str, Any]]) -> List[bool]:
+        """Create or replace many agents with bounded parallelism."""
+        return await self._write_agents(agents, self._upsert_item)
+
+    @traced("db.register_agent")
+    async def register_agent(self, agent_data: Dict[str, Any], agent_url: str) -> bool:
+        """Create an agent and add it to the configuration in one round trip.
+
+        Both writes are issued concurrently; if either fails, whatever the
+        other changed is undone so the catalog and the configuration stay
+        consistent. A configuration entry that already existed is kept.
+        """
+        agent_id = agent_data.get("agent_id") or agent_data.get("id")
+        if self.is_mock_mode():
+            return (await self.create_agent(agent_data)
+                    and await self.add_agent_to_config(agent_id, agent_url))
+
+        agent_data["id"] = agent_id
+        agent_data["agent_id"] = agent_id
+        created, (configured, added) = await asyncio.gather(
+            self._in_pool(self._create_item, agent_data),
+            self._edit_config_in_turn(self._with_agent(agent_id, agent_url)))
+        if created and not configured:
+            await self._in_pool(self._delete_item, agent_id)
+        elif added and not created:
+            await self._edit_config_in_turn(self._without_agent(agent_id))
+        return created and configured
+
+    @traced("db.unregister_agent")
+    async def unregister_agent(self, agent_data: Dict[str, Any]) -> bool:
+        """Delete a stored agent and drop it from the configuration in one round trip."""
+        agent_id = agent_data.get("agent_id") or agent_data.get("id")
+        if self.is_mock_mode():
+            return (await self.delete_agent(agent_id)
+                    and await self.remove_agent_from_config(agent_id))
+
+        deleted, (configured, removed) = await asyncio.gather(
+            self._in_pool(self._delete_item, agent_id),
+            self._edit_config_in_turn(self._without_agent(agent_id)))
+        if deleted and not configured:
+            await self._in_pool(self._create_item, agent_data)
+        elif removed and not deleted:
+            await self._edit_config_in_turn(self._with_agent(
+                agent_id, agent_data.get("homepage_url", "")))
+        return deleted and configured
 
 
 # Global database instance
@@ -1,12 +1,26 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Query, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 from typing import List, Dict, Optional, Union, Any
 import json
+import logging
+import math
 import httpx
 import os
 import asyncio
+from admission import AdmissionLimiter, Overloaded
+from agent_events import AgentEvents
+from catalog_snapshot import CatalogSnapshots
+from change_log import CREATED, DELETED, UPDATED, ChangeLog
+from circuit_breaker import CircuitOpenError, HostBreakers
+from catalog_sync import content_hash, sync_agents
 from database import db_manager
+from profiling import ProfilingMiddleware, SlowestRequests, http_extensions, phase
+from search import SkillIndex
+from tracing import TraceMiddleware, propagation_headers, span
+
+logger = logging.getLogger(__name__)
 
 
 class Skill(BaseModel):
@@ -36,6 +50,24 @@ class Agent(BaseModel):
         arbitrary_types_allowed = True
 
 
+class AgentMatch(BaseModel):
+    agent: Agent
+    score: float
+
+
+class AgentChange(BaseModel):
+    version: int
+    type: str
+    agent_id: str
+    agent: Optional[Agent] = None
+
+
+class CatalogChanges(BaseModel):
+    version: int
+    resync: bool = False
+    changes: List[AgentChange] = []
+
+
 class TestUrlRequest(BaseModel):
     url: str
 
@@ -108,8 +140,96 @@ def parse_agent_data(card: dict, agent_id: str = None, base_url: str = None) ->
     }
 
 
+# Dead agent hosts fail fast instead of tying up requests for the full timeout
+host_breakers = HostBreakers(
+    failure_threshold=int(os.getenv("AGENT_BREAKER_FAILURES", "3")),
+    reset_timeout=float(os.getenv("AGENT_BREAKER_RESET_SECONDS", "30")),
+    negative_ttl=float(os.getenv("AGENT_NEGATIVE_CACHE_SECONDS", "15")),
+    max_hosts=int(os.getenv("AGENT_BREAKER_MAX_HOSTS", "1024")),
+    max_negative=int(os.getenv("AGENT_NEGATIVE_CACHE_SIZE", "4096")))
+
+
+class AgentCardError(Exception):
+    """The agent card could not be fetched or parsed."""
+
+
+async def fetch_agent_card(client: httpx.AsyncClient, url: str,
+                           try_trailing_slash: bool = True) -> dict:
+    """Fetch an agent card through the host's circuit breaker.
+
+    Tries ``url`` and then ``url/``. Raises ``CircuitOpenError`` without a
+    request when the host's breaker is open or the URL failed recently, and
+    ``AgentCardError`` when the card cannot be fetched or parsed.
+    """
+    host_breakers.check_negative(url)
+    breaker = host_breakers.breaker(url)
+    candidates = [url]
+    if try_trailing_slash and f"{url.rstrip('/')}/" != url:
+        candidates.append(f"{url.rstrip('/')}/")
+
+    error = "Unable to fetch agent card"
+    for candidate in candidates:
+        breaker.acquire()
+        try:
+            with phase("card_fetch", url=candidate), \
+                    span("card_fetch", kind='client', url=candidate) as fetch_span:
+                resp = await client.get(candidate, headers=propagation_headers(fetch_span),
+                                        extensions=http_extensions("card_fetch"))
+                fetch_span.set(status=resp.status_code)
+        except httpx.RequestError as e:
+            error = f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+            breaker.record_failure(error)
+            # The host is unreachable, so the other URL form would fail too
+            break
+        except BaseException:
+            breaker.release()
+            raise
+        if resp.status_code >= 500:
+            error = f"HTTP {resp.status_code}"
+            breaker.record_failure(error)
+            continue
+        breaker.record_success()
+        try:
+            resp.raise_for_status()
+            card = resp.json()
+        except (httpx.HTTPStatusError, json.JSONDecodeError) as e:
+            error = f"HTTP {resp.status_code}" if resp.is_error else f"Invalid JSON: {e}"
+            continue
+        host_breakers.forget(url)
+        return card
+
+    host_breakers.remember_failure(url, error)
+    raise AgentCardError(error)
+
+
+def unavailable(error: CircuitOpenError) -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail=str(error),
+        headers={"Retry-After": str(math.ceil(error.retry_after))}
+    )
+
+
+def route_limiter(route: str, env_prefix: str, limit: int, max_queue: int,
+                  max_wait: float) -> AdmissionLimiter:
+    """Admission limiter for a route, overridable with ``<env_prefix>_LIMIT/_QUEUE/_MAX_WAIT``."""
+    return AdmissionLimiter(
+        route,
+        limit=int(os.getenv(f"{env_prefix}_LIMIT", str(limit))),
+        max_queue=int(os.getenv(f"{env_prefix}_QUEUE", str(max_queue))),
+        max_wait=float(os.getenv(f"{env_prefix}_MAX_WAIT", str(max_wait))))
+
+
+# Endpoints that fetch agent cards are throttled so a burst of them cannot
+# crowd out the catalog reads on the same event loop
+admission = {
+    "/test-agent-url": route_limiter("/test-agent-url", "ADMISSION_TEST_URL", 8, 32, 5.0),
+    "/add-agent": route_limiter("/add-agent", "ADMISSION_ADD_AGENT", 4, 16, 10.0),
+}
+
+
 async def load_agents_from_config():
-    """Load agent configurations and populate the database."""
+    """Load agent configurations and sync them into the database; returns the sync report."""
     # Check if we're in mock mode and need to load from file
     if db_manager.is_mock_mode():
         config_path = os.path.join(
@@ -153,20 +273,28 @@ async def load_agents_from_config():
 
         results = await asyncio.gather(*tasks)
 
-        for agent in results:
-            if agent:
-                # Store agent in database
-                agent_dict = agent.model_dump(by_alias=True)
-                await db_manager.create_agent(agent_dict)
+    # Write only new or changed agents, in one batched write
+    agents = [agent.model_dump(by_alias=True) for agent, _ in results]
+    report = await sync_agents(
+        db_manager, agents,
+        unreachable=[agent.id for agent, reachable in results if not reachable])
+    for agent, (_, reachable) in zip(agents, results):
+        snapshots.record_card(agent['agent_id'], agent['homepage_url'], reachable,
+                              agent['content_hash'])
+    by_id = {agent['agent_id']: agent for agent in agents}
+    for agent_id in report['created_ids']:
+        change_log.record(CREATED, agent_id, by_id[agent_id])
+    for agent_id in report['updated_ids']:
+        change_log.record(UPDATED, agent_id, by_id[agent_id])
+    return report
 
 
 async def fetch_agent_details(client: httpx.AsyncClient, entry: dict, sample_data: dict):
+    """Return (agent, reachable); unreachable agents get placeholder details."""
     agent_id = entry.get('id')
     base_url = entry.get('url')
     try:
-        resp = await client.get(base_url)
-        resp.raise_for_status()
-        card = resp.json()
+        card = await fetch_agent_card(client, base_url, try_trailing_slash=False)
 
         # Parse using the new parser
         agent_data = parse_agent_data(card, agent_id, base_url)
@@ -180,9 +308,9 @@ async def fetch_agent_details(client: httpx.AsyncClient, entry: dict, sample_dat
                 'streaming': mock_data.get("streaming", agent_data['streaming'])
             })
 
-        return Agent(**agent_data)
+        return Agent(**agent_data), True
 
-    except (httpx.RequestError, json.JSONDecodeError):
+    except (AgentCardError, CircuitOpenError):
         # Fallback for connection errors
         mock_data = sample_data.get(agent_id, {})
         return Agent(
@@ -195,21 +323,82 @@ async def fetch_agent_details(client: httpx.AsyncClient, entry: dict, sample_dat
             skills=mock_data.get("skills", []),
             streaming=mock_data.get("streaming", False),
             protocol_version="v0.2.6"
-        )
+        ), False
 
 
 app = FastAPI()
 
 
+@app.exception_handler(Overloaded)
+async def overloaded_handler(request, exc: Overloaded):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(math.ceil(exc.retry_after))}
+    )
+
+
+# Ranked search over the catalog, kept in step with agent adds and deletes
+skill_index = SkillIndex()
+
+# Catalog version and recent changes for clients that sync incrementally
+change_log = ChangeLog(int(os.getenv("CATALOG_CHANGE_LOG_SIZE", "1000")))
+
+# Server-sent events pushed to clients whenever the change log grows
+agent_events = AgentEvents(
+    change_log, encode=lambda entry: AgentChange(**entry).model_dump_json(by_alias=True),
+    heartbeat=float(os.getenv("AGENT_EVENTS_HEARTBEAT_SECONDS", "15")))
+
+# Warm-start snapshot of the catalog; an empty path disables it
+snapshots = CatalogSnapshots(
+    os.getenv("CATALOG_SNAPSHOT_PATH",
+              os.path.join(os.path.dirname(__file__), "catalog.snapshot")),
+    interval=float(os.getenv("CATALOG_SNAPSHOT_INTERVAL", "60")))
+
+
+async def refresh_catalog():
+    """Re-fetch every configured agent card and sync the catalog and index."""
+    await load_agents_from_config()
+    skill_index.add_all(await db_manager.get_all_agents())
+
+
+async def reconcile_catalog():
+    """Background refresh after a warm start; on failure the snapshot data stays in place."""
+    try:
+        await refresh_catalog()
+    except Exception:
+        logger.exception("Catalog reconcile after warm start failed")
+
+
 @app.on_event("startup")
 async def startup_event():
-    await load_agents_from_config()
+    agents = snapshots.restore()
+    if agents is None:
+        await refresh_catalog()
+    else:
+        # Serve the snapshot right away and reconcile with the live cards in the background
+        await db_manager.restore_agents(agents)
+        skill_index.add_all(agents)
+        app.state.reconcile_task = asyncio.create_task(reconcile_catalog())
+    app.state.snapshot_task = asyncio.create_task(snapshots.run(db_manager))
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown."""
-    pass
+    for name in ("reconcile_task", "snapshot_task"):
+        task = getattr(app.state, name, None)
+        if task is not None:
+            task.cancel()
+    await snapshots.save(db_manager)
+
+# Opt-in profiling: send "X-Profile: 1" or set a sampling rate
+slow_requests = SlowestRequests(int(os.getenv("PROFILE_KEEP", "20")))
+app.add_middleware(ProfilingMiddleware, store=slow_requests,
+                   sample_rate=float(os.getenv("PROFILE_SAMPLE_RATE", "0")))
+
+# Tracing: set TRACE_FILE to export spans; incoming traceparent headers are continued
+app.add_middleware(TraceMiddleware)
 
 # Enable CORS for all origins (you can restrict in production)
 app.add_middleware(
@@ -217,52 +406,144 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Catalog-Version"],
 )
 
 
 @app.get("/agents", response_model=List[Agent])
-async def get_agents():
-    """Return the list of registered A2A agents."""
+async def get_agents(response: Response):
+    """Return the list of registered A2A agents.
+
+    ``X-Catalog-Version`` is the version to pass to ``/agents/changes`` next.
+    """
+    # Read the version first, so a concurrent write is replayed rather than missed
+    response.headers["X-Catalog-Version"] = str(change_log.version)
     agents_data = await db_manager.get_all_agents()
     return agents_data
 
 
+@app.get("/agents/changes", response_model=CatalogChanges)
+async def get_agent_changes(since: int = Query(..., ge=0)):
+    """Return agents created, updated or deleted after catalog version ``since``.
+
+    Deleted agents come back as tombstones without agent data. When ``since``
+    is older than the retained change log, ``resync`` is set and the client
+    should re-read ``/agents``.
+    """
+    changes = change_log.since(since)
+    if changes is None:
+        return {"version": change_log.version, "resync": True}
+    return {"version": change_log.version, "changes": changes}
+
+
+@app.get("/agents/events")
+async def stream_agent_events(since: Optional[int] = Query(None, ge=0),
+                              last_event_id: Optional[str] = Header(None)):
+    """Stream created, updated and deleted agents as server-sent events.
+
+    Event ids are catalog versions. A reconnecting client resumes from its
+    ``Last-Event-ID`` header; a new one can pass ``since`` (the
+    ``X-Catalog-Version`` of its ``/agents`` read) to miss nothing in between.
+    A ``resync`` event means the client should re-read ``/agents``.
+    """
+    resume = AgentEvents.parse_last_event_id(last_event_id)
+    return StreamingResponse(
+        agent_events.stream(resume if resume is not None else since),
+        media_type="text/event-stream",
+        # Keep proxies (nginx) from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.get("/agents/match", response_model=List[AgentMatch])
+async def match_agents(q: str = Query(..., min_length=1),
+                       limit: int = Query(10, ge=1, le=100)):
+    """Rank agents by how well their name, description and skills match a task."""
+    ranked = skill_index.match(q, limit)
+    agents = await db_manager.get_agents([agent_id for agent_id, _ in ranked])
+    if agents is None:
+        raise HTTPException(status_code=500, detail="Failed to read matching agents")
+
+    matches = []
+    for agent_id, score in ranked:
+        agent_data = agents.get(agent_id)
+        if agent_data is None:
+            # Removed from the database behind our back
+            skill_index.remove(agent_id)
+            continue
+        matches.append({"agent": agent_data, "score": score})
+    return matches
+
+
 @app.get("/agents/{agent_id}", response_model=Agent)
-async def get_agent(agent_id: str):
+async def get_agent(agent_id: str, response: Response):
     """Return details of a single agent by ID."""
+    response.headers["X-Catalog-Version"] = str(change_log.version)
     agent_data = await db_manager.get_agent(agent_id)
     if agent_data:
         return agent_data
     raise HTTPException(status_code=404, detail="Agent not found")
 
 
+@app.get("/circuit-breakers")
+async def get_circuit_breakers():
+    """Return per-host breaker state and the cached URL failures."""
+    return host_breakers.snapshot()
+
+
+@app.get("/admin/profiles")
+async def get_profiles():
+    """Return the slowest profiled requests with their phase breakdowns."""
+    return {
+        "profiled": slow_requests.profiled,
+        "slowest": slow_requests.slowest()
+    }
+
+
+@app.delete("/admin/profiles")
+async def clear_profiles():
+    """Forget the collected request profiles."""
+    slow_requests.clear()
+    return {"success": True}
+
+
+@app.get("/admin/events")
+async def get_event_stats():
+    """Return the number of event stream subscribers and events sent."""
+    return agent_events.stats()
+
+
+@app.get("/admin/admission")
+async def get_admission_stats():
+    """Return per-route concurrency, queue and shed counts."""
+    return {route: limiter.snapshot() for route, limiter in admission.items()}
+
+
 @app.post("/test-agent-url", response_model=TestUrlResponse)
+@admission["/test-agent-url"]
 async def test_agent_url(request: TestUrlRequest):
     """Test a URL to see if it's a valid A2A agent."""
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            # Try to fetch the agent's base endpoint
+        with phase("http_client"):
+            client = httpx.AsyncClient(timeout=10.0)
+        async with client:
+            # Try the agent's base endpoint, then the common A2A form
             try:
-                resp = await client.get(request.url)
-                resp.raise_for_status()
-                card = resp.json()
-            except (httpx.RequestError, httpx.HTTPStatusError, json.JSONDecodeError):
-                # If direct access fails, try common A2A endpoints
-                try:
-                    resp = await client.get(f"{request.url.rstrip('/')}/")
-                    resp.raise_for_status()
-                    card = resp.json()
-                except (httpx.RequestError, httpx.HTTPStatusError, json.JSONDecodeError):
-                    raise HTTPException(
-                        status_code=400,
-                        detail="Unable to connect to the URL or parse agent information"
-                    )
+                card = await fetch_agent_card(client, request.url)
+            except CircuitOpenError as e:
+                raise unavailable(e)
+            except AgentCardError:
+                raise HTTPException(
+                    status_code=400,
+                    detail="Unable to connect to the URL or parse agent information"
+                )
 
             # Parse agent data using the new parser
-            agent_data = parse_agent_data(card, base_url=request.url)
+            with phase("parse_card"):
+                agent_data = parse_agent_data(card, base_url=request.url)
 
             # Create a preview agent object
-            preview_agent = Agent(**agent_data)
+            with phase("validate"):
+                preview_agent = Agent(**agent_data)
 
             return TestUrlResponse(
                 success=True,
@@ -279,28 +560,27 @@ async def test_agent_url(request: TestUrlRequest):
 
 
 @app.post("/add-agent")
+@admission["/add-agent"]
 async def add_agent(request: AddAgentRequest):
     """Add a new agent to the catalog."""
     try:
         # First test the URL to make sure it's valid
-        async with httpx.AsyncClient(timeout=10.0) as client:
+        with phase("http_client"):
+            client = httpx.AsyncClient(timeout=10.0)
+        async with client:
             try:
-                resp = await client.get(request.url)
-                resp.raise_for_status()
-                card = resp.json()
-            except (httpx.RequestError, httpx.HTTPStatusError, json.JSONDecodeError):
-                try:
-                    resp = await client.get(f"{request.url.rstrip('/')}/")
-                    resp.raise_for_status()
-                    card = resp.json()
-                except (httpx.RequestError, httpx.HTTPStatusError, json.JSONDecodeError):
-                    raise HTTPException(
-                        status_code=400,
-                        detail="Unable to connect to the provided URL"
-                    )
+                card = await fetch_agent_card(client, request.url)
+            except CircuitOpenError as e:
+                raise unavailable(e)
+            except AgentCardError:
+                raise HTTPException(
+                    status_code=400,
+                    detail="Unable to connect to the provided URL"
+                )
 
         # Check if agent ID already exists
-        existing_agent = await db_manager.get_agent(request.id)
+        with phase("db.get_agent"):
+            existing_agent = await db_manager.get_agent(request.id)
         if existing_agent:
             raise HTTPException(
                 status_code=409,
@@ -308,21 +588,25 @@ async def add_agent(request: AddAgentRequest):
             )
 
         # Parse agent data using the new parser
-        agent_data = parse_agent_data(card, request.id, request.url)
-        agent = Agent(**agent_data)
+        with phase("parse_card"):
+            agent_data = parse_agent_data(card, request.id, request.url)
+        with phase("validate"):
+            agent = Agent(**agent_data)
 
-        # Add to database
+        # Add to database and configuration together
         agent_dict = agent.model_dump(by_alias=True)
-        success = await db_manager.create_agent(agent_dict)
+        agent_dict["content_hash"] = content_hash(agent_dict)
+        with phase("db.register_agent"):
+            success = await db_manager.register_agent(agent_dict, request.url)
 
         if not success:
             raise HTTPException(
                 status_code=500,
                 detail="Failed to save agent to database"
             )
-
-        # Update the configuration
-        await db_manager.add_agent_to_config(request.id, request.url)
+        skill_index.add(agent_dict)
+        change_log.record(CREATED, request.id, agent_dict)
+        snapshots.record_card(request.id, request.url, True, agent_dict["content_hash"])
 
         return {
             "success": True,
@@ -344,23 +628,25 @@ async def delete_agent(agent_id: str):
     """Delete an agent from the catalog."""
     try:
         # Check if agent exists
-        existing_agent = await db_manager.get_agent(agent_id)
+        with phase("db.get_agent"):
+            existing_agent = await db_manager.get_agent(agent_id)
         if not existing_agent:
             raise HTTPException(
                 status_code=404,
                 detail=f"Agent with ID '{agent_id}' not found"
             )
 
-        # Delete from database
-        success = await db_manager.delete_agent(agent_id)
+        # Delete from database and configuration together
+        with phase("db.unregister_agent"):
+            success = await db_manager.unregister_agent(existing_agent)
         if not success:
             raise HTTPException(
                 status_code=500,
                 detail="Failed to delete agent from database"
             )
-
-        # Remove from configuration
-        await db_manager.remove_agent_from_config(agent_id)
+        skill_index.remove(agent_id)
+        change_log.record(DELETED, agent_id)
+        snapshots.forget_card(agent_id)
 
         return {
             "success": True,
@@ -0,0 +1,215 @@
+"""
+Opt-in request profiling with phase timing breakdowns.
+
+A request is profiled when it carries the ``X-Profile`` header or is picked
+by the global sampling rate. Code marks interesting work with
+``with phase("name"):``; outside a profiled request that is a single
+ContextVar lookup, so instrumentation costs next to nothing when profiling
+is off. Profiled responses get a ``Server-Timing`` header, and the slowest
+N profiles are kept for the admin endpoint.
+"""
+import heapq
+import itertools
+import random
+import time
+from contextlib import nullcontext
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+PROFILE_HEADER = b'x-profile'
+
+
+class RequestProfile:
+    """Timed phases recorded during one request."""
+
+    def __init__(self, method: str, path: str, reason: str):
+        self.method = method
+        self.path = path
+        self.reason = reason
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self._depth = 0
+        self.phases: List[Dict[str, Any]] = []
+        self.status: Optional[int] = None
+        self.duration_ms: Optional[float] = None
+
+    def offset_ms(self) -> float:
+        return (time.perf_counter() - self._start) * 1000
+
+    def add(self, name: str, start_ms: float, duration_ms: float, depth: int, **attrs):
+        entry = {'name': name, 'start_ms': round(start_ms, 3),
+                 'duration_ms': round(duration_ms, 3), 'depth': depth}
+        if attrs:
+            entry.update(attrs)
+        self.phases.append(entry)
+
+    def finish(self, status: Optional[int]):
+        self.status = status
+        self.duration_ms = self.offset_ms()
+
+    def server_timing(self) -> str:
+        """Top-level phases in ``Server-Timing`` header syntax."""
+        parts = [f"{p['name'].replace('.', '-')};dur={p['duration_ms']:.1f}"
+                 for p in self.phases if p['depth'] == 0]
+        parts.append(f"total;dur={self.duration_ms:.1f}")
+        return ', '.join(parts)
+
+    def to_dict(self) -> Dict[str, Any]:
+        accounted = sum(p['duration_ms'] for p in self.phases if p['depth'] == 0)
+        return {
+            'method': self.method,
+            'path': self.path,
+            'status': self.status,
+            'reason': self.reason,
+            'started_at': self.started_at,
+            'duration_ms': round(self.duration_ms, 3),
+            'unaccounted_ms': round(self.duration_ms - accounted, 3),
+            'phases': sorted(self.phases, key=lambda p: p['start_ms']),
+        }
+
+
+_current: ContextVar[Optional[RequestProfile]] = ContextVar('request_profile', default=None)
+
+
+def current_profile() -> Optional[RequestProfile]:
+    return _current.get()
+
+
+class _Phase:
+    __slots__ = ('profile', 'name', 'attrs', 'depth', 'start')
+
+    def __init__(self, profile: RequestProfile, name: str, attrs: Dict[str, Any]):
+        self.profile = profile
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        self.depth = self.profile._depth
+        self.profile._depth += 1
+        self.start = self.profile.offset_ms()
+
+    def __exit__(self, *exc):
+        self.profile._depth = self.depth
+        self.profile.add(self.name, self.start, self.profile.offset_ms() - self.start,
+                         self.depth, **self.attrs)
+
+
+_NO_PHASE = nullcontext()
+
+
+def phase(name: str, **attrs):
+    """Time the enclosed block as a phase of the current profiled request."""
+    profile = _current.get()
+    if profile is None:
+        return _NO_PHASE
+    return _Phase(profile, name, attrs)
+
+
+# httpcore trace events that open and close a network phase
+_HTTP_PHASES = {
+    'connection.connect_tcp': 'connect',  # includes DNS resolution
+    'connection.connect_unix_socket': 'connect',
+    'connection.start_tls': 'tls',
+    'http11.send_request_headers': 'send',
+    'http11.send_request_body': 'send_body',
+    'http2.send_request_headers': 'send',
+    'http2.send_request_body': 'send_body',
+    'http11.receive_response_headers': 'wait',
+    'http2.receive_response_headers': 'wait',
+    'http11.receive_response_body': 'download',
+    'http2.receive_response_body': 'download',
+}
+
+
+def http_extensions(prefix: str) -> Dict[str, Any]:
+    """httpx request ``extensions`` that record connect/TLS/send/wait/download phases.
+
+    Returns an empty dict outside a profiled request.
+    """
+    profile = _current.get()
+    if profile is None:
+        return {}
+    open_phases: Dict[str, float] = {}
+
+    async def trace(event: str, info: Dict[str, Any]):
+        name, _, stage = event.rpartition('.')
+        label = _HTTP_PHASES.get(name)
+        if label is None:
+            return
+        if stage == 'started':
+            open_phases[name] = profile.offset_ms()
+        elif name in open_phases:
+            start = open_phases.pop(name)
+            profile.add(f"{prefix}.{label}", start, profile.offset_ms() - start,
+                        profile._depth, **({'failed': True} if stage == 'failed' else {}))
+
+    return {'trace': trace}
+
+
+class SlowestRequests:
+    """The N slowest profiles seen so far."""
+
+    def __init__(self, size: int = 20):
+        self.size = size
+        self._heap: List[tuple] = []
+        self._counter = itertools.count()
+        self.profiled = 0
+
+    def add(self, profile: RequestProfile):
+        self.profiled += 1
+        item = (profile.duration_ms, next(self._counter), profile.to_dict())
+        if len(self._heap) < self.size:
+            heapq.heappush(self._heap, item)
+        elif item[0] > self._heap[0][0]:
+            heapq.heapreplace(self._heap, item)
+
+    def slowest(self) -> List[Dict[str, Any]]:
+        return [entry for _, _, entry in sorted(self._heap, reverse=True)]
+
+    def clear(self):
+        self._heap.clear()
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that profiles requests opted in by header or sampling."""
+
+    def __init__(self, app, store: SlowestRequests, sample_rate: float = 0.0):
+        self.app = app
+        self.store = store
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        reason = None
+        for key, value in scope['headers']:
+            if key == PROFILE_HEADER and value not in (b'', b'0', b'false'):
+                reason = 'header'
+                break
+        if reason is None and self.sample_rate and random.random() < self.sample_rate:
+            reason = 'sampled'
+        if reason is None:
+            return await self.app(scope, receive, send)
+
+        profile = RequestProfile(scope['method'], scope['path'], reason)
+        token = _current.set(profile)
+        status = None
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+                # Headers go out before the body, so time up to this point
+                profile.finish(status)
+                headers = list(message.get('headers', []))
+                headers.append((b'server-timing', profile.server_timing().encode('latin-1')))
+                message = dict(message, headers=headers)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            profile.finish(status)
+            self.store.add(profile)
@@ -0,0 +1,227 @@
+"""
+Ranked skill-discovery search over the agent catalog.
+
+``SkillIndex`` scores agents against a free-text task description with BM25
+over their name, description and skills (name, description, examples and
+tags). Postings, document lengths and document frequencies live in NumPy
+arrays that grow in place, so adding or removing an agent only touches that
+agent's terms instead of rebuilding the model.
+"""
+import math
+import re
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# Term weight per field: a word in the agent or skill name says more about
+# what the agent does than the same word in a long description.
+FIELD_WEIGHTS = {
+    'name': 3.0,
+    'skill_name': 2.0,
+    'skill_tag': 2.0,
+    'description': 1.0,
+    'skill_description': 1.0,
+    'skill_example': 1.0,
+}
+
+STOP_WORDS = frozenset("""
+    a an and are as at be by can do does for from has have how i in is it its me my
+    of on or please show that the this to what when which who will with you your
+""".split())
+
+_CAMEL_CASE = re.compile(r'([a-z0-9])([A-Z])')
+_WORD = re.compile(r'[a-z0-9]+')
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lower-case terms, breaking up camelCase and snake_case."""
+    terms = []
+    for word in _WORD.findall(_CAMEL_CASE.sub(r'\1 \2', text).lower()):
+        if word in STOP_WORDS:
+            continue
+        if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+            word = word[:-1]
+        terms.append(word)
+    return terms
+
+
+def agent_fields(agent: Dict[str, Any]) -> Iterable[Tuple[str, str]]:
+    """Yield (field, text) pairs for an agent as stored in the catalog."""
+    yield 'name', agent.get('name') or ''
+    yield 'description', agent.get('description') or ''
+    for skill in agent.get('skills') or []:
+        if isinstance(skill, str):
+            yield 'skill_name', skill
+            continue
+        if not isinstance(skill, dict):
+            skill = skill.model_dump()
+        yield 'skill_name', skill.get('name') or skill.get('id') or ''
+        yield 'skill_description', skill.get('description') or ''
+        for example in skill.get('examples') or []:
+            yield 'skill_example', example
+        for tag in skill.get('tags') or []:
+            yield 'skill_tag', tag
+
+
+def weighted_terms(agent: Dict[str, Any]) -> Dict[str, float]:
+    """Field-weighted term frequencies for an agent."""
+    counts: Dict[str, float] = {}
+    for field, text in agent_fields(agent):
+        weight = FIELD_WEIGHTS[field]
+        for term in tokenize(text):
+            counts[term] = counts.get(term, 0.0) + weight
+    return counts
+
+
+class _Postings:
+    """Growable (document slot, term frequency) arrays for one term."""
+
+    __slots__ = ('slots', 'tfs', 'size')
+
+    def __init__(self):
+        self.slots = np.empty(4, dtype=np.int32)
+        self.tfs = np.empty(4, dtype=np.float32)
+        self.size = 0
+
+    def append(self, slot: int, tf: float):
+        if self.size == len(self.slots):
+            self.slots = np.resize(self.slots, 2 * self.size)
+            self.tfs = np.resize(self.tfs, 2 * self.size)
+        self.slots[self.size] = slot
+        self.tfs[self.size] = tf
+        self.size += 1
+
+    def remove(self, slot: int):
+        hits = np.flatnonzero(self.slots[:self.size] == slot)
+        if not len(hits):
+            return
+        # Order does not matter, so move the last posting into the gap
+        last = self.size - 1
+        self.slots[hits[0]] = self.slots[last]
+        self.tfs[hits[0]] = self.tfs[last]
+        self.size = last
+
+
+class SkillIndex:
+    """Incrementally updated BM25 index of catalog agents."""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self._vocabulary: Dict[str, int] = {}
+        self._postings: List[_Postings] = []
+        self._doc_freq = np.zeros(64, dtype=np.float32)
+        self._doc_len = np.zeros(64, dtype=np.float32)
+        self._slot_of: Dict[str, int] = {}
+        self._agent_at: List[Optional[str]] = []
+        self._terms_at: List[Optional[Dict[int, float]]] = []
+        self._free_slots: List[int] = []
+        self._total_len = 0.0
+
+    def __len__(self) -> int:
+        return len(self._slot_of)
+
+    def __contains__(self, agent_id: str) -> bool:
+        return agent_id in self._slot_of
+
+    def add(self, agent: Dict[str, Any]):
+        """Index an agent, replacing any previous version with the same ID."""
+        agent_id = agent.get('agent_id') or agent.get('id')
+        if not agent_id:
+            raise ValueError("Agent has no 'id' or 'agent_id'")
+        counts = weighted_terms(agent)
+        with self._lock:
+            self._remove(agent_id)
+            slot = self._free_slots.pop() if self._free_slots else self._new_slot()
+            terms = {}
+            for term, tf in counts.items():
+                term_id = self._term_id(term)
+                self._postings[term_id].append(slot, tf)
+                self._doc_freq[term_id] += 1
+                terms[term_id] = tf
+            length = float(sum(counts.values()))
+            self._doc_len[slot] = length
+            self._total_len += length
+            self._slot_of[agent_id] = slot
+            self._agent_at[slot] = agent_id
+            self._terms_at[slot] = terms
+
+    def add_all(self, agents: Iterable[Dict[str, Any]]):
+        for agent in agents:
+            self.add(agent)
+
+    def remove(self, agent_id: str) -> bool:
+        """Drop an agent from the index; returns False if it was not indexed."""
+        with self._lock:
+            return self._remove(agent_id)
+
+    def clear(self):
+        with self._lock:
+            self.__init__(self.k1, self.b)
+
+    def match(self, query: str, limit: int = 10) -> List[Tuple[str, float]]:
+        """Return up to ``limit`` (agent_id, score) pairs, best match first."""
+        with self._lock:
+            count = len(self._slot_of)
+            term_ids = {self._vocabulary[t] for t in tokenize(query) if t in self._vocabulary}
+            if not count or not term_ids or limit <= 0:
+                return []
+
+            slots_used = len(self._agent_at)
+            scores = np.zeros(slots_used, dtype=np.float32)
+            length_norm = self.k1 * (1 - self.b + self.b * self._doc_len[:slots_used]
+                                     / (self._total_len / count))
+            for term_id in term_ids:
+                postings = self._postings[term_id]
+                if not postings.size:
+                    continue
+                df = float(self._doc_freq[term_id])
+                idf = math.log(1 + (count - df + 0.5) / (df + 0.5))
+                slots = postings.slots[:postings.size]
+                tfs = postings.tfs[:postings.size]
+                # Each slot appears at most once per term, so fancy-index += is safe
+                scores[slots] += idf * tfs * (self.k1 + 1) / (tfs + length_norm[slots])
+
+            candidates = np.flatnonzero(scores > 0)
+            if len(candidates) > limit:
+                top = np.argpartition(scores[candidates], -limit)[-limit:]
+                candidates = candidates[top]
+            ranked = candidates[np.argsort(-scores[candidates], kind='stable')]
+            return [(self._agent_at[slot], float(scores[slot])) for slot in ranked]
+
+    # -- internals (call with the lock held) ---------------------------------
+
+    def _term_id(self, term: str) -> int:
+        term_id = self._vocabulary.get(term)
+        if term_id is None:
+            term_id = len(self._postings)
+            self._vocabulary[term] = term_id
+            self._postings.append(_Postings())
+            if term_id == len(self._doc_freq):
+                self._doc_freq = np.concatenate(
+                    [self._doc_freq, np.zeros_like(self._doc_freq)])
+        return term_id
+
+    def _new_slot(self) -> int:
+        slot = len(self._agent_at)
+        self._agent_at.append(None)
+        self._terms_at.append(None)
+        if slot == len(self._doc_len):
+            self._doc_len = np.concatenate([self._doc_len, np.zeros_like(self._doc_len)])
+        return slot
+
+    def _remove(self, agent_id: str) -> bool:
+        slot = self._slot_of.pop(agent_id, None)
+        if slot is None:
+            return False
+        for term_id in self._terms_at[slot]:
+            self._postings[term_id].remove(slot)
+            self._doc_freq[term_id] -= 1
+        self._total_len -= float(self._doc_len[slot])
+        self._doc_len[slot] = 0.0
+        self._agent_at[slot] = None
+        self._terms_at[slot] = None
+        self._free_slots.append(slot)
+        return True
@@ -0,0 +1,181 @@
+"""
+Request tracing for the catalog backend.
+
+Each HTTP request gets a server span that continues an incoming W3C
+``traceparent``; card fetches and database calls open child spans, and card
+fetches forward ``traceparent`` so the sample agents continue the same trace
+(see ``sample-agents/tracing.py``, which uses the same span record format).
+Spans are appended as JSON lines to ``$TRACE_FILE``, or kept by a
+``MemoryExporter`` in tests. Without an exporter every hook is a no-op.
+"""
+import functools
+import json
+import os
+import re
+import secrets
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+SERVICE = 'catalog-backend'
+
+_TRACEPARENT = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$')
+_current: ContextVar[Optional['Span']] = ContextVar('current_span', default=None)
+
+
+class FileExporter:
+    """Appends finished spans to a JSON lines file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, record: Dict[str, Any]):
+        line = json.dumps(record, default=str) + '\n'
+        with self._lock, open(self.path, 'a', encoding='utf-8') as f:
+            f.write(line)
+
+
+class MemoryExporter:
+    """Collects finished spans in a list."""
+
+    def __init__(self):
+        self.spans: List[Dict[str, Any]] = []
+
+    def export(self, record: Dict[str, Any]):
+        self.spans.append(record)
+
+
+exporter = FileExporter(os.environ['TRACE_FILE']) if os.environ.get('TRACE_FILE') else None
+
+
+def configure(new_exporter):
+    """Replace the exporter; None turns tracing off."""
+    global exporter
+    exporter = new_exporter
+
+
+class Span:
+    """A timed operation; entering it makes it the parent of spans opened inside."""
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str],
+                 attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.parent_id = parent_id
+        self.span_id = secrets.token_hex(8)
+        self.attributes = attributes
+        self.status = 'ok'
+        self.error: Optional[str] = None
+        self.start = time.time()
+        self._start = time.perf_counter()
+        self._token = None
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def __enter__(self) -> 'Span':
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current.reset(self._token)
+        if exc is not None:
+            self.status = 'error'
+            self.error = f"{type(exc).__name__}: {exc}"
+        if exporter is not None:
+            exporter.export({
+                'trace_id': self.trace_id,
+                'span_id': self.span_id,
+                'parent_id': self.parent_id,
+                'name': self.name,
+                'service': SERVICE,
+                'start': self.start,
+                'duration_ms': round((time.perf_counter() - self._start) * 1000, 3),
+                'status': self.status,
+                'error': self.error,
+                'attributes': self.attributes,
+            })
+
+
+class _NoSpan:
+    traceparent = None
+
+    def set(self, **attributes):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        pass
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(name: str, traceparent: Optional[str] = None, **attributes):
+    """Open a span under the current one, or under a remote ``traceparent``."""
+    if exporter is None:
+        return _NO_SPAN
+    remote = _TRACEPARENT.match(traceparent.strip().lower()) if traceparent else None
+    parent = _current.get()
+    if remote:
+        trace_id, parent_id = remote.group(1), remote.group(2)
+    elif parent is not None:
+        trace_id, parent_id = parent.trace_id, parent.span_id
+    else:
+        trace_id, parent_id = secrets.token_hex(16), None
+    return Span(name, trace_id, parent_id, attributes)
+
+
+def propagation_headers(current) -> Dict[str, str]:
+    """Headers carrying ``current`` span's context to a downstream service."""
+    return {'traceparent': current.traceparent} if current.traceparent else {}
+
+
+def traced(name: str):
+    """Decorator running an async function inside a span called ``name``."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            if exporter is None:
+                return await fn(*args, **kwargs)
+            with span(name):
+                return await fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+class TraceMiddleware:
+    """ASGI middleware opening a server span per HTTP request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or exporter is None:
+            return await self.app(scope, receive, send)
+
+        traceparent = None
+        for key, value in scope['headers']:
+            if key == b'traceparent':
+                traceparent = value.decode('latin-1')
+                break
+
+        with span(f"{scope['method']} {scope['path']}", traceparent=traceparent,
+                  kind='server', path=scope['path']) as request_span:
+            async def send_with_status(message):
+                if message['type'] == 'http.response.start':
+                    request_span.set(status=message['status'])
+                    headers = list(message.get('headers', []))
+                    headers.append((b'traceparent', request_span.traceparent.encode('ascii')))
+                    message = dict(message, headers=headers)
+                await send(message)
+
+            await self.app(scope, receive, send_with_status)
@@ -24,6 +24,14 @@ export interface Agent {
     supports_auth?: boolean;
 }
 
+/** A catalog change pushed by `/agents/events`; deletions carry no agent. */
+export interface AgentChange {
+    version: number;
+    type: 'created' | 'updated' | 'deleted';
+    agent_id: string;
+    agent: Agent | null;
+}
+
 const AgentCard: React.FC<{ agent: Agent }> = ({ agent }) => {
     const gradients = [
         'from-purple-400 via-pink-500 to-red-500',
@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { useParams, Link } from 'react-router-dom';
-import { Agent } from '../components/AgentCard';
+import { Agent, AgentChange } from '../components/AgentCard';
 
 const AgentDetail: React.FC = () => {
     const { agent_id } = useParams<{ agent_id: string }>();
@@ -8,16 +8,45 @@ const AgentDetail: React.FC = () => {
     const [loading, setLoading] = useState<boolean>(true);
 
     useEffect(() => {
-        if (agent_id) {
+        if (!agent_id) return;
+        let events: EventSource | null = null;
+        let closed = false;
+
+        // Follow changes to this agent from the version we just loaded
+        const subscribe = (version: string | null) => {
+            events?.close();
+            events = new EventSource(version ? `/agents/events?since=${version}` : '/agents/events');
+
+            const apply = (e: Event) => {
+                const change: AgentChange = JSON.parse((e as MessageEvent).data);
+                if (change.agent_id === agent_id) setAgent(change.agent);
+            };
+            events.addEventListener('created', apply);
+            events.addEventListener('updated', apply);
+            events.addEventListener('deleted', apply);
+            events.addEventListener('resync', () => load());
+        };
+
+        const load = () => {
             fetch(`/agents/${agent_id}`)
                 .then(res => {
+                    const version = res.headers.get('X-Catalog-Version');
+                    if (!closed) subscribe(version);
                     if (!res.ok) throw new Error('Agent not found');
                     return res.json();
                 })
-                .then((data: Agent) => setAgent(data))
+                .then((data: Agent) => {
+                    if (!closed) setAgent(data);
+                })
                 .catch(err => console.error(err))
                 .finally(() => setLoading(false));
-        }
+        };
+
+        load();
+        return () => {
+            closed = true;
+            events?.close();
+        };
     }, [agent_id]);
 
     if (loading) {
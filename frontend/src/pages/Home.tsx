@@ -1,6 +1,6 @@
 import React, { useEffect, useState } from 'react';
 import { Link } from 'react-router-dom';
-import AgentCard, { Agent } from '../components/AgentCard';
+import AgentCard, { Agent, AgentChange } from '../components/AgentCard';
 
 const Home: React.FC = () => {
     const [agents, setAgents] = useState<Agent[]>([]);
@@ -9,13 +9,51 @@ const Home: React.FC = () => {
     const [sortBy, setSortBy] = useState<string>("name");
 
     useEffect(() => {
-        fetch('/agents')
-            .then((res) => res.json())
-            .then((data: Agent[]) => {
-                setAgents(data);
-            })
-            .catch((err) => console.error(err))
-            .finally(() => setLoading(false));
+        let events: EventSource | null = null;
+        let closed = false;
+
+        // Live updates, starting from the version of the list we just loaded
+        const subscribe = (version: string | null) => {
+            events?.close();
+            events = new EventSource(version ? `/agents/events?since=${version}` : '/agents/events');
+
+            const upsert = (e: Event) => {
+                const change: AgentChange = JSON.parse((e as MessageEvent).data);
+                const agent = change.agent;
+                if (!agent) return;
+                setAgents((prev) => prev.some((a) => a.agent_id === agent.agent_id)
+                    ? prev.map((a) => (a.agent_id === agent.agent_id ? agent : a))
+                    : [...prev, agent]);
+            };
+            events.addEventListener('created', upsert);
+            events.addEventListener('updated', upsert);
+            events.addEventListener('deleted', (e) => {
+                const change: AgentChange = JSON.parse((e as MessageEvent).data);
+                setAgents((prev) => prev.filter((a) => a.agent_id !== change.agent_id));
+            });
+            // We fell too far behind for the server to replay; reload the list
+            events.addEventListener('resync', () => load());
+        };
+
+        const load = () => {
+            fetch('/agents')
+                .then((res) => {
+                    const version = res.headers.get('X-Catalog-Version');
+                    return res.json().then((data: Agent[]) => {
+                        if (closed) return;
+                        setAgents(data);
+                        subscribe(version);
+                    });
+                })
+                .catch((err) => console.error(err))
+                .finally(() => setLoading(false));
+        };
+
+        load();
+        return () => {
+            closed = true;
+            events?.close();
+        };
     }, []);
 
     const filtered = agents.filter(a =>
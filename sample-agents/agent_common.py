@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Shared startup helpers for the A2A sample agents.
+Keeps heavy imports (python_a2a, LangChain, Ollama) off the module import path
+so an agent can bind its port first and build its executor lazily.
+"""
+import os
+import signal
+import socket
+import sqlite3
+import threading
+from typing import Callable, Dict, Generic, Iterable, Optional, Sequence, Tuple, TypeVar
+
+T = TypeVar('T')
+
+DEFAULT_MODEL = 'phi4-mini'
+DEFAULT_OLLAMA_URL = 'http://ollama:11434'
+
+_shared_llms: Dict[Tuple[str, str], object] = {}
+_shared_llms_lock = threading.Lock()
+_llm_scheduler = None
+
+
+class LazyResource(Generic[T]):
+    """Builds an expensive object on first use, at most once, thread-safely."""
+
+    def __init__(self, factory: Callable[[], T], name: str = 'resource'):
+        self._factory = factory
+        self._name = name
+        self._value: Optional[T] = None
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def get(self) -> T:
+        """Return the resource, building it (or waiting for a warm-up) if needed.
+
+        A failed build is not cached, so the next call tries again.
+        """
+        if not self._ready.is_set():
+            with self._lock:
+                if not self._ready.is_set():
+                    self._value = self._factory()
+                    self._ready.set()
+        return self._value  # type: ignore[return-value]
+
+    def warm_up(self) -> threading.Thread:
+        """Build the resource on a background thread so the first request is fast."""
+        def _build():
+            try:
+                self.get()
+                print(f"✅ {self._name} ready")
+            except Exception as e:
+                print(f"⚠️  {self._name} warm-up failed: {e}")
+
+        thread = threading.Thread(
+            target=_build, name=f"warm-{self._name}", daemon=True)
+        thread.start()
+        return thread
+
+
+def llm_scheduler():
+    """Return the process-wide LLM scheduler (limit from ``$LLM_MAX_CONCURRENCY``).
+
+    Under the supervisor, ``$LLM_SLOTS_SOCKET`` names the slot server that
+    applies the limit across all agent processes.
+    """
+    global _llm_scheduler
+    with _shared_llms_lock:
+        if _llm_scheduler is None:
+            from llm_scheduler import LLMScheduler
+            global_slots = None
+            if os.environ.get('LLM_SLOTS_SOCKET'):
+                from llm_slots import SlotClient
+                global_slots = SlotClient(os.environ['LLM_SLOTS_SOCKET'])
+            _llm_scheduler = LLMScheduler(
+                max_concurrency=int(os.environ.get('LLM_MAX_CONCURRENCY', '2')),
+                global_slots=global_slots)
+        return _llm_scheduler
+
+
+def shared_llm(model: str = DEFAULT_MODEL, base_url: str = DEFAULT_OLLAMA_URL,
+               agent: str = 'default', priority: int = 0):
+    """Return a chat model for ``agent`` backed by the process-wide Ollama client.
+
+    Agents hosted in the same process reuse one ChatOllama client and its
+    connection pool, and all their calls go through ``llm_scheduler()``.
+    ``$OLLAMA_BASE_URL`` overrides ``base_url`` (e.g. to point at a stub LLM).
+    """
+    from llm_scheduler import scheduled_chat_model
+
+    base_url = os.environ.get('OLLAMA_BASE_URL', base_url)
+    key = (model, base_url)
+    with _shared_llms_lock:
+        llm = _shared_llms.get(key)
+        if llm is None:
+            from langchain_ollama import ChatOllama  # type: ignore
+            llm = _shared_llms[key] = ChatOllama(model=model, base_url=base_url)
+    return scheduled_chat_model(llm, llm_scheduler(), agent, priority)
+
+
+def load_table(conn: sqlite3.Connection, table: str,
+               columns: Sequence[Tuple[str, str]], rows: Iterable[Sequence]):
+    """Create ``table`` with the given (name, type) columns and insert ``rows``."""
+    column_sql = ', '.join(f'"{name}" {sql_type}' for name, sql_type in columns)
+    placeholders = ', '.join('?' for _ in columns)
+    conn.execute(f'DROP TABLE IF EXISTS "{table}"')
+    conn.execute(f'CREATE TABLE "{table}" ({column_sql})')
+    conn.executemany(
+        f'INSERT INTO "{table}" VALUES ({placeholders})', rows)
+    conn.commit()
+
+
+class AgentDatabase(LazyResource):
+    """An agent's SQLite table, opened on first use and shared by its worker threads.
+
+    The sample ``rows`` are loaded into memory unless ``$<env_prefix>_DB_PATH``
+    names a file-backed database (loaded from ``$<env_prefix>_DATA_FILE`` if
+    set). ``query_rows`` serves repeated reads from memory until a write,
+    from this process or another worker's, touches their tables.
+    """
+
+    def __init__(self, table: str, columns: Sequence[Tuple[str, str]],
+                 rows: Sequence[Sequence], indexes: Sequence[str] = (),
+                 env_prefix: str = '', name: str = 'database'):
+        from sql_cache import QueryCache
+        super().__init__(self._open, name=name)
+        self.table = table
+        self.columns = columns
+        self.rows = rows
+        self.indexes = indexes
+        self.env_prefix = env_prefix
+        self._conn_lock = threading.Lock()
+        self.query_rows = QueryCache(
+            self.execute,
+            max_bytes=int(os.environ.get('SQL_CACHE_MAX_BYTES', 8 * 1024 * 1024)),
+            external_version=self.data_version)
+
+    def _open(self) -> sqlite3.Connection:
+        from data_loader import open_agent_db
+        return open_agent_db(self.table, self.columns, self.rows, indexes=self.indexes,
+                             data_path=os.environ.get(f'{self.env_prefix}_DATA_FILE'),
+                             db_path=os.environ.get(f'{self.env_prefix}_DB_PATH'))
+
+    def execute(self, query: str, params=()) -> list:
+        """Run ``query`` on the shared connection and return all rows."""
+        conn = self.get()
+        with self._conn_lock:
+            rows = conn.execute(query, params).fetchall()
+            if conn.in_transaction:
+                conn.commit()
+            return rows
+
+    def data_version(self) -> int:
+        """Changes whenever another connection, e.g. another worker, commits."""
+        conn = self.get()
+        with self._conn_lock:
+            return conn.execute('PRAGMA data_version').fetchone()[0]
+
+
+def bind_listener(host: str, port: int, backlog: int = 128) -> socket.socket:
+    """Bind and listen on ``host:port`` right away.
+
+    Connections arriving while the agent is still importing its dependencies
+    wait in the kernel backlog instead of being refused.
+    """
+    family = socket.AF_INET6 if ':' in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+class InFlightRequests:
+    """WSGI middleware counting requests whose response is not yet fully written."""
+
+    def __init__(self, app):
+        self.app = app
+        self.count = 0
+        self._cond = threading.Condition()
+
+    def _finished(self):
+        with self._cond:
+            self.count -= 1
+            self._cond.notify_all()
+
+    def __call__(self, environ, start_response):
+        from werkzeug.wsgi import ClosingIterator
+
+        with self._cond:
+            self.count += 1
+        try:
+            body = self.app(environ, start_response)
+        except BaseException:
+            self._finished()
+            raise
+        # The server closes the body once it has been sent
+        return ClosingIterator(body, self._finished)
+
+    def wait(self, timeout: float) -> bool:
+        """Block until no request is in flight; False if ``timeout`` ran out first."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self.count == 0, timeout)
+
+
+def make_http_server(app, sock: socket.socket):
+    """Create a threaded WSGI server for ``app`` on an already-bound listening socket.
+
+    The server's ``in_flight`` tracks requests still being handled, so a
+    worker can wait for them after ``shutdown``. Request threads are daemon
+    threads, which ``server_close`` does not join.
+    """
+    from werkzeug.serving import make_server
+
+    host, port = sock.getsockname()[:2]
+    in_flight = InFlightRequests(app)
+    http_server = make_server(host, port, in_flight, threaded=True, fd=sock.fileno())
+    http_server.in_flight = in_flight
+    return http_server
+
+
+def adopt_listener(fd: int) -> socket.socket:
+    """Wrap a listening socket inherited from a supervisor process."""
+    return socket.socket(fileno=fd)
+
+
+def _drain_on_sigterm(http_server):
+    """Stop accepting on SIGTERM; ``serve_a2a`` then waits for in-flight requests."""
+    if threading.current_thread() is not threading.main_thread():
+        return
+
+    def _handle(signum, frame):
+        # shutdown() blocks until serve_forever returns, so call it off the main thread
+        threading.Thread(target=http_server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, _handle)
+
+
+def message_text(message) -> str:
+    """Plain text of an incoming A2A message."""
+    content = message.content
+    return getattr(content, 'text', None) or str(content)
+
+
+def text_reply(message, text: str):
+    """Build the agent's A2A reply to ``message``."""
+    from python_a2a import Message, MessageRole, TextContent  # type: ignore
+
+    return Message(
+        content=TextContent(text=text),
+        role=MessageRole.AGENT,
+        parent_message_id=message.message_id,
+        conversation_id=message.conversation_id
+    )
+
+
+def invoke_executor(executor, text: str) -> str:
+    """Run a ReAct executor on ``text`` and return its answer.
+
+    When tracing is on, the chain, each tool call and each LLM call become
+    spans under the current request's span.
+    """
+    from tracing import langchain_callbacks
+
+    result = executor.invoke({"input": text}, config={"callbacks": langchain_callbacks()})
+    return result.get("output")
+
+
+def create_app(server):
+    """Build the traced Flask app for an A2A server, plus its metrics endpoints.
+
+    ``/llm/metrics`` reports the LLM scheduler; ``/router/stats`` and
+    ``/sql/cache`` report the skill fast path and SQL result cache when the
+    server has a ``router`` or ``sql_cache``.
+    """
+    from flask import jsonify
+    from python_a2a.server.http import create_flask_app  # type: ignore
+    from tracing import TraceMiddleware
+
+    app = create_flask_app(server)
+    # Continue the caller's trace (``traceparent``) for A2A requests
+    app.wsgi_app = TraceMiddleware(
+        app.wsgi_app, skip_paths=('/llm/metrics', '/router/stats', '/sql/cache'),
+        agent=server.agent_card.name)
+
+    @app.route('/llm/metrics', methods=['GET'])
+    def llm_metrics():
+        return jsonify(llm_scheduler().metrics())
+
+    router = getattr(server, 'router', None)
+    if router is not None:
+        @app.route('/router/stats', methods=['GET'])
+        def router_stats():
+            return jsonify(router.stats())
+
+    sql_cache = getattr(server, 'sql_cache', None)
+    if sql_cache is not None:
+        @app.route('/sql/cache', methods=['GET'])
+        def sql_cache_stats():
+            return jsonify(sql_cache.stats())
+
+    return app
+
+
+def serve_a2a(server, sock: socket.socket, ready_fd: Optional[int] = None):
+    """Serve an A2A server's Flask app on an already-bound listening socket.
+
+    If ``ready_fd`` is given, a line is written to it once the server accepts
+    requests so a supervisor can track readiness. On SIGTERM the server stops
+    accepting and waits up to ``$AGENT_DRAIN_SECONDS`` (default 10) for
+    in-flight requests before returning.
+    """
+    http_server = make_http_server(create_app(server), sock)
+    _drain_on_sigterm(http_server)
+    host, port = sock.getsockname()[:2]
+    print(f"Starting A2A server on http://{host}:{port}/a2a")
+    if ready_fd is not None:
+        os.write(ready_fd, b'ready\n')
+        os.close(ready_fd)
+    try:
+        http_server.serve_forever()
+    finally:
+        drain_seconds = float(os.environ.get('AGENT_DRAIN_SECONDS', '10'))
+        if not http_server.in_flight.wait(drain_seconds):
+            print(f"⚠️  {http_server.in_flight.count} request(s) still running "
+                  f"after {drain_seconds:g}s; exiting anyway")
+        http_server.server_close()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Single-process host for the A2A sample agents.
+
+Runs finance, calendar and task agents in one interpreter, either on their own
+ports or mounted under path prefixes of a single port. The agents share one
+copy of python_a2a/LangChain and one Ollama client with its connection pool.
+"""
+import asyncio
+import importlib
+import os
+import signal
+import sys
+from typing import Dict, List, Optional, Tuple
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+if SCRIPT_DIR not in sys.path:
+    sys.path.insert(0, SCRIPT_DIR)
+
+from agent_common import bind_listener, create_app, make_http_server  # noqa: E402
+
+
+def current_rss_bytes() -> int:
+    """Resident set size of this process (falls back to peak RSS off Linux)."""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _mb(value: int) -> str:
+    return f"{value / (1024 * 1024):.1f} MB"
+
+
+def _prefix(name: str) -> str:
+    return '/' + name.split('_')[0]
+
+
+async def run_host(agents: List[Tuple[str, int]], host: str,
+                   prefix_port: Optional[int] = None):
+    """Serve ``agents`` (name, port) from this process until interrupted.
+
+    With ``prefix_port`` all agents share that port under ``/<agent>``
+    prefixes (``/finance``, ``/calendar``, ``/task``) instead of their own ports.
+    """
+    baseline_rss = current_rss_bytes()
+
+    # Bind every listening socket before the heavy imports
+    if prefix_port is not None:
+        sockets = {None: bind_listener(host, prefix_port)}
+    else:
+        sockets = {name: bind_listener(host, port) for name, port in agents}
+
+    apps: Dict[str, object] = {}
+    modules = []
+    first_agent_rss = None
+    for name, port in agents:
+        module = importlib.import_module(f'{name}.agent')
+        if prefix_port is not None:
+            server = module.create_server(host, prefix_port, _prefix(name))
+        else:
+            server = module.create_server(host, port)
+        apps[name] = create_app(server)
+        modules.append(module)
+        if first_agent_rss is None:
+            # Build the first executor eagerly: this is what one standalone process costs
+            try:
+                module.agent_executor.get()
+            except Exception as e:
+                print(f"⚠️  {name} executor failed to build: {e}")
+            first_agent_rss = current_rss_bytes()
+
+    if prefix_port is not None:
+        from werkzeug.middleware.dispatcher import DispatcherMiddleware
+        from werkzeug.wrappers import Response
+
+        mounted = {_prefix(name): app for name, app in apps.items()}
+        dispatcher = DispatcherMiddleware(
+            Response('Not Found', status=404), mounted)
+        http_servers = [make_http_server(dispatcher, sockets[None])]
+        for name, _ in agents:
+            print(f"   {name} → http://{host}:{prefix_port}{_prefix(name)}/a2a")
+    else:
+        http_servers = [make_http_server(apps[name], sockets[name])
+                        for name, _ in agents]
+        for name, port in agents:
+            print(f"   {name} → http://{host}:{port}/a2a")
+
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):
+            pass
+
+    serving = [asyncio.ensure_future(asyncio.to_thread(s.serve_forever))
+               for s in http_servers]
+    await asyncio.gather(*(asyncio.to_thread(m.agent_executor.get)
+                           for m in modules), return_exceptions=True)
+    report_memory(len(agents), baseline_rss, first_agent_rss, current_rss_bytes())
+
+    try:
+        await stop.wait()
+    finally:
+        print("\nShutting down agent host...")
+        for s in http_servers:
+            s.shutdown()
+        await asyncio.gather(*serving, return_exceptions=True)
+        for s in http_servers:
+            s.server_close()
+
+
+def report_memory(agent_count: int, baseline: int, first_agent: int, total: int):
+    """Print resident memory used versus running one process per agent."""
+    separate = agent_count * first_agent
+    print(f"📊 Memory: {_mb(total)} resident for {agent_count} agents "
+          f"(interpreter baseline {_mb(baseline)}, one agent {_mb(first_agent)})")
+    print(f"   Estimated {_mb(separate)} as separate processes; "
+          f"saved ~{_mb(max(separate - total, 0))}")
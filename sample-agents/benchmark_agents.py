@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Message-handling benchmark for the A2A sample agents against a scripted LLM.
+
+Finance, calendar and task agents run in this process on local ports, with
+their LLM pointed at ``StubLLMServer`` using a responder that plays out a
+fixed ReAct script: ``--steps`` SQL tool calls, then a final answer. Messages
+are sent over HTTP to each agent's ``/a2a`` endpoint at ``--concurrency``,
+and every request is traced in memory so its time can be split into phases:
+
+  a2a        Flask/python_a2a request parsing and reply serialization
+  router     skill fast-path matching (and fast-path answers)
+  executor   LangChain AgentExecutor, chain and tool-wrapper overhead
+  llm_client LangChain/Ollama client work around each LLM call
+  llm_queue  waiting for a slot in the shared LLM scheduler
+  llm_wait   the (stub) LLM request itself
+  sql        SQL tool queries, including the result cache
+
+Use ``--json`` to save a run and ``--baseline`` to print the change against a
+saved run, so edits to ``handle_message`` or the tools can be compared.
+"""
+import argparse
+import collections
+import contextlib
+import io
+import json
+import os
+import re
+import statistics
+import sys
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+if SCRIPT_DIR not in sys.path:
+    sys.path.insert(0, SCRIPT_DIR)
+
+from agent_host import current_rss_bytes  # noqa: E402
+from stub_llm import StubLLMServer  # noqa: E402
+
+# Tool each agent's ReAct prompt offers, and the query the script sends to it
+SCRIPTS = {
+    'finance_agent': ('SQLExecutor',
+                      "SELECT symbol, price FROM stocks ORDER BY volume DESC LIMIT {n}"),
+    'calendar_agent': ('EventsSQL',
+                       "SELECT title, date, time FROM events ORDER BY date, time LIMIT {n}"),
+    'task_agent': ('TasksSQL',
+                   "SELECT id, task FROM tasks WHERE completed = 0 ORDER BY id LIMIT {n}"),
+}
+AGENTS = list(SCRIPTS)
+PHASES = ['a2a', 'router', 'executor', 'llm_client', 'llm_queue', 'llm_wait', 'sql']
+
+_CASE = re.compile(r'\(case (\d+)\)')
+
+
+def scripted_responder(steps: int, distinct_queries: int):
+    """ReAct responder: ``steps`` tool calls on the prompt's tool, then an answer."""
+    def respond(messages):
+        prompt = '\n'.join(m.get('content', '') for m in messages)
+        # The format instructions mention "Observation:" too; count the scratchpad's
+        done = prompt.rpartition('Begin!')[2].count('Observation:')
+        tool, sql = next(((tool, sql) for tool, sql in SCRIPTS.values()
+                          if f"{tool}(" in prompt or f"{tool}:" in prompt),
+                         (None, None))
+        if tool is None or done >= steps:
+            return "Thought: I now know the final answer.\nFinal Answer: scripted answer."
+        case = _CASE.search(prompt)
+        n = (int(case.group(1)) + done) % distinct_queries + 1 if case else 1
+        return (f"Thought: I should query the data.\nAction: {tool}\n"
+                f"Action Input: {sql.format(n=n)}")
+    return respond
+
+
+def phase_of(name: str) -> str:
+    if name.startswith(('POST ', 'GET ')):
+        return 'a2a'
+    if name == 'router':
+        return 'router'
+    if name.startswith(('chain ', 'tool ')):
+        return 'executor'
+    if name == 'llm':
+        return 'llm_client'
+    if name == 'llm.queue':
+        return 'llm_queue'
+    if name in ('llm.request', 'llm.coalesced'):
+        return 'llm_wait'
+    if name == 'sql':
+        return 'sql'
+    return 'other'
+
+
+def phase_breakdown(spans):
+    """Per-request self time by phase (ms), keyed by trace id."""
+    children = collections.defaultdict(float)
+    for s in spans:
+        if s['parent_id']:
+            children[s['parent_id']] += s['duration_ms']
+    requests = collections.defaultdict(lambda: collections.Counter())
+    for s in spans:
+        self_ms = max(s['duration_ms'] - children[s['span_id']], 0.0)
+        requests[s['trace_id']][phase_of(s['name'])] += self_ms
+    return requests
+
+
+def start_agents(names):
+    """Serve ``names`` on ephemeral local ports; returns (urls, http servers)."""
+    import importlib
+    from agent_common import bind_listener, create_app, make_http_server
+
+    urls, servers = {}, []
+    for name in names:
+        sock = bind_listener('127.0.0.1', 0)
+        port = sock.getsockname()[1]
+        module = importlib.import_module(f'{name}.agent')
+        module.agent_executor.get()
+        module.database.get()
+        http_server = make_http_server(create_app(module.create_server('127.0.0.1', port)), sock)
+        threading.Thread(target=http_server.serve_forever, name=f'bench-{name}',
+                         daemon=True).start()
+        urls[name] = f"http://127.0.0.1:{port}/a2a"
+        servers.append(http_server)
+    return urls, servers
+
+
+def send(url: str, text: str) -> float:
+    body = json.dumps({'role': 'user', 'content': {'type': 'text', 'text': text}}).encode()
+    request = urllib.request.Request(url, body, {'Content-Type': 'application/json'})
+    start = time.perf_counter()
+    with urllib.request.urlopen(request, timeout=120) as resp:
+        resp.read()
+    return (time.perf_counter() - start) * 1000
+
+
+def question(agent: str, i: int, fast_path_every: int, fast_examples) -> str:
+    if fast_path_every and i % fast_path_every == 0:
+        return fast_examples[agent]
+    return f"Summarize the {agent.split('_')[0]} data for the weekly review (case {i})"
+
+
+def run(urls, messages: int, concurrency: int, fast_path_every: int, fast_examples):
+    jobs = [(agent, question(agent, i, fast_path_every, fast_examples))
+            for i in range(messages) for agent in urls]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(lambda job: send(urls[job[0]], job[1]), jobs))
+    return latencies, time.perf_counter() - start
+
+
+def percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--agents', nargs='+', choices=AGENTS, default=AGENTS)
+    parser.add_argument('--messages', type=int, default=50,
+                        help="Messages per agent (default: 50)")
+    parser.add_argument('--concurrency', type=int, default=4,
+                        help="Messages in flight across all agents (default: 4)")
+    parser.add_argument('--steps', type=int, default=1,
+                        help="SQL tool calls per ReAct run before the answer (default: 1)")
+    parser.add_argument('--latency', type=float, default=0.02,
+                        help="Stub LLM latency per call in seconds (default: 0.02)")
+    parser.add_argument('--distinct-queries', type=int, default=5,
+                        help="Distinct SQL queries the script cycles through (default: 5)")
+    parser.add_argument('--fast-path-every', type=int, default=0,
+                        help="Send a skill example (fast path) every Nth message (0: never)")
+    parser.add_argument('--llm-concurrency', type=int, default=None,
+                        help="LLM scheduler limit (default: $LLM_MAX_CONCURRENCY or 2)")
+    parser.add_argument('--warmup', type=int, default=3,
+                        help="Untimed messages per agent first (default: 3)")
+    parser.add_argument('--json', help="Write the results to this file")
+    parser.add_argument('--baseline', help="Compare with results saved by --json")
+    args = parser.parse_args()
+
+    if args.llm_concurrency is not None:
+        os.environ['LLM_MAX_CONCURRENCY'] = str(args.llm_concurrency)
+    stub = StubLLMServer(latency=args.latency,
+                         responder=scripted_responder(args.steps, args.distinct_queries)).start()
+    os.environ['OLLAMA_BASE_URL'] = stub.base_url
+
+    import logging
+    import tracing
+
+    rss_start = current_rss_bytes()
+    # The executors are built with verbose=True; keep their step logs off the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        urls, servers = start_agents(args.agents)
+        # Per-request access and client logs would swamp the timings
+        for noisy in ('werkzeug', 'httpx'):
+            logging.getLogger(noisy).setLevel(logging.WARNING)
+        fast_examples = {name: sys.modules[f'{name}.agent'].router.examples()[0]
+                         for name in args.agents}
+        run(urls, args.warmup, args.concurrency, args.fast_path_every, fast_examples)
+        rss_ready = current_rss_bytes()
+
+        exporter = tracing.MemoryExporter()
+        tracing.configure(exporter, 'sample-agents')
+        stub.reset_stats()
+        latencies, wall = run(urls, args.messages, args.concurrency,
+                              args.fast_path_every, fast_examples)
+        tracing.configure(None)
+    rss_end = current_rss_bytes()
+    llm_calls = stub.stats()['requests']
+    for http_server in servers:
+        http_server.shutdown()
+    stub.stop()
+
+    requests = phase_breakdown(exporter.spans).values()
+    results = {
+        'config': {k: v for k, v in vars(args).items() if k not in ('json', 'baseline')},
+        'requests': len(latencies),
+        'throughput_rps': len(latencies) / wall,
+        'latency_ms': {'mean': statistics.mean(latencies), 'p50': percentile(latencies, 50),
+                       'p95': percentile(latencies, 95), 'max': max(latencies)},
+        'phases_ms': {phase: statistics.mean(r[phase] for r in requests) for phase in PHASES},
+        'llm_calls': llm_calls,
+        'memory_mb': {'start': rss_start / 2 ** 20, 'ready': rss_ready / 2 ** 20,
+                      'end': rss_end / 2 ** 20},
+    }
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    report(results, baseline)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+def report(results, baseline=None):
+    def delta(value, path):
+        if baseline is None:
+            return ''
+        old = baseline
+        for key in path:
+            old = old.get(key, {}) if isinstance(old, dict) else {}
+        if not isinstance(old, (int, float)) or not old:
+            return ''
+        return f"  ({(value - old) / old * 100:+.0f}%)"
+
+    cfg = results['config']
+    print(f"{results['requests']} messages to {', '.join(cfg['agents'])} at concurrency "
+          f"{cfg['concurrency']}, {cfg['steps']} tool step(s), stub LLM {cfg['latency'] * 1000:.0f} ms")
+    print(f"Throughput: {results['throughput_rps']:.1f} msg/s"
+          f"{delta(results['throughput_rps'], ['throughput_rps'])}   "
+          f"LLM calls: {results['llm_calls']}")
+    lat = results['latency_ms']
+    print("Latency:    " + '  '.join(
+        f"{k} {v:.1f} ms{delta(v, ['latency_ms', k])}" for k, v in lat.items()))
+    print("\nMean time per message by phase:")
+    total = sum(results['phases_ms'].values()) or 1.0
+    for phase, ms in results['phases_ms'].items():
+        print(f"  {phase:<11}{ms:9.2f} ms {100 * ms / total:5.1f}%{delta(ms, ['phases_ms', phase])}")
+    mem = results['memory_mb']
+    print(f"\nRSS: {mem['start']:.1f} MB before agents, {mem['ready']:.1f} MB ready, "
+          f"{mem['end']:.1f} MB after the run{delta(mem['end'], ['memory_mb', 'end'])}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Tool-query latency of the file-backed data mode at scale.
+
+Generates synthetic CSV data for the finance, calendar and task agents
+(1M rows each by default), streams it into a file-backed SQLite database with
+``data_loader.open_agent_db`` and times each agent's skill fast paths, the
+SQL its ``FAST_PATHS`` build plus the formatted answer, with and without the
+indexes, plus a cached repeat through ``QueryCache``.
+"""
+import argparse
+import csv
+import importlib
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+if SCRIPT_DIR not in sys.path:
+    sys.path.insert(0, SCRIPT_DIR)
+
+from data_loader import open_agent_db  # noqa: E402
+from sql_cache import QueryCache  # noqa: E402
+
+
+def _stocks(rng, n):
+    yield ('symbol', 'price', 'volume')
+    for i in range(n):
+        yield (f"S{i:07d}" if i else 'AAPL', round(rng.uniform(1, 5000), 2),
+               rng.randint(1_000, 50_000_000))
+
+
+def _events(rng, n):
+    yield ('id', 'title', 'date', 'time')
+    for i in range(n):
+        yield (i + 1, f"Event {i}", f"20{rng.randint(20, 30)}-{rng.randint(1, 12):02d}-"
+               f"{rng.randint(1, 28):02d}", f"{rng.randint(0, 23):02d}:00")
+
+
+def _tasks(rng, n):
+    yield ('id', 'task', 'completed')
+    for i in range(n):
+        yield (i + 1, f"Task {i}", 'true' if rng.random() < 0.9 else 'false')
+
+
+# table, agent module, columns, indexes, generator
+DATASETS = [
+    ('stocks', 'finance_agent.agent', 'STOCK_COLUMNS', 'STOCK_INDEXES', _stocks),
+    ('events', 'calendar_agent.agent', 'EVENT_COLUMNS', 'EVENT_INDEXES', _events),
+    ('tasks', 'task_agent.agent', 'TASK_COLUMNS', 'TASK_INDEXES', _tasks),
+]
+
+
+def skill_queries(module):
+    """(template, params, sql, args) for each fast path's first skill example."""
+    queries = []
+    for template in module.FAST_PATHS:
+        params = template.match(template.examples[0])
+        sql, args = template.build(params)
+        queries.append((template, params, sql, args))
+    return queries
+
+
+def time_answer(run, template, params, sql, args, repeat):
+    """Median ms to query and format the answer, and the answer's size in bytes."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        answer = template.format(params, run(sql, args))
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), len(answer.encode())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=20,
+                        help="Timed repetitions per query (median reported)")
+    parser.add_argument('--workdir', default=None,
+                        help="Directory for generated files (default: a temp dir)")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    workdir = args.workdir or tempfile.mkdtemp(prefix='agent-data-')
+    os.makedirs(workdir, exist_ok=True)
+    db_path = os.path.join(workdir, 'bench.db')
+    print(f"Working in {workdir} with {args.rows:,} rows per table\n")
+
+    for table, module_name, columns_name, indexes_name, generate in DATASETS:
+        module = importlib.import_module(module_name)
+        columns = getattr(module, columns_name)
+        indexes = getattr(module, indexes_name)
+        queries = skill_queries(module)
+
+        csv_path = os.path.join(workdir, f"{table}.csv")
+        with open(csv_path, 'w', newline='') as f:
+            csv.writer(f).writerows(generate(rng, args.rows))
+
+        start = time.perf_counter()
+        conn = open_agent_db(table, columns, [], indexes=indexes,
+                             data_path=csv_path, db_path=db_path)
+        load_s = time.perf_counter() - start
+        print(f"{table}: loaded in {load_s:.1f}s ({args.rows / load_s:,.0f} rows/s)")
+
+        def run(sql, params):
+            return conn.execute(sql, params).fetchall()
+
+        indexed = [time_answer(run, *query, args.repeat) for query in queries]
+        # A repeat through the agents' cache, with their default byte budget
+        cache = QueryCache(run)
+        cached = []
+        for template, params, sql, sql_args in queries:
+            cache(sql, sql_args)
+            hits = cache.stats()['hits']
+            ms, _ = time_answer(cache, template, params, sql, sql_args, 1)
+            cached.append(ms if cache.stats()['hits'] > hits else None)
+        with conn:
+            for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index' "
+                                        "AND tbl_name = ?", (table,)).fetchall():
+                conn.execute(f'DROP INDEX "{name}"')
+        unindexed = [time_answer(run, *query, max(args.repeat // 4, 1))[0] for query in queries]
+        conn.close()
+
+        for (template, *_), (idx_ms, size), scan_ms, hit_ms in zip(
+                queries, indexed, unindexed, cached):
+            hit = f"{hit_ms:7.3f} ms cached" if hit_ms is not None else "     not cached"
+            print(f"   {idx_ms:9.3f} ms indexed  {scan_ms:9.3f} ms no index  {hit}  "
+                  f"{size:>9,} B  {template.name}: {template.examples[0]}")
+        print()
+
+
+if __name__ == '__main__':
+    main()
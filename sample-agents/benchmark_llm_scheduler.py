@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Exercise the shared LLM scheduler against the local stub LLM server.
+
+Three simulated agents send a burst of chat calls at once, first straight to
+the backend and then through ``LLMScheduler``. The report shows the peak
+concurrency the backend saw, how many calls were coalesced, and per-agent
+queue times, so the concurrency limit and fairness can be checked without
+Ollama.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+if SCRIPT_DIR not in sys.path:
+    sys.path.insert(0, SCRIPT_DIR)
+
+from llm_scheduler import LLMScheduler, scheduled_chat_model  # noqa: E402
+from stub_llm import StubLLMServer  # noqa: E402
+
+AGENTS = ['finance_agent', 'calendar_agent', 'task_agent']
+
+
+def burst(models, calls_per_agent: int, duplicate_every: int):
+    """Fire every agent's calls at once; return wall time in seconds."""
+    jobs = []
+    for agent, model in models.items():
+        for i in range(calls_per_agent):
+            # Some prompts repeat so identical in-flight calls can be coalesced
+            n = i - i % duplicate_every if duplicate_every > 1 else i
+            jobs.append((model, f"{agent} question {n}"))
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(jobs)) as pool:
+        list(pool.map(lambda job: job[0].invoke(job[1]), jobs))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--max-concurrency', type=int, default=2)
+    parser.add_argument('--calls', type=int, default=12,
+                        help="Calls per agent in the burst (default: 12)")
+    parser.add_argument('--latency', type=float, default=0.1,
+                        help="Stub LLM latency per call in seconds (default: 0.1)")
+    parser.add_argument('--duplicate-every', type=int, default=3,
+                        help="Group size of identical prompts (1 disables duplicates)")
+    parser.add_argument('--priority-agent', default='finance_agent',
+                        help="Agent given a higher priority in the scheduled run")
+    args = parser.parse_args()
+
+    from langchain_ollama import ChatOllama  # type: ignore
+
+    stub = StubLLMServer(latency=args.latency).start()
+    try:
+        llm = ChatOllama(model='phi4-mini', base_url=stub.base_url)
+
+        direct_time = burst({agent: llm for agent in AGENTS},
+                            args.calls, args.duplicate_every)
+        direct = stub.stats()
+        stub.reset_stats()
+
+        scheduler = LLMScheduler(max_concurrency=args.max_concurrency)
+        models = {agent: scheduled_chat_model(
+            llm, scheduler, agent,
+            priority=1 if agent == args.priority_agent else 0) for agent in AGENTS}
+        scheduled_time = burst(models, args.calls, args.duplicate_every)
+        scheduled = stub.stats()
+    finally:
+        stub.stop()
+
+    print(f"{'mode':<12}{'wall s':>8}{'backend calls':>15}{'peak concurrency':>18}")
+    print(f"{'direct':<12}{direct_time:>8.2f}{direct['requests']:>15}"
+          f"{direct['peak_concurrency']:>18}")
+    print(f"{'scheduled':<12}{scheduled_time:>8.2f}{scheduled['requests']:>15}"
+          f"{scheduled['peak_concurrency']:>18}")
+    print("\nScheduler metrics:")
+    print(json.dumps(scheduler.metrics(), indent=2))
+
+    if scheduled['peak_concurrency'] > args.max_concurrency:
+        print(f"❌ Backend saw {scheduled['peak_concurrency']} concurrent calls "
+              f"(limit {args.max_concurrency})")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Startup-time benchmark for the A2A sample agents.
+
+For each agent this measures, in fresh interpreters:
+  * time from process start until ``/a2a/health`` answers (ready), the
+    number that matters to clients and the supervisor,
+  * time from process start until the port accepts connections (bound);
+    connections made in between wait in the backlog until ready,
+  * import time of ``<agent>/agent.py`` and whether heavy modules leaked in.
+
+Serving A2A needs ``python_a2a``, which itself imports LangChain, so its
+import time (reported once up front) is a floor on ready time.
+
+Use ``--max-ready-ms`` and ``--max-import-ms`` to fail (exit 1) when an
+agent exceeds the budget.
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+AGENTS = ['finance_agent', 'calendar_agent', 'task_agent']
+HEAVY_MODULES = ['pandas', 'langchain', 'langchain_ollama', 'python_a2a']
+
+IMPORT_PROBE = """
+import json, sys, time
+sys.path.insert(0, {script_dir!r})
+start = time.perf_counter()
+import {agent}.agent
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "import_ms": elapsed * 1000,
+    "heavy": [m for m in {heavy!r} if m in sys.modules],
+}}))
+"""
+
+
+A2A_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import python_a2a
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "import_ms": elapsed * 1000,
+    "heavy": [m for m in {heavy!r} if m in sys.modules and m != 'python_a2a'],
+}}))
+"""
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def measure_import(agent: str) -> dict:
+    code = IMPORT_PROBE.format(
+        script_dir=SCRIPT_DIR, agent=agent, heavy=HEAVY_MODULES)
+    return _probe(code)
+
+
+def _probe(code: str) -> dict:
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True,
+                         text=True, check=True, cwd=SCRIPT_DIR)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def measure_server(agent: str, timeout: float) -> dict:
+    port = free_port()
+    script_path = os.path.join(SCRIPT_DIR, agent, 'agent.py')
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, script_path, '--host', '127.0.0.1', '--port', str(port)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    bound_ms = ready_ms = None
+    try:
+        deadline = start + timeout
+        while time.perf_counter() < deadline and proc.poll() is None:
+            if bound_ms is None:
+                try:
+                    socket.create_connection(('127.0.0.1', port), 0.05).close()
+                    bound_ms = (time.perf_counter() - start) * 1000
+                except OSError:
+                    time.sleep(0.005)
+                    continue
+            try:
+                with urllib.request.urlopen(
+                        f'http://127.0.0.1:{port}/a2a/health', timeout=timeout) as resp:
+                    if resp.status == 200:
+                        ready_ms = (time.perf_counter() - start) * 1000
+                        break
+            except OSError:
+                time.sleep(0.02)
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+    return {'bound_ms': bound_ms, 'ready_ms': ready_ms}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--agents', nargs='*', default=AGENTS,
+                        help="Agents to benchmark (default: all)")
+    parser.add_argument('--runs', type=int, default=3,
+                        help="Runs per agent; the median is reported (default: 3)")
+    parser.add_argument('--timeout', type=float, default=60.0,
+                        help="Seconds to wait for a server to become ready")
+    parser.add_argument('--max-ready-ms', type=float, default=None,
+                        help="Fail if an agent's median ready time exceeds this")
+    parser.add_argument('--max-import-ms', type=float, default=None,
+                        help="Fail if an agent's median import time exceeds this")
+    parser.add_argument('--skip-server', action='store_true',
+                        help="Only measure module import time")
+    args = parser.parse_args()
+
+    def median(values):
+        values = sorted(v for v in values if v is not None)
+        return values[len(values) // 2] if values else None
+
+    def fmt(value):
+        return f"{value:8.1f}" if value is not None else "       -"
+
+    if not args.skip_server:
+        a2a = _probe(A2A_PROBE.format(heavy=HEAVY_MODULES))
+        print(f"python_a2a import: {a2a['import_ms']:.0f} ms, also loads "
+              f"{', '.join(a2a['heavy']) or 'nothing heavy'} (floor on ready time)\n")
+
+    failed = False
+    print(f"{'agent':<16}{'ready ms':>10}{'bound ms':>10}{'import ms':>10}  heavy imports")
+    for agent in args.agents:
+        imports = [measure_import(agent) for _ in range(args.runs)]
+        import_ms = median(r['import_ms'] for r in imports)
+        heavy = sorted({m for r in imports for m in r['heavy']})
+        bound_ms = ready_ms = None
+        if not args.skip_server:
+            servers = [measure_server(agent, args.timeout) for _ in range(args.runs)]
+            bound_ms = median(r['bound_ms'] for r in servers)
+            ready_ms = median(r['ready_ms'] for r in servers)
+        print(f"{agent:<16}{fmt(ready_ms):>10}{fmt(bound_ms):>10}{fmt(import_ms):>10}  "
+              f"{', '.join(heavy) or 'none'}")
+        if args.max_ready_ms is not None and ready_ms is not None \
+                and ready_ms > args.max_ready_ms:
+            print(f"   ❌ {agent} took {ready_ms:.1f} ms to become ready "
+                  f"(budget {args.max_ready_ms:.1f} ms)")
+            failed = True
+        if args.max_import_ms is not None and import_ms > args.max_import_ms:
+            print(f"   ❌ {agent} import took {import_ms:.1f} ms "
+                  f"(budget {args.max_import_ms:.1f} ms)")
+            failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -3,34 +3,34 @@
 A2A Server for Calendar Agent
 This module defines the Calendar Agent and A2A server setup.
 """
-import sqlite3
-import pandas as pd
+import os
+import sys
 import argparse
-from python_a2a import run_server, A2AServer, AgentCard, AgentSkill  # type: ignore
-from langchain.tools import Tool
-from langchain.agents import initialize_agent, AgentExecutor, AgentType  # type: ignore
-from langchain_ollama import ChatOllama  # type: ignore
 
-# Sample calendar events data
-events_data = {
-    'id': [1, 2, 3],
-    'title': ['Team Standup', 'Project Deadline', 'One-on-One'],
-    'date': ['2025-08-03', '2025-08-15', '2025-08-05'],
-    'time': ['09:00', '17:00', '11:00']
-}
-df_events = pd.DataFrame(events_data)
-
-# Load data into an in-memory SQLite database
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from agent_common import (  # noqa: E402
+    AgentDatabase, LazyResource, adopt_listener, bind_listener, invoke_executor,
+    message_text, serve_a2a, shared_llm, text_reply)
+from intent_router import LIST_LIMIT, IntentRouter, QueryTemplate, listing  # noqa: E402
 
+# Sample calendar events data
+EVENT_COLUMNS = [('id', 'INTEGER'), ('title', 'TEXT'),
+                 ('date', 'TEXT'), ('time', 'TEXT')]
+EVENT_ROWS = [
+    (1, 'Team Standup', '2025-08-03', '09:00'),
+    (2, 'Project Deadline', '2025-08-15', '17:00'),
+    (3, 'One-on-One', '2025-08-05', '11:00'),
+]
 
-def setup_db():
-    conn = sqlite3.connect(':memory:')
-    df_events.to_sql('events', conn, index=False, if_exists='replace')
-    return conn
+# Columns the skills filter or sort on
+EVENT_INDEXES = ['date, time']
 
+# The in-memory sample rows by default, or a file-backed database (optionally
+# streamed from a CSV/Parquet file) with --db-path/--data-file
+database = AgentDatabase('events', EVENT_COLUMNS, EVENT_ROWS, indexes=EVENT_INDEXES,
+                         env_prefix='CALENDAR', name='Calendar Agent database')
+query_rows = database.query_rows
 
-conn = setup_db()
-cursor = conn.cursor()
 
 # Tool to execute SQL on the sample events data
 
@@ -38,45 +38,100 @@ cursor = conn.cursor()
 def events_sql_tool(query: str) -> str:
     """Executes SQL queries on sample calendar events data."""
     try:
-        rows = cursor.execute(query).fetchall()
-        return str(rows)
+        return str(query_rows(query))
     except Exception as e:
         return f"Error: {e}"
 
 
-# Wrap the events query function into a LangChain Tool
-events_tool = Tool.from_function(
-    func=events_sql_tool,
-    name='EventsSQL',
-    description='Executes SQL queries on sample calendar events for personal productivity.'
-)
+# Fast paths for the events_query skill examples: matching questions are
+# answered straight from SQLite without a ReAct loop. Lists are capped at
+# LIST_LIMIT rows, with the total count in the last column
+
+
+def _events_query(columns: str, where: str):
+    return (f"SELECT {columns}, (SELECT count(*) FROM events WHERE {where}) "
+            f"FROM events WHERE {where} ORDER BY date, time LIMIT ?", (LIST_LIMIT,))
+
+
+def _events_answer(empty, heading):
+    def _format(params, rows):
+        if not rows:
+            return empty
+        return heading + listing(
+            [f"{row[0]} ({' '.join(row[1:-1])})" for row in rows], rows[0][-1]) + '.'
+    return _format
+
+
+FAST_PATHS = [
+    QueryTemplate(
+        name='today',
+        examples=["What events are today?"],
+        patterns=[
+            r"what events are (?:there )?(?:on )?today",
+            r"what(?:'s| is) (?:on )?(?:my calendar )?(?:for )?today",
+            r"(?:list|show|show me) (?:all )?(?:the )?(?:events (?:for )?today|today's events)",
+        ],
+        build=lambda p: _events_query('title, time', "date = date('now', 'localtime')"),
+        format=_events_answer("No events today.", "Today: "),
+    ),
+    QueryTemplate(
+        name='upcoming',
+        examples=["List all upcoming events"],
+        patterns=[
+            r"(?:list|show|show me) (?:all )?(?:the )?(?:my )?upcoming events",
+            r"what events are (?:coming up|upcoming)",
+        ],
+        build=lambda p: _events_query('title, date, time',
+                                      "date >= date('now', 'localtime')"),
+        format=_events_answer("No upcoming events.", "Upcoming events: "),
+    ),
+]
+
+router = IntentRouter(FAST_PATHS, query_rows)
+
+
+def build_agent_executor():
+    """Build the LangChain ReAct executor (imports LangChain and Ollama on demand)."""
+    from langchain.tools import Tool
+    from langchain.agents import initialize_agent, AgentType  # type: ignore
+
+    # Wrap the events query function into a LangChain Tool
+    events_tool = Tool.from_function(
+        func=events_sql_tool,
+        name='EventsSQL',
+        description='Executes SQL queries on sample calendar events for personal productivity.'
+    )
 
-# Initialize ChatOllama LLM
-# type: ignore
-llm = ChatOllama(model='phi4-mini',
-                 base_url='http://ollama:11434')
+    # Initialize ChatOllama LLM (shared client, calls go through the LLM scheduler)
+    llm = shared_llm(model='phi4-mini', base_url='http://ollama:11434',
+                     agent='calendar_agent')
 
-# Initialize the agent with the events tool
-agent_executor: AgentExecutor = initialize_agent(
-    tools=[events_tool],
-    llm=llm,
-    agent=AgentType.ZERO_SHOT_REACT_DESCRIPTION,
-    verbose=True
-)
+    # Initialize the agent with the events tool
+    return initialize_agent(
+        tools=[events_tool],
+        llm=llm,
+        agent=AgentType.ZERO_SHOT_REACT_DESCRIPTION,
+        verbose=True
+    )
 
 
-def start_a2a_agent(host: str, port: int):
-    """Start the A2A server exposing the Calendar Agent"""
+agent_executor = LazyResource(build_agent_executor, name='Calendar Agent executor')
+
+
+def create_server(host: str, port: int, path: str = ''):
+    """Create the A2A server object exposing the Calendar Agent"""
+    from python_a2a import A2AServer, AgentCard, AgentSkill  # type: ignore
+
     # Define A2A agent metadata
     card = AgentCard(
         name="Calendar Agent",
         description="Query your calendar events with natural language",
-        url=f"http://{host}:{port}",
+        url=f"http://{host}:{port}{path}",
         version="1.0.0",
         skills=[AgentSkill(
             name="events_query",
             description="Answer questions about calendar events",
-            examples=["What events are today?", "List all upcoming events"]
+            examples=router.examples()
         )]
     )
 
@@ -85,13 +140,27 @@ def start_a2a_agent(host: str, port: int):
         def __init__(self):
             super().__init__(agent_card=card)
             self.executor = agent_executor
+            self.router = router
+            self.sql_cache = query_rows
 
         def handle_message(self, message):
-            result = self.executor.invoke({"input": message.content})
-            return {"output": result.get("output")}
+            answer = self.router.handle(message_text(message), self.run_executor)
+            return text_reply(message, answer)
 
-    server = CalendarAgentServer()
-    run_server(server, host=host, port=port)
+        def run_executor(self, text: str) -> str:
+            return invoke_executor(self.executor.get(), text)
+
+    return CalendarAgentServer()
+
+
+def start_a2a_agent(host: str, port: int, fd: int = None, ready_fd: int = None):
+    """Start the A2A server exposing the Calendar Agent"""
+    # Bind first so clients queue instead of being refused while we import
+    sock = adopt_listener(fd) if fd is not None else bind_listener(host, port)
+    agent_executor.warm_up()
+    database.get()
+    server = create_server(host, port)
+    serve_a2a(server, sock, ready_fd=ready_fd)
 
 
 if __name__ == '__main__':
@@ -105,7 +174,28 @@ if __name__ == '__main__':
         '--port', type=int, default=5052,
         help="Port for the A2A server (default: 5052)"
     )
+    parser.add_argument(
+        '--fd', type=int, default=None,
+        help="Serve on an inherited listening socket (used by the supervisor)"
+    )
+    parser.add_argument(
+        '--ready-fd', type=int, default=None,
+        help="Pipe to signal readiness on (used by the supervisor)"
+    )
+    parser.add_argument(
+        '--db-path', default=None,
+        help="File-backed SQLite database (default: in-memory sample data)"
+    )
+    parser.add_argument(
+        '--data-file', default=None,
+        help="CSV/Parquet file to load into --db-path"
+    )
     args = parser.parse_args()
+    if args.db_path:
+        os.environ['CALENDAR_DB_PATH'] = args.db_path
+    if args.data_file:
+        os.environ['CALENDAR_DATA_FILE'] = args.data_file
 
     print(f"🔧 Starting Calendar Agent A2A server on {args.host}:{args.port}")
-    start_a2a_agent(host=args.host, port=args.port)
+    start_a2a_agent(host=args.host, port=args.port,
+                    fd=args.fd, ready_fd=args.ready_fd)
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+File-backed data for the A2A sample agents.
+
+``open_agent_db`` gives an agent its SQLite connection. By default it is the
+in-memory toy table; with a database path it is a file-backed database using
+memory-mapped I/O, optionally (re)loaded from a large CSV or Parquet file.
+Input is streamed in chunks so memory stays flat, indexes are built after the
+load on the columns the agent's skills query, and the source file's size and
+mtime are recorded so workers sharing the database load it only once.
+Parquet input needs ``pyarrow``.
+"""
+import contextlib
+import csv
+import os
+import sqlite3
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from agent_common import load_table
+
+Columns = Sequence[Tuple[str, str]]
+
+DEFAULT_CHUNK_ROWS = 50_000
+DEFAULT_MMAP_BYTES = 256 * 1024 * 1024
+
+
+def _to_integer(value: str) -> Optional[int]:
+    lowered = value.strip().lower()
+    if lowered in ('true', 'false'):
+        return int(lowered == 'true')
+    return int(float(lowered)) if lowered else None
+
+
+def _converter(sql_type: str) -> Callable[[str], Any]:
+    sql_type = sql_type.upper()
+    if 'INT' in sql_type:
+        return _to_integer
+    if any(t in sql_type for t in ('REAL', 'FLOA', 'DOUB')):
+        return lambda v: float(v) if v.strip() else None
+    return lambda v: v
+
+
+def _chunks(rows: Iterable[tuple], size: int) -> Iterator[List[tuple]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def read_csv(path: str, columns: Columns, chunk_rows: int) -> Iterator[List[tuple]]:
+    """Stream typed rows from a CSV file with a header naming ``columns``."""
+    names = [name for name, _ in columns]
+    converters = [_converter(sql_type) for _, sql_type in columns]
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = [h.strip() for h in next(reader)]
+        missing = set(names) - set(header)
+        if missing:
+            raise ValueError(f"{path} is missing columns: {', '.join(sorted(missing))}")
+        positions = [header.index(name) for name in names]
+        rows = (tuple(convert(record[i]) for convert, i in zip(converters, positions))
+                for record in reader if record)
+        yield from _chunks(rows, chunk_rows)
+
+
+def read_parquet(path: str, columns: Columns, chunk_rows: int) -> Iterator[List[tuple]]:
+    """Stream rows from a Parquet file batch by batch (requires pyarrow)."""
+    try:
+        import pyarrow.parquet as pq  # type: ignore
+    except ImportError as e:
+        raise RuntimeError("Loading Parquet files requires pyarrow "
+                           "(pip install pyarrow)") from e
+    names = [name for name, _ in columns]
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows, columns=names):
+        yield list(zip(*(batch.column(i).to_pylist() for i in range(len(names)))))
+
+
+def read_rows(path: str, columns: Columns,
+              chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[List[tuple]]:
+    if path.lower().endswith(('.parquet', '.pq')):
+        return read_parquet(path, columns, chunk_rows)
+    return read_csv(path, columns, chunk_rows)
+
+
+def connect(db_path: str, mmap_bytes: int = DEFAULT_MMAP_BYTES) -> sqlite3.Connection:
+    """Open a file-backed database tuned for read-mostly tool queries."""
+    conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+    conn.execute(f'PRAGMA mmap_size = {int(mmap_bytes)}')
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.execute('PRAGMA synchronous = NORMAL')
+    conn.execute('PRAGMA temp_store = MEMORY')
+    return conn
+
+
+@contextlib.contextmanager
+def _exclusive(db_path: str):
+    """Serialize loads across worker processes sharing ``db_path``."""
+    try:
+        import fcntl
+    except ImportError:  # not available on Windows; loads are not concurrent there
+        yield
+        return
+    with open(db_path + '.lock', 'w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _source_signature(path: str) -> str:
+    stat = os.stat(path)
+    return f"{os.path.abspath(path)}:{stat.st_size}:{int(stat.st_mtime)}"
+
+
+def _table_exists(conn: sqlite3.Connection, table: str) -> bool:
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                        (table,)).fetchone() is not None
+
+
+def create_indexes(conn: sqlite3.Connection, table: str, indexes: Sequence[str]):
+    """Create indexes; each entry is a column or comma-separated columns (``"date, time"``)."""
+    with conn:
+        for spec in indexes:
+            columns = [c.strip() for c in spec.split(',')]
+            name = f"idx_{table}_{'_'.join(columns)}"
+            column_sql = ', '.join(f'"{c}"' for c in columns)
+            conn.execute(f'CREATE INDEX IF NOT EXISTS "{name}" ON "{table}" ({column_sql})')
+
+
+def load_file(conn: sqlite3.Connection, table: str, columns: Columns, path: str,
+              indexes: Sequence[str] = (), chunk_rows: int = DEFAULT_CHUNK_ROWS) -> int:
+    """Replace ``table`` with the rows of ``path``, loading in chunks; returns the row count."""
+    column_sql = ', '.join(f'"{name}" {sql_type}' for name, sql_type in columns)
+    placeholders = ', '.join('?' for _ in columns)
+    conn.execute('PRAGMA synchronous = OFF')
+    total = 0
+    try:
+        with conn:
+            conn.execute(f'DROP TABLE IF EXISTS "{table}"')
+            conn.execute(f'CREATE TABLE "{table}" ({column_sql})')
+        for chunk in read_rows(path, columns, chunk_rows):
+            with conn:
+                conn.executemany(
+                    f'INSERT INTO "{table}" VALUES ({placeholders})', chunk)
+            total += len(chunk)
+        # Indexes are much cheaper to build once after the bulk insert
+        create_indexes(conn, table, indexes)
+        with conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS _sources '
+                         '(tbl TEXT PRIMARY KEY, signature TEXT, row_count INTEGER)')
+            conn.execute('INSERT OR REPLACE INTO _sources VALUES (?, ?, ?)',
+                         (table, _source_signature(path), total))
+        conn.execute('ANALYZE')
+    finally:
+        conn.execute('PRAGMA synchronous = NORMAL')
+    return total
+
+
+def open_agent_db(table: str, columns: Columns, seed_rows: Sequence[Sequence],
+                  indexes: Sequence[str] = (), data_path: Optional[str] = None,
+                  db_path: Optional[str] = None) -> sqlite3.Connection:
+    """Open an agent's database.
+
+    Without ``db_path`` this is an in-memory database holding ``seed_rows``.
+    With it the database is file-backed: ``data_path`` is loaded unless the
+    same file was loaded before, and an empty database gets the seed rows.
+    """
+    if not db_path:
+        if data_path:
+            raise ValueError("Loading a data file requires a database path")
+        conn = sqlite3.connect(':memory:', check_same_thread=False)
+        load_table(conn, table, columns, seed_rows)
+        return conn
+
+    conn = connect(db_path, int(os.environ.get('SQLITE_MMAP_BYTES', DEFAULT_MMAP_BYTES)))
+    with _exclusive(db_path):
+        if data_path:
+            loaded = None
+            if _table_exists(conn, '_sources'):
+                loaded = conn.execute('SELECT signature FROM _sources WHERE tbl = ?',
+                                      (table,)).fetchone()
+            if loaded is None or loaded[0] != _source_signature(data_path):
+                print(f"📥 Loading {data_path} into {db_path}:{table}...")
+                count = load_file(conn, table, columns, data_path, indexes)
+                print(f"✅ Loaded {count:,} rows into {table}")
+        elif not _table_exists(conn, table):
+            load_table(conn, table, columns, seed_rows)
+            create_indexes(conn, table, indexes)
+    return conn
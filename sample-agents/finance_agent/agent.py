@@ -3,80 +3,135 @@
 A2A Server for Finance Agent
 This module defines the Finance Agent and A2A server setup.
 """
-import sqlite3
-import pandas as pd
+import os
+import sys
 import argparse
-from python_a2a import run_server, A2AServer, AgentCard, AgentSkill  # type: ignore
-from langchain.tools import Tool
-from langchain.agents import initialize_agent, AgentExecutor, AgentType  # type: ignore
-from langchain_ollama import ChatOllama  # type: ignore
 
-# Generate sample stock market data
-data = {
-    'symbol': ['AAPL', 'GOOG', 'MSFT', 'TSLA', 'AMZN'],
-    'price': [150.0, 2800.5, 300.3, 720.1, 3300.2],
-    'volume': [1000000, 1500000, 1200000, 800000, 900000]
-}
-df = pd.DataFrame(data)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from agent_common import (  # noqa: E402
+    AgentDatabase, LazyResource, adopt_listener, bind_listener, invoke_executor,
+    message_text, serve_a2a, shared_llm, text_reply)
+from intent_router import IntentRouter, QueryTemplate  # noqa: E402
 
-# Load data into an in-memory SQLite database
+# Sample stock market data
+STOCK_COLUMNS = [('symbol', 'TEXT'), ('price', 'REAL'), ('volume', 'INTEGER')]
+STOCK_ROWS = [
+    ('AAPL', 150.0, 1000000),
+    ('GOOG', 2800.5, 1500000),
+    ('MSFT', 300.3, 1200000),
+    ('TSLA', 720.1, 800000),
+    ('AMZN', 3300.2, 900000),
+]
 
+# Columns the skills filter or sort on
+STOCK_INDEXES = ['symbol', 'volume']
 
-def setup_db():
-    conn = sqlite3.connect(':memory:')
-    df.to_sql('stocks', conn, index=False, if_exists='replace')
-    return conn
+# The in-memory sample rows by default, or a file-backed database (optionally
+# streamed from a CSV/Parquet file) with --db-path/--data-file
+database = AgentDatabase('stocks', STOCK_COLUMNS, STOCK_ROWS, indexes=STOCK_INDEXES,
+                         env_prefix='FINANCE', name='Finance Agent database')
+query_rows = database.query_rows
 
 
-conn = setup_db()
-cursor = conn.cursor()
-
 # Tool to execute SQL on the sample data
 
 
 def sql_query_tool(query: str) -> str:
     """Executes a SQL query against the sample stock data."""
     try:
-        rows = cursor.execute(query).fetchall()
-        return str(rows)
+        return str(query_rows(query))
     except Exception as e:
         return f'Error: {e}'
 
 
-# Wrap the query function into a LangChain Tool
-sql_tool = Tool.from_function(
-    func=sql_query_tool,
-    name='SQLExecutor',
-    description='Executes SQL queries on sample stock market data.'
-)
+# Fast paths for the finance_query skill examples: matching questions are
+# answered straight from SQLite without a ReAct loop
+
+
+def _price_answer(params, rows):
+    symbol, price = rows[0]
+    return f"{symbol} is priced at {price:,}."
+
+
+def _top_answer(params, rows):
+    listed = ', '.join(f"{symbol} ({value:,})" for symbol, value in rows)
+    return f"Top {params['n']} stocks by {params['column']}: {listed or 'none'}."
+
+
+FAST_PATHS = [
+    QueryTemplate(
+        name='price',
+        examples=["What is the price of AAPL?"],
+        patterns=[
+            r"(?:what is|what's|show|show me|get) (?:the )?(?:current )?(?:stock )?"
+            r"price (?:of|for) (?P<symbol>[a-z.]{1,6})",
+            r"(?P<symbol>[a-z.]{1,6}) (?:stock )?price",
+        ],
+        build=lambda p: ('SELECT symbol, price FROM stocks WHERE symbol = ?',
+                         (p['symbol'].upper(),)),
+        format=_price_answer,
+        # "price of gold" matches too; unknown symbols go to the executor
+        fallback_if_empty=True,
+    ),
+    QueryTemplate(
+        name='top_stocks',
+        examples=["Show top 3 stocks by volume"],
+        patterns=[
+            r"(?:show|show me|list|what are|get) (?:the )?top (?P<n>\d{1,3}) stocks "
+            r"by (?P<column>volume|price)",
+        ],
+        # column is restricted to a whitelist by the pattern
+        build=lambda p: (f"SELECT symbol, {p['column']} FROM stocks "
+                         f"ORDER BY {p['column']} DESC LIMIT ?", (int(p['n']),)),
+        format=_top_answer,
+    ),
+]
+
+router = IntentRouter(FAST_PATHS, query_rows)
+
+
+def build_agent_executor():
+    """Build the LangChain ReAct executor (imports LangChain and Ollama on demand)."""
+    from langchain.tools import Tool
+    from langchain.agents import initialize_agent, AgentType  # type: ignore
+
+    # Wrap the query function into a LangChain Tool
+    sql_tool = Tool.from_function(
+        func=sql_query_tool,
+        name='SQLExecutor',
+        description='Executes SQL queries on sample stock market data.'
+    )
 
-# Initialize ChatOllama LLM
-# type: ignore
-llm = ChatOllama(model='phi4-mini',
-                 base_url='http://ollama:11434')
+    # Initialize ChatOllama LLM (shared client, calls go through the LLM scheduler)
+    llm = shared_llm(model='phi4-mini', base_url='http://ollama:11434',
+                     agent='finance_agent')
 
-# Initialize the agent with the SQL tool
-agent_executor: AgentExecutor = initialize_agent(
-    tools=[sql_tool],
-    llm=llm,
-    agent=AgentType.ZERO_SHOT_REACT_DESCRIPTION,
-    verbose=True
-)
+    # Initialize the agent with the SQL tool
+    return initialize_agent(
+        tools=[sql_tool],
+        llm=llm,
+        agent=AgentType.ZERO_SHOT_REACT_DESCRIPTION,
+        verbose=True
+    )
 
 
-def start_a2a_agent(host: str, port: int):
-    """Start the A2A server exposing the Finance Agent"""
+agent_executor = LazyResource(build_agent_executor, name='Finance Agent executor')
+
+
+def create_server(host: str, port: int, path: str = ''):
+    """Create the A2A server object exposing the Finance Agent"""
+    from python_a2a import A2AServer, AgentCard, AgentSkill  # type: ignore
+
     # Define A2A agent metadata
     card = AgentCard(
         name="Finance Agent",
         description="Answer finance questions from natural language",
-        url=f"http://{host}:{port}",
+        url=f"http://{host}:{port}{path}",
         version="1.0.0",
         skills=[AgentSkill(
             name="finance_query",
             description="Answer stock data questions",
-            examples=["What is the price of AAPL?",
-                "Show top 3 stocks by volume"]
+            examples=router.examples()
         )]
     )
 
@@ -85,13 +140,27 @@ def start_a2a_agent(host: str, port: int):
         def __init__(self):
             super().__init__(agent_card=card)
             self.executor = agent_executor
+            self.router = router
+            self.sql_cache = query_rows
 
         def handle_message(self, message):
-            result = self.executor.invoke({"input": message.content})
-            return {"output": result.get("output")}
+            answer = self.router.handle(message_text(message), self.run_executor)
+            return text_reply(message, answer)
+
+        def run_executor(self, text: str) -> str:
+            return invoke_executor(self.executor.get(), text)
 
-    server = FinanceAgentServer()
-    run_server(server, host=host, port=port)
+    return FinanceAgentServer()
+
+
+def start_a2a_agent(host: str, port: int, fd: int = None, ready_fd: int = None):
+    """Start the A2A server exposing the Finance Agent"""
+    # Bind first so clients queue instead of being refused while we import
+    sock = adopt_listener(fd) if fd is not None else bind_listener(host, port)
+    agent_executor.warm_up()
+    database.get()
+    server = create_server(host, port)
+    serve_a2a(server, sock, ready_fd=ready_fd)
 
 
 if __name__ == '__main__':
@@ -105,7 +174,28 @@ if __name__ == '__main__':
         '--port', type=int, default=5053,
         help="Port for the A2A server (default: 5053)"
     )
+    parser.add_argument(
+        '--fd', type=int, default=None,
+        help="Serve on an inherited listening socket (used by the supervisor)"
+    )
+    parser.add_argument(
+        '--ready-fd', type=int, default=None,
+        help="Pipe to signal readiness on (used by the supervisor)"
+    )
+    parser.add_argument(
+        '--db-path', default=None,
+        help="File-backed SQLite database (default: in-memory sample data)"
+    )
+    parser.add_argument(
+        '--data-file', default=None,
+        help="CSV/Parquet file to load into --db-path"
+    )
     args = parser.parse_args()
+    if args.db_path:
+        os.environ['FINANCE_DB_PATH'] = args.db_path
+    if args.data_file:
+        os.environ['FINANCE_DATA_FILE'] = args.data_file
 
     print(f"🔧 Starting Finance Agent A2A server on {args.host}:{args.port}")
-    start_a2a_agent(host=args.host, port=args.port)
+    start_a2a_agent(host=args.host, port=args.port,
+                    fd=args.fd, ready_fd=args.ready_fd)
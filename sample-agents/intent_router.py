@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Skill-example fast path for the A2A sample agents.
+
+Each agent declares ``QueryTemplate``s next to its skill: the examples shown
+on the agent card, the phrasings they accept (regular expressions with named
+parameters) and the parameterized SQL that answers them. ``IntentRouter``
+answers messages that fully match a template straight from SQLite and hands
+everything else to the LangChain executor, keeping fast-path statistics.
+"""
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from tracing import span
+
+QueryRunner = Callable[[str, Sequence[Any]], List[tuple]]
+SqlBuilder = Callable[[Dict[str, str]], Tuple[str, Sequence[Any]]]
+Formatter = Callable[[Dict[str, str], List[tuple]], str]
+
+# Most rows a list answer names; the rest are only counted
+LIST_LIMIT = 20
+
+_PUNCTUATION = re.compile(r"[?!.]+$")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize(text: str) -> str:
+    """Lower-case, straighten quotes, collapse whitespace, drop trailing punctuation."""
+    text = text.replace('’', "'").strip().lower()
+    return _PUNCTUATION.sub('', _SPACES.sub(' ', text)).strip()
+
+
+def listing(items: List[str], total: int) -> str:
+    """Join ``items`` and say how many of ``total`` were left out."""
+    text = ', '.join(items)
+    if total > len(items):
+        text += f" and {total - len(items):,} more"
+    return text
+
+
+class QueryTemplate:
+    """A skill example together with the phrasings and SQL that answer it.
+
+    Set ``fallback_if_empty`` when a parameter is free-form text that may not
+    name anything in the data (e.g. a ticker): a query returning no rows then
+    means the match was wrong, and the message goes to the executor instead.
+    """
+
+    def __init__(self, name: str, examples: List[str], patterns: List[str],
+                 build: SqlBuilder, format: Formatter, fallback_if_empty: bool = False):
+        self.name = name
+        self.examples = examples
+        self.patterns = [re.compile(p) for p in patterns]
+        self.build = build
+        self.format = format
+        self.fallback_if_empty = fallback_if_empty
+        for example in examples:
+            if self.match(example) is None:
+                raise ValueError(
+                    f"Template '{name}' does not match its own example '{example}'")
+
+    def match(self, text: str) -> Optional[Dict[str, str]]:
+        normalized = normalize(text)
+        for pattern in self.patterns:
+            m = pattern.fullmatch(normalized)
+            if m:
+                return m.groupdict()
+        return None
+
+
+class IntentRouter:
+    """Answers template matches directly and falls back to the executor otherwise."""
+
+    def __init__(self, templates: List[QueryTemplate], run_query: QueryRunner):
+        self.templates = templates
+        self.run_query = run_query
+        self._lock = threading.Lock()
+        self._fast = 0
+        self._fallback = 0
+        self._empty = 0
+        self._fast_seconds = 0.0
+        self._fallback_seconds = 0.0
+        self._by_template: Dict[str, int] = {t.name: 0 for t in templates}
+
+    def examples(self) -> List[str]:
+        """Skill examples for the agent card, all guaranteed to hit the fast path."""
+        return [example for t in self.templates for example in t.examples]
+
+    def route(self, text: str) -> Optional[Tuple[QueryTemplate, str]]:
+        """Return (template, answer) for a confident match, else ``None``."""
+        for template in self.templates:
+            params = template.match(text)
+            if params is not None:
+                sql, args = template.build(params)
+                rows = self.run_query(sql, args)
+                if not rows and template.fallback_if_empty:
+                    with self._lock:
+                        self._empty += 1
+                    return None
+                return template, template.format(params, rows)
+        return None
+
+    def handle(self, text: str, fallback: Callable[[str], str]) -> str:
+        """Answer ``text`` via the fast path if possible, otherwise via ``fallback``."""
+        start = time.perf_counter()
+        with span('router', message=text[:200]) as routing:
+            try:
+                routed = self.route(text)
+            except Exception as e:
+                # A failing fast path must never break the request
+                routing.set(fast_path_error=f"{type(e).__name__}: {e}")
+                routed = None
+            if routed is not None:
+                template, answer = routed
+                routing.set(route='fast_path', template=template.name)
+                with self._lock:
+                    self._fast += 1
+                    self._fast_seconds += time.perf_counter() - start
+                    self._by_template[template.name] += 1
+                return answer
+
+            routing.set(route='fallback')
+            answer = fallback(text)
+        with self._lock:
+            self._fallback += 1
+            self._fallback_seconds += time.perf_counter() - start
+        return answer
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self._fast + self._fallback
+            fast_ms = 1000 * self._fast_seconds / self._fast if self._fast else None
+            fallback_ms = (1000 * self._fallback_seconds / self._fallback
+                           if self._fallback else None)
+            saved_ms = (self._fast * (fallback_ms - fast_ms)
+                        if fast_ms is not None and fallback_ms is not None else None)
+            return {
+                'messages': total,
+                'fast_path': self._fast,
+                'fallback': self._fallback,
+                'empty_match_fallback': self._empty,
+                'fast_path_ratio': self._fast / total if total else 0.0,
+                'fast_path_ms_avg': fast_ms,
+                'fallback_ms_avg': fallback_ms,
+                'estimated_ms_saved': saved_ms,
+                'by_template': dict(self._by_template),
+            }
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Shared LLM dispatch for the A2A sample agents.
+
+All LLM calls made in a process go through one ``LLMScheduler``:
+  * at most ``max_concurrency`` calls reach the backend at once,
+  * waiting calls are granted round-robin across agents (per-agent fair
+    queues), higher ``priority`` first, FIFO within a priority,
+  * identical requests already in flight are coalesced into one backend call
+    (Ollama has no batch endpoint, so this is the micro-batching we can do),
+  * queue-time and run-time metrics are kept per agent.
+
+The limit is process-wide. When agents run as separate worker processes,
+the supervisor also serves slots from an ``llm_slots.SlotServer`` with the
+same limit; a scheduler given ``global_slots`` takes one of those too, so the
+limit and the round-robin across agents hold across every process.
+"""
+import collections
+import contextlib
+import functools
+import hashlib
+import heapq
+import itertools
+import threading
+import time
+from typing import Any, Callable, Deque, Dict, Hashable, List, Optional, TypeVar
+
+from tracing import span
+
+T = TypeVar('T')
+
+
+class _Ticket:
+    __slots__ = ('priority', 'seq', 'granted')
+
+    def __init__(self, priority: int, seq: int):
+        self.priority = priority
+        self.seq = seq
+        self.granted = threading.Event()
+
+    def __lt__(self, other: '_Ticket') -> bool:
+        # heapq is a min-heap: higher priority first, then arrival order
+        return (-self.priority, self.seq) < (-other.priority, other.seq)
+
+
+class _Flight:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class _AgentStats:
+    __slots__ = ('submitted', 'completed', 'failed', 'coalesced', 'queued',
+                 'wait_total', 'wait_max', 'run_total', 'recent_waits')
+
+    def __init__(self, window: int):
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.coalesced = 0
+        self.queued = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.run_total = 0.0
+        self.recent_waits: Deque[float] = collections.deque(maxlen=window)
+
+    def as_dict(self) -> Dict[str, Any]:
+        waits = sorted(self.recent_waits)
+        dispatched = self.completed + self.failed
+
+        def pct(p: float) -> float:
+            return waits[min(int(p * len(waits)), len(waits) - 1)] if waits else 0.0
+
+        return {
+            'submitted': self.submitted,
+            'completed': self.completed,
+            'failed': self.failed,
+            'coalesced': self.coalesced,
+            'queued': self.queued,
+            'queue_ms_avg': 1000 * self.wait_total / dispatched if dispatched else 0.0,
+            'queue_ms_p50': 1000 * pct(0.50),
+            'queue_ms_p95': 1000 * pct(0.95),
+            'queue_ms_max': 1000 * self.wait_max,
+            'run_ms_avg': 1000 * self.run_total / dispatched if dispatched else 0.0,
+        }
+
+
+class LLMScheduler:
+    """Concurrency-limited, fair, priority-aware dispatcher for LLM calls."""
+
+    def __init__(self, max_concurrency: int = 2, coalesce: bool = True,
+                 window: int = 512, global_slots: Any = None):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.max_concurrency = max_concurrency
+        self.coalesce = coalesce
+        self.global_slots = global_slots
+        self._window = window
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+        self._active = 0
+        self._queues: Dict[str, List[_Ticket]] = {}
+        self._rotation: Deque[str] = collections.deque()
+        self._inflight: Dict[Hashable, _Flight] = {}
+        self._stats: Dict[str, _AgentStats] = {}
+
+    def run(self, agent: str, fn: Callable[[], T], key: Optional[Hashable] = None,
+            priority: int = 0) -> T:
+        """Run ``fn`` once a slot is free; share the result of an identical in-flight ``key``."""
+        flight = None
+        if self.coalesce and key is not None:
+            with self._lock:
+                leader = self._inflight.get(key)
+                if leader is None:
+                    flight = self._inflight[key] = _Flight()
+                else:
+                    self._agent_stats(agent).coalesced += 1
+            if leader is not None:
+                with span('llm.coalesced', agent=agent):
+                    leader.done.wait()
+                if leader.error is not None:
+                    raise leader.error
+                return leader.result
+
+        try:
+            result = self._run_scheduled(agent, fn, priority)
+        except BaseException as e:
+            if flight is not None:
+                flight.error = e
+            raise
+        else:
+            if flight is not None:
+                flight.result = result
+            return result
+        finally:
+            if flight is not None:
+                with self._lock:
+                    self._inflight.pop(key, None)
+                flight.done.set()
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'max_concurrency': self.max_concurrency,
+                'global_slots': self.global_slots is not None,
+                'active': self._active,
+                'queued': sum(len(q) for q in self._queues.values()),
+                'agents': {name: stats.as_dict()
+                           for name, stats in self._stats.items()},
+            }
+
+    # -- internals -----------------------------------------------------------
+
+    def _agent_stats(self, agent: str) -> _AgentStats:
+        stats = self._stats.get(agent)
+        if stats is None:
+            stats = self._stats[agent] = _AgentStats(self._window)
+        return stats
+
+    def _run_scheduled(self, agent: str, fn: Callable[[], T], priority: int) -> T:
+        enqueued = time.perf_counter()
+        with contextlib.ExitStack() as slots:
+            with span('llm.queue', agent=agent, priority=priority):
+                self.acquire(agent, priority)
+                slots.callback(self.release)
+                if self.global_slots is not None:
+                    # Then one of the slots shared by every agent process
+                    slots.enter_context(self.global_slots.slot(agent, priority))
+            started = time.perf_counter()
+            ok = False
+            try:
+                with span('llm.request', agent=agent):
+                    result = fn()
+                ok = True
+                return result
+            finally:
+                finished = time.perf_counter()
+                with self._lock:
+                    stats = self._agent_stats(agent)
+                    wait = started - enqueued
+                    stats.wait_total += wait
+                    stats.wait_max = max(stats.wait_max, wait)
+                    stats.recent_waits.append(wait)
+                    stats.run_total += finished - started
+                    if ok:
+                        stats.completed += 1
+                    else:
+                        stats.failed += 1
+
+    def acquire(self, agent: str, priority: int = 0):
+        """Block until ``agent`` may start a call; pair with ``release``."""
+        with self._lock:
+            stats = self._agent_stats(agent)
+            stats.submitted += 1
+            if self._active < self.max_concurrency and not self._rotation:
+                self._active += 1
+                return
+            ticket = _Ticket(priority, next(self._seq))
+            queue = self._queues.setdefault(agent, [])
+            if not queue:
+                self._rotation.append(agent)
+            heapq.heappush(queue, ticket)
+            stats.queued += 1
+        ticket.granted.wait()
+
+    def release(self):
+        with self._lock:
+            self._active -= 1
+            self._dispatch_locked()
+
+    def _dispatch_locked(self):
+        """Hand free slots to waiters: best priority first, round-robin across agents."""
+        while self._active < self.max_concurrency and self._rotation:
+            best = max(self._queues[a][0].priority for a in self._rotation)
+            for _ in range(len(self._rotation)):
+                agent = self._rotation.popleft()
+                if self._queues[agent][0].priority == best:
+                    break
+                self._rotation.append(agent)
+            queue = self._queues[agent]
+            ticket = heapq.heappop(queue)
+            if queue:
+                self._rotation.append(agent)
+            else:
+                del self._queues[agent]
+            self._stats[agent].queued -= 1
+            self._active += 1
+            ticket.granted.set()
+
+
+def request_key(model: Any, messages: List[Any], stop: Optional[List[str]],
+                kwargs: Dict[str, Any]) -> str:
+    """Stable key identifying an LLM request, used to coalesce duplicates."""
+    digest = hashlib.sha256()
+    digest.update(f"{id(model)}|{stop!r}|{sorted(kwargs.items())!r}".encode())
+    for message in messages:
+        digest.update(f"\0{message.type}\0{message.content!r}".encode())
+    return digest.hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def _scheduled_model_class():
+    from langchain_core.language_models.chat_models import BaseChatModel
+
+    class ScheduledChatModel(BaseChatModel):
+        """LangChain chat model that routes calls to ``inner`` through a scheduler."""
+
+        inner: Any
+        scheduler: Any
+        agent: str
+        priority: int = 0
+
+        @property
+        def _llm_type(self) -> str:
+            return f"scheduled-{self.inner._llm_type}"
+
+        def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+            return self.scheduler.run(
+                self.agent,
+                lambda: self.inner._generate(
+                    messages, stop=stop, run_manager=run_manager, **kwargs),
+                key=request_key(self.inner, messages, stop, kwargs),
+                priority=self.priority,
+            )
+
+    return ScheduledChatModel
+
+
+def scheduled_chat_model(llm: Any, scheduler: LLMScheduler, agent: str,
+                         priority: int = 0):
+    """Wrap a LangChain chat model so its calls are dispatched by ``scheduler``."""
+    return _scheduled_model_class()(
+        inner=llm, scheduler=scheduler, agent=agent, priority=priority)
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+LLM slots shared by agent worker processes.
+
+``LLMScheduler`` limits and orders the LLM calls of one process. When the
+supervisor runs agents as separate processes it also serves a ``SlotServer``
+on a Unix socket (``$LLM_SLOTS_SOCKET`` in the workers). Each worker's
+scheduler takes a slot from it before calling the LLM, so
+``LLM_MAX_CONCURRENCY`` caps the calls reaching Ollama across every agent and
+worker, and waiting calls are granted round-robin across agents, higher
+priority first.
+
+A slot is held by an open connection: the client connects, sends its agent
+name and priority, gets ``ok`` once granted and closes the connection to
+release. A worker that dies releases its slots with it.
+"""
+import os
+import socket
+import socketserver
+import threading
+from contextlib import contextmanager
+
+from llm_scheduler import LLMScheduler
+
+
+class _SlotHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        request = self.rfile.readline().decode(errors='replace').split()
+        if not request:
+            return
+        agent = request[0]
+        priority = int(request[1]) if len(request) > 1 and request[1].lstrip('-').isdigit() else 0
+        scheduler = self.server.scheduler
+        scheduler.acquire(agent, priority)
+        try:
+            self.wfile.write(b'ok\n')
+            self.wfile.flush()
+            # Held until the client closes the connection
+            while self.rfile.read(4096):
+                pass
+        except OSError:
+            pass
+        finally:
+            scheduler.release()
+
+
+class SlotServer(socketserver.ThreadingUnixStreamServer):
+    """Grants up to ``limit`` concurrent LLM slots to connected clients."""
+
+    daemon_threads = True
+
+    def __init__(self, path: str, limit: int):
+        super().__init__(path, _SlotHandler)
+        self.path = path
+        self.scheduler = LLMScheduler(max_concurrency=limit, coalesce=False)
+
+    def start(self) -> 'SlotServer':
+        threading.Thread(target=self.serve_forever, name='llm-slots', daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class SlotClient:
+    """Takes slots from a ``SlotServer``; without one, calls are only limited locally."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._warned = False
+
+    def _connect(self, agent: str, priority: int) -> socket.socket:
+        conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            conn.connect(self.path)
+            conn.sendall(f"{agent.replace(' ', '_')} {priority}\n".encode())
+            reply = b''
+            while not reply.endswith(b'\n'):
+                chunk = conn.recv(16)
+                if not chunk:
+                    raise ConnectionError("slot server closed the connection")
+                reply += chunk
+            return conn
+        except BaseException:
+            conn.close()
+            raise
+
+    @contextmanager
+    def slot(self, agent: str, priority: int = 0):
+        conn = None
+        try:
+            conn = self._connect(agent, priority)
+        except OSError as e:
+            # Better to overrun the limit than to fail the request
+            if not self._warned:
+                print(f"⚠️  LLM slot server {self.path} unavailable ({e}); "
+                      "limiting LLM calls in this process only")
+                self._warned = True
+        try:
+            yield
+        finally:
+            if conn is not None:
+                conn.close()
@@ -2,12 +2,11 @@
 """
 Run all A2A sample agents concurrently: finance, calendar, and task agents.
 """
-import subprocess
+import argparse
 import os
 import sys
 
-SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-HOST = '0.0.0.0'
+HOST = os.environ.get('AGENT_HOST', '0.0.0.0')
 
 # Define agent names and ports
 AGENTS = [
@@ -16,27 +15,64 @@ AGENTS = [
     ('task_agent', 5051),
 ]
 
-processes = []
-
-try:
-    for name, port in AGENTS:
-        script_path = os.path.join(SCRIPT_DIR, name, 'agent.py')
-        print(f"Starting {name} on port {port}...")
-        p = subprocess.Popen([
-            sys.executable,
-            script_path,
-            '--host', HOST,
-            '--port', str(port)
-        ])
-        processes.append((name, p))
-
-    print("All agents started. Press Ctrl+C to exit.")
-    # Keep the main thread alive while agents run
-    import time
-    while True:
-        time.sleep(1)
-except KeyboardInterrupt:
-    print("\nShutting down agents...")
-    for name, p in processes:
-        p.terminate()
+
+def run_processes(workers=None, default_workers=1):
+    """Supervise worker processes for each agent, restarting them if they crash."""
+    from supervisor import AgentSpec, Supervisor
+
+    workers = workers or {}
+    specs = [AgentSpec(name, port, workers.get(name, default_workers))
+             for name, port in AGENTS]
+    Supervisor(specs, HOST).run()
     sys.exit(0)
+
+
+def run_single_process(prefix_port=None):
+    """Host every agent in this process, sharing libraries and the LLM client."""
+    import asyncio
+    from agent_host import run_host
+
+    print("Starting all agents in a single process...")
+    asyncio.run(run_host(AGENTS, HOST, prefix_port=prefix_port))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Run the finance, calendar and task sample agents")
+    parser.add_argument(
+        '--single-process', action='store_true',
+        help="Host all agents in one process instead of one process per agent"
+    )
+    parser.add_argument(
+        '--prefix-port', type=int, default=None,
+        help="With --single-process, serve every agent on this port under "
+             "/finance, /calendar and /task instead of separate ports"
+    )
+    parser.add_argument(
+        '--workers', action='append', default=[os.environ.get('AGENT_WORKERS', '')],
+        metavar='NAME=N',
+        help="Worker processes for an agent, e.g. finance_agent=4 "
+             "(repeatable or comma-separated; also read from $AGENT_WORKERS)"
+    )
+    parser.add_argument(
+        '--default-workers', type=int, default=1,
+        help="Worker processes for agents without an explicit count (default: 1)"
+    )
+    args = parser.parse_args()
+
+    from supervisor import parse_worker_counts
+    try:
+        worker_counts = parse_worker_counts(args.workers)
+    except ValueError as e:
+        parser.error(str(e))
+    unknown = set(worker_counts) - {name for name, _ in AGENTS}
+    if unknown:
+        parser.error(f"Unknown agent(s) in --workers: {', '.join(sorted(unknown))}")
+
+    if args.prefix_port is not None and not args.single_process:
+        parser.error("--prefix-port requires --single-process")
+
+    if args.single_process:
+        run_single_process(prefix_port=args.prefix_port)
+    else:
+        run_processes(worker_counts, args.default_workers)
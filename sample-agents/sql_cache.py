@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Result cache for the sample agents' SQL tools.
+
+``QueryCache`` wraps a ``run(query, params)`` function. Read-only queries are
+cached under a normalized form of the SQL plus its parameters; every other
+statement runs uncached and invalidates only the entries that read the tables
+it touches (all entries when those tables cannot be determined). Entries are
+evicted least-recently-used once the cache exceeds its byte budget.
+
+When several processes share a file-backed database, pass
+``external_version`` (e.g. ``PRAGMA data_version``) so commits made by other
+connections clear the cache too.
+"""
+import re
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Sequence, Set, Tuple
+
+from tracing import span
+
+QueryRunner = Callable[[str, Sequence[Any]], List[tuple]]
+
+_TOKENS = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|`[^`]*`|\[[^\]]*\]|\s+|[^\s'\"`\[]+|.")
+_TABLE_REF = re.compile(
+    r"\b(?:from|join|into|update|table)\s+(?:if\s+(?:not\s+)?exists\s+)?"
+    r"((?:\"(?:[^\"]|\"\")*\"|`[^`]*`|\[[^\]]*\]|[\w$]+)(?:\.(?:\"(?:[^\"]|\"\")*\"|[\w$]+))?)")
+# Results of these depend on more than table contents, so they are never cached.
+# SQLite reads 'now' in any case, and date/time functions called without a
+# time value (strftime with only a format) also mean now.
+_VOLATILE = re.compile(
+    r"'now'|\b(?:random|randomblob|changes|total_changes|last_insert_rowid)\s*\("
+    r"|\bcurrent_(?:date|time|timestamp)\b"
+    r"|\b(?:date|time|datetime|julianday|unixepoch)\s*\(\s*\)"
+    r"|\bstrftime\s*\(\s*'(?:[^']|'')*'\s*\)", re.IGNORECASE)
+_READ_KEYWORDS = ('select', 'with', 'values')
+_WRITE_KEYWORDS = re.compile(
+    r"\b(?:insert|update|delete|replace|create|drop|alter)\b")
+
+
+def normalize_sql(query: str) -> str:
+    """Collapse whitespace and lower-case everything outside quoted literals."""
+    parts = []
+    for token in _TOKENS.findall(query.strip().rstrip(';').strip()):
+        if token.isspace():
+            parts.append(' ')
+        elif token[0] in '\'"`[':
+            parts.append(token)
+        else:
+            parts.append(token.lower())
+    return ''.join(parts).strip()
+
+
+def _unquoted(normalized: str) -> str:
+    """``normalized`` with string literals blanked out, for keyword scanning."""
+    return re.sub(r"'(?:[^']|'')*'", "''", normalized)
+
+
+def _table_name(ref: str) -> str:
+    name = ref.rsplit('.', 1)[-1]
+    if name[:1] in '"`[':
+        name = name[1:-1]
+    return name.lower()
+
+
+def referenced_tables(normalized: str) -> FrozenSet[str]:
+    return frozenset(_table_name(m) for m in _TABLE_REF.findall(_unquoted(normalized)))
+
+
+def _estimate_size(rows: List[tuple]) -> int:
+    size = sys.getsizeof(rows)
+    for row in rows:
+        size += sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row)
+    return size
+
+
+class QueryCache:
+    """Memory-bounded, write-aware cache in front of a SQL query function."""
+
+    def __init__(self, run: QueryRunner, max_bytes: int = 8 * 1024 * 1024,
+                 external_version: Optional[Callable[[], int]] = None):
+        self._run = run
+        self.max_bytes = max_bytes
+        self._external_version = external_version
+        self._seen_external: Optional[int] = None
+        self._lock = threading.Lock()
+        # (normalized query, params) -> (rows, tables read, estimated bytes)
+        self._entries: 'OrderedDict[Tuple[str, tuple], Tuple[List[tuple], FrozenSet[str], int]]' = \
+            OrderedDict()
+        self._by_table: Dict[str, Set[Tuple[str, tuple]]] = {}
+        self._versions: Dict[str, int] = {}
+        self._epoch = 0
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.uncacheable = 0
+        self.writes = 0
+        self.invalidated = 0
+        self.evicted = 0
+
+    def __call__(self, query: str, params: Sequence[Any] = ()) -> List[tuple]:
+        with span('sql', query=query[:500]) as sql_span:
+            rows = self._query(query, params, sql_span)
+            sql_span.set(rows=len(rows))
+            return rows
+
+    def _query(self, query: str, params: Sequence[Any], sql_span) -> List[tuple]:
+        normalized = normalize_sql(query)
+        scan = _unquoted(normalized)
+        is_read = (scan.split(' ', 1)[0] in _READ_KEYWORDS
+                   and not _WRITE_KEYWORDS.search(scan))
+        if not is_read:
+            sql_span.set(cache='write')
+            try:
+                return self._run(query, params)
+            finally:
+                self.invalidate(referenced_tables(normalized) or None)
+
+        if _VOLATILE.search(normalized):
+            sql_span.set(cache='uncacheable')
+            with self._lock:
+                self.uncacheable += 1
+            return self._run(query, params)
+
+        key = (normalized, tuple(params))
+        tables = referenced_tables(normalized)
+        self._check_external()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                sql_span.set(cache='hit')
+                return list(entry[0])
+            self.misses += 1
+            sql_span.set(cache='miss')
+            snapshot = self._snapshot(tables)
+
+        rows = self._run(query, params)
+        with self._lock:
+            # Skip storing if a write touched these tables while we were reading
+            if self._snapshot(tables) == snapshot:
+                self._store(key, rows, tables)
+        return list(rows)
+
+    def invalidate(self, tables: Optional[FrozenSet[str]] = None):
+        """Drop entries reading ``tables`` (every entry when ``tables`` is None)."""
+        with self._lock:
+            self.writes += 1
+            if tables is None:
+                self._epoch += 1
+                self.invalidated += len(self._entries)
+                self._entries.clear()
+                self._by_table.clear()
+                self._bytes = 0
+                return
+            for table in tables:
+                self._versions[table] = self._versions.get(table, 0) + 1
+                for key in self._by_table.pop(table, ()):
+                    if key in self._entries:
+                        self._remove(key)
+                        self.invalidated += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'uncacheable': self.uncacheable,
+                'writes': self.writes,
+                'invalidated': self.invalidated,
+                'evicted': self.evicted,
+                'table_versions': dict(self._versions),
+            }
+
+    def _check_external(self):
+        if self._external_version is None:
+            return
+        version = self._external_version()
+        with self._lock:
+            changed = self._seen_external is not None and version != self._seen_external
+            self._seen_external = version
+        if changed:
+            self.invalidate()
+
+    # -- internals (call with the lock held) ---------------------------------
+
+    def _snapshot(self, tables: FrozenSet[str]) -> tuple:
+        return (self._epoch,) + tuple(sorted(
+            (t, self._versions.get(t, 0)) for t in tables))
+
+    def _store(self, key, rows: List[tuple], tables: FrozenSet[str]):
+        size = _estimate_size(rows) + len(key[0])
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (list(rows), tables, size)
+        self._bytes += size
+        for table in tables:
+            self._by_table.setdefault(table, set()).add(key)
+        while self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evicted += 1
+
+    def _remove(self, key):
+        _, tables, size = self._entries.pop(key)
+        self._bytes -= size
+        for table in tables:
+            keys = self._by_table.get(table)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_table[table]
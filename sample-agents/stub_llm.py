@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Deterministic stub of the Ollama chat API for local testing and benchmarks.
+
+Serves ``POST /api/chat`` (streaming NDJSON or a single JSON object) with a
+fixed latency and records how many requests it handled and the peak number of
+concurrent requests, available from ``GET /stats``. Point the sample agents at
+it with ``OLLAMA_BASE_URL=http://127.0.0.1:<port>``.
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+
+Responder = Callable[[List[Dict[str, str]]], str]
+
+
+def echo_responder(messages: List[Dict[str, str]]) -> str:
+    """Answer immediately in ReAct form, quoting the start of the last message."""
+    last = messages[-1]['content'] if messages else ''
+    snippet = ' '.join(last.split())[-80:]
+    return f"Thought: I can answer directly.\nFinal Answer: stub answer to: {snippet}"
+
+
+class StubLLMServer:
+    """Threaded Ollama-compatible stub server that can run in the background."""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0,
+                 latency: float = 0.05, responder: Optional[Responder] = None):
+        self.latency = latency
+        self.responder = responder or echo_responder
+        self._lock = threading.Lock()
+        self._active = 0
+        self.requests = 0
+        self.peak_concurrency = 0
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'requests': self.requests, 'active': self._active,
+                    'peak_concurrency': self.peak_concurrency}
+
+    def reset_stats(self):
+        with self._lock:
+            self.requests = 0
+            self.peak_concurrency = self._active
+
+    def start(self) -> 'StubLLMServer':
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, name='stub-llm', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def serve_forever(self):
+        self._httpd.serve_forever()
+
+    def _chat(self, body: dict) -> str:
+        with self._lock:
+            self.requests += 1
+            self._active += 1
+            self.peak_concurrency = max(self.peak_concurrency, self._active)
+        try:
+            if self.latency:
+                time.sleep(self.latency)
+            return self.responder(body.get('messages', []))
+        finally:
+            with self._lock:
+                self._active -= 1
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Headers and body go out in separate writes; without this, Nagle plus
+            # delayed ACKs add ~40 ms to every keep-alive response
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, status: int, payload, content_type='application/json'):
+                data = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                if self.path == '/stats':
+                    self._send_json(200, stub.stats())
+                elif self.path == '/api/tags':
+                    self._send_json(200, {'models': []})
+                else:
+                    self._send_json(404, {'error': 'not found'})
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = json.loads(self.rfile.read(length) or b'{}')
+                if self.path != '/api/chat':
+                    self._send_json(404, {'error': 'not found'})
+                    return
+                content = stub._chat(body)
+                model = body.get('model', 'stub')
+                message = {'model': model, 'done': False,
+                           'message': {'role': 'assistant', 'content': content}}
+                final = {'model': model, 'done': True, 'done_reason': 'stop',
+                         'message': {'role': 'assistant', 'content': ''},
+                         'prompt_eval_count': 0, 'eval_count': len(content.split())}
+                if body.get('stream', True):
+                    lines = json.dumps(message) + '\n' + json.dumps(final) + '\n'
+                    self._send_json(200, lines.encode(), 'application/x-ndjson')
+                else:
+                    message.update({k: v for k, v in final.items() if k != 'message'})
+                    self._send_json(200, message)
+
+        return Handler
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run a stub Ollama chat server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=11434)
+    parser.add_argument('--latency', type=float, default=0.05,
+                        help="Seconds each chat request takes (default: 0.05)")
+    args = parser.parse_args()
+
+    server = StubLLMServer(args.host, args.port, latency=args.latency)
+    print(f"🧪 Stub LLM listening on {server.base_url}")
+    server.serve_forever()
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Process supervisor for the A2A sample agents.
+
+Each agent's listening socket is bound once here and inherited by N worker
+processes that all accept on it (pre-fork model), so an agent can use several
+cores on a single port. Workers report readiness over a pipe, crashed workers
+are restarted with exponential backoff, and shutdown drains workers with
+SIGTERM before falling back to SIGKILL.
+
+LLM calls are limited across all workers by an ``llm_slots.SlotServer``
+(``LLM_MAX_CONCURRENCY`` slots) that the supervisor serves for them.
+
+Workers of one agent must see the same data, so an agent with several
+workers always gets a file-backed database: ``<AGENT>_DB_PATH`` when set,
+otherwise a temporary one seeded with the sample rows and removed on
+shutdown.
+"""
+import os
+import select
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+if SCRIPT_DIR not in sys.path:
+    sys.path.insert(0, SCRIPT_DIR)
+
+from agent_common import bind_listener  # noqa: E402
+from llm_slots import SlotServer  # noqa: E402
+
+
+def db_path_variable(name: str) -> str:
+    """The database path variable an agent reads, e.g. ``TASK_DB_PATH``."""
+    return f"{name.split('_')[0].upper()}_DB_PATH"
+
+
+@dataclass
+class AgentSpec:
+    name: str
+    port: int
+    workers: int = 1
+
+
+class Worker:
+    """One agent worker process and its restart bookkeeping."""
+
+    def __init__(self, spec: AgentSpec, index: int):
+        self.spec = spec
+        self.index = index
+        self.process: Optional[subprocess.Popen] = None
+        self.ready_fd: Optional[int] = None
+        self.ready = False
+        self.started_at = 0.0
+        self.failures = 0
+        self.restart_at: Optional[float] = None
+
+    @property
+    def label(self) -> str:
+        return f"{self.spec.name}[{self.index}]"
+
+    def close_pipe(self):
+        if self.ready_fd is not None:
+            os.close(self.ready_fd)
+            self.ready_fd = None
+
+
+class Supervisor:
+    """Runs, watches and restarts the workers for a set of agents."""
+
+    def __init__(self, specs: List[AgentSpec], host: str,
+                 backoff_base: float = 1.0, backoff_max: float = 30.0,
+                 stable_after: float = 30.0, drain_timeout: float = 15.0):
+        self.specs = specs
+        self.host = host
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.stable_after = stable_after
+        self.drain_timeout = drain_timeout
+        self.listeners: Dict[str, object] = {}
+        # Extra environment for the workers, and a temp dir we own if any
+        self.env: Dict[str, str] = {}
+        self._tmp_dir: Optional[str] = None
+        self.slots: Optional[SlotServer] = None
+        self.workers: List[Worker] = [
+            Worker(spec, i) for spec in specs for i in range(spec.workers)]
+        self._stopping = False
+
+    # -- lifecycle -----------------------------------------------------------
+
+    def _tmp(self) -> str:
+        if self._tmp_dir is None:
+            self._tmp_dir = tempfile.mkdtemp(prefix='agent-run-')
+        return self._tmp_dir
+
+    def start(self):
+        limit = int(os.environ.get('LLM_MAX_CONCURRENCY', '2'))
+        self.slots = SlotServer(os.path.join(self._tmp(), 'llm.sock'), limit).start()
+        self.env['LLM_SLOTS_SOCKET'] = self.slots.path
+        print(f"LLM calls limited to {limit} at a time across all agents")
+        for spec in self.specs:
+            self.listeners[spec.name] = bind_listener(self.host, spec.port)
+            print(f"Starting {spec.name} on port {spec.port} "
+                  f"with {spec.workers} worker(s)...")
+            if spec.workers > 1:
+                self._share_database(spec)
+        for worker in self.workers:
+            self._spawn(worker)
+
+    def _share_database(self, spec: AgentSpec):
+        """Point every worker of ``spec`` at one database file."""
+        variable = db_path_variable(spec.name)
+        if os.environ.get(variable):
+            return
+        self.env[variable] = os.path.join(self._tmp(), f"{spec.name}.db")
+        print(f"   {spec.name} workers share {self.env[variable]} "
+              f"(set {variable} to keep the data)")
+
+    def _spawn(self, worker: Worker):
+        spec = worker.spec
+        listener = self.listeners[spec.name]
+        read_fd, write_fd = os.pipe()
+        script_path = os.path.join(SCRIPT_DIR, spec.name, 'agent.py')
+        worker.process = subprocess.Popen([
+            sys.executable,
+            script_path,
+            '--host', self.host,
+            '--port', str(spec.port),
+            '--fd', str(listener.fileno()),
+            '--ready-fd', str(write_fd),
+        ], pass_fds=(listener.fileno(), write_fd), env={**os.environ, **self.env})
+        os.close(write_fd)
+        worker.close_pipe()
+        worker.ready_fd = read_fd
+        worker.ready = False
+        worker.started_at = time.monotonic()
+        worker.restart_at = None
+
+    def wait_ready(self, timeout: float) -> bool:
+        """Supervise until every worker is ready or ``timeout`` elapses."""
+        deadline = time.monotonic() + timeout
+        while not self._stopping and time.monotonic() < deadline:
+            self.poll(min(0.5, max(deadline - time.monotonic(), 0)))
+            if all(w.ready for w in self.workers):
+                return True
+        return all(w.ready for w in self.workers)
+
+    def poll(self, timeout: float = 0.5):
+        """Collect readiness signals, reap crashed workers and run due restarts."""
+        pending = {w.ready_fd: w for w in self.workers
+                   if w.ready_fd is not None}
+        if pending:
+            readable, _, _ = select.select(list(pending), [], [], timeout)
+            for fd in readable:
+                worker = pending[fd]
+                os.read(fd, 64)
+                worker.ready = True
+                worker.close_pipe()
+        else:
+            time.sleep(timeout)
+
+        now = time.monotonic()
+        for worker in self.workers:
+            if worker.restart_at is not None:
+                if now >= worker.restart_at and not self._stopping:
+                    print(f"🔁 Restarting {worker.label} "
+                          f"(attempt {worker.failures})")
+                    self._spawn(worker)
+                continue
+            code = worker.process.poll() if worker.process else None
+            if code is None:
+                continue
+            # Worker exited on its own: back off longer each time it fails quickly
+            if now - worker.started_at >= self.stable_after:
+                worker.failures = 0
+            worker.failures += 1
+            delay = min(self.backoff_max,
+                        self.backoff_base * 2 ** (worker.failures - 1))
+            worker.ready = False
+            worker.close_pipe()
+            worker.restart_at = now + delay
+            print(f"⚠️  {worker.label} exited with code {code}; "
+                  f"restarting in {delay:.1f}s")
+
+    def run(self, ready_timeout: float = 120.0):
+        """Start everything, report readiness, then supervise until signalled."""
+        previous = signal.signal(signal.SIGTERM, self._request_stop)
+        try:
+            self.start()
+            if self.wait_ready(ready_timeout):
+                print("All agents started. Press Ctrl+C to exit.")
+            elif not self._stopping:
+                waiting = sorted({w.label for w in self.workers if not w.ready})
+                print(f"⚠️  Not ready after {ready_timeout:.0f}s: "
+                      f"{', '.join(waiting)}; still supervising")
+            while not self._stopping:
+                self.poll()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.shutdown()
+            signal.signal(signal.SIGTERM, previous)
+
+    def _request_stop(self, signum, frame):
+        self._stopping = True
+
+    def shutdown(self):
+        """Ask workers to drain, then kill any that outlive ``drain_timeout``."""
+        self._stopping = True
+        print("\nShutting down agents...")
+        running = [w for w in self.workers
+                   if w.process and w.process.poll() is None]
+        for worker in running:
+            worker.process.terminate()
+        deadline = time.monotonic() + self.drain_timeout
+        for worker in running:
+            try:
+                worker.process.wait(max(deadline - time.monotonic(), 0))
+            except subprocess.TimeoutExpired:
+                print(f"⚠️  {worker.label} did not drain in time; killing")
+                worker.process.kill()
+                worker.process.wait()
+        for worker in self.workers:
+            worker.close_pipe()
+        for listener in self.listeners.values():
+            listener.close()
+        if self.slots is not None:
+            self.slots.stop()
+        if self._tmp_dir is not None:
+            shutil.rmtree(self._tmp_dir, ignore_errors=True)
+
+
+def parse_worker_counts(values: List[str]) -> Dict[str, int]:
+    """Parse ``name=count`` entries (comma-separated or repeated)."""
+    counts = {}
+    for value in values:
+        for item in filter(None, (v.strip() for v in value.split(','))):
+            name, sep, count = item.partition('=')
+            if not sep or not count.isdigit() or int(count) < 1:
+                raise ValueError(f"Invalid worker count '{item}', expected name=N")
+            counts[name.strip()] = int(count)
+    return counts
@@ -3,33 +3,33 @@
 A2A Server for Task Agent
 This module defines the Task Agent and A2A server setup.
 """
-import sqlite3
-import pandas as pd
+import os
+import sys
 import argparse
-from python_a2a import run_server, A2AServer, AgentCard, AgentSkill  # type: ignore
-from langchain.tools import Tool
-from langchain.agents import initialize_agent, AgentExecutor, AgentType  # type: ignore
-from langchain_ollama import ChatOllama  # type: ignore
 
-# Sample tasks data
-tasks_data = {
-    'id': [1, 2, 3],
-    'task': ['Write report', 'Schedule meeting', 'Review PR'],
-    'completed': [False, False, False]
-}
-df_tasks = pd.DataFrame(tasks_data)
-
-# Load data into an in-memory SQLite database
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from agent_common import (  # noqa: E402
+    AgentDatabase, LazyResource, adopt_listener, bind_listener, invoke_executor,
+    message_text, serve_a2a, shared_llm, text_reply)
+from intent_router import LIST_LIMIT, IntentRouter, QueryTemplate, listing  # noqa: E402
 
+# Sample tasks data
+TASK_COLUMNS = [('id', 'INTEGER'), ('task', 'TEXT'), ('completed', 'INTEGER')]
+TASK_ROWS = [
+    (1, 'Write report', False),
+    (2, 'Schedule meeting', False),
+    (3, 'Review PR', False),
+]
 
-def setup_db():
-    conn = sqlite3.connect(':memory:')
-    df_tasks.to_sql('tasks', conn, index=False, if_exists='replace')
-    return conn
+# Columns the skills filter or sort on
+TASK_INDEXES = ['completed, id']
 
+# The in-memory sample rows by default, or a file-backed database (optionally
+# streamed from a CSV/Parquet file) with --db-path/--data-file
+database = AgentDatabase('tasks', TASK_COLUMNS, TASK_ROWS, indexes=TASK_INDEXES,
+                         env_prefix='TASK', name='Task Agent database')
+query_rows = database.query_rows
 
-conn = setup_db()
-cursor = conn.cursor()
 
 # Tool to query tasks using SQL
 
@@ -37,45 +37,99 @@ cursor = conn.cursor()
 def tasks_sql_tool(query: str) -> str:
     """Executes SQL queries on sample tasks data."""
     try:
-        rows = cursor.execute(query).fetchall()
-        return str(rows)
+        return str(query_rows(query))
     except Exception as e:
         return f"Error: {e}"
 
 
-# Wrap the tasks query function into a LangChain Tool
-tasks_tool = Tool.from_function(
-    func=tasks_sql_tool,
-    name='TasksSQL',
-    description='Executes SQL queries on sample tasks for personal productivity.'
-)
+# Fast paths for the tasks_query skill examples: matching questions are
+# answered straight from SQLite without a ReAct loop. Lists are capped at
+# LIST_LIMIT rows, with the total count alongside
+
+
+def _tasks_query(completed: int):
+    return (f"SELECT id, task, (SELECT count(*) FROM tasks WHERE completed = {completed}) "
+            f"FROM tasks WHERE completed = {completed} ORDER BY id LIMIT ?", (LIST_LIMIT,))
+
+
+def _tasks_answer(label):
+    def _format(params, rows):
+        if not rows:
+            return f"No {label} tasks."
+        listed = listing([f"#{task_id} {task}" for task_id, task, _ in rows], rows[0][2])
+        return f"{label.capitalize()} tasks: {listed}."
+    return _format
+
+
+FAST_PATHS = [
+    QueryTemplate(
+        name='incomplete',
+        examples=["Show all incomplete tasks"],
+        patterns=[
+            r"(?:show|show me|list) (?:all )?(?:my )?(?:the )?"
+            r"(?:incomplete|open|pending|unfinished) tasks",
+            r"what tasks are (?:still )?(?:incomplete|open|pending|not completed)",
+        ],
+        build=lambda p: _tasks_query(0),
+        format=_tasks_answer('incomplete'),
+    ),
+    QueryTemplate(
+        name='completed',
+        examples=["List completed tasks"],
+        patterns=[
+            r"(?:show|show me|list) (?:all )?(?:my )?(?:the )?(?:completed|finished|done) tasks",
+            r"what tasks are (?:completed|done|finished)",
+        ],
+        build=lambda p: _tasks_query(1),
+        format=_tasks_answer('completed'),
+    ),
+]
+
+router = IntentRouter(FAST_PATHS, query_rows)
+
+
+def build_agent_executor():
+    """Build the LangChain ReAct executor (imports LangChain and Ollama on demand)."""
+    from langchain.tools import Tool
+    from langchain.agents import initialize_agent, AgentType  # type: ignore
+
+    # Wrap the tasks query function into a LangChain Tool
+    tasks_tool = Tool.from_function(
+        func=tasks_sql_tool,
+        name='TasksSQL',
+        description='Executes SQL queries on sample tasks for personal productivity.'
+    )
 
-# Initialize ChatOllama LLM
-# type: ignore
-llm = ChatOllama(model='phi4-mini',
-                 base_url='http://ollama:11434')
+    # Initialize ChatOllama LLM (shared client, calls go through the LLM scheduler)
+    llm = shared_llm(model='phi4-mini', base_url='http://ollama:11434',
+                     agent='task_agent')
 
-# Initialize the agent with the tasks tool
-agent_executor: AgentExecutor = initialize_agent(
-    tools=[tasks_tool],
-    llm=llm,
-    agent=AgentType.ZERO_SHOT_REACT_DESCRIPTION,
-    verbose=True
-)
+    # Initialize the agent with the tasks tool
+    return initialize_agent(
+        tools=[tasks_tool],
+        llm=llm,
+        agent=AgentType.ZERO_SHOT_REACT_DESCRIPTION,
+        verbose=True
+    )
 
 
-def start_a2a_agent(host: str, port: int):
-    """Start the A2A server exposing the Task Agent"""
+agent_executor = LazyResource(build_agent_executor, name='Task Agent executor')
+
+
+def create_server(host: str, port: int, path: str = ''):
+    """Create the A2A server object exposing the Task Agent"""
+    from python_a2a import A2AServer, AgentCard, AgentSkill  # type: ignore
+
     # Define A2A agent metadata
     card = AgentCard(
         name="Task Agent",
         description="Query and manage tasks with natural language",
-        url=f"http://{host}:{port}",
+        url=f"http://{host}:{port}{path}",
         version="1.0.0",
         skills=[AgentSkill(
             name="tasks_query",
             description="Answer questions about tasks",
-            examples=["Show all incomplete tasks", "List completed tasks"]
+            examples=router.examples()
         )]
     )
 
@@ -84,13 +138,27 @@ def start_a2a_agent(host: str, port: int):
         def __init__(self):
             super().__init__(agent_card=card)
             self.executor = agent_executor
+            self.router = router
+            self.sql_cache = query_rows
 
         def handle_message(self, message):
-            result = self.executor.invoke({"input": message.content})
-            return {"output": result.get("output")}
+            answer = self.router.handle(message_text(message), self.run_executor)
+            return text_reply(message, answer)
+
+        def run_executor(self, text: str) -> str:
+            return invoke_executor(self.executor.get(), text)
 
-    server = TaskAgentServer()
-    run_server(server, host=host, port=port)
+    return TaskAgentServer()
+
+
+def start_a2a_agent(host: str, port: int, fd: int = None, ready_fd: int = None):
+    """Start the A2A server exposing the Task Agent"""
+    # Bind first so clients queue instead of being refused while we import
+    sock = adopt_listener(fd) if fd is not None else bind_listener(host, port)
+    agent_executor.warm_up()
+    database.get()
+    server = create_server(host, port)
+    serve_a2a(server, sock, ready_fd=ready_fd)
 
 
 if __name__ == '__main__':
@@ -100,7 +168,20 @@ if __name__ == '__main__':
                         help="Host to bind the A2A server (default: 0.0.0.0)")
     parser.add_argument('--port', type=int, default=5051,
                         help="Port for the A2A server (default: 5051)")
+    parser.add_argument('--fd', type=int, default=None,
+                        help="Serve on an inherited listening socket (used by the supervisor)")
+    parser.add_argument('--ready-fd', type=int, default=None,
+                        help="Pipe to signal readiness on (used by the supervisor)")
+    parser.add_argument('--db-path', default=None,
+                        help="File-backed SQLite database (default: in-memory sample data)")
+    parser.add_argument('--data-file', default=None,
+                        help="CSV/Parquet file to load into --db-path")
     args = parser.parse_args()
+    if args.db_path:
+        os.environ['TASK_DB_PATH'] = args.db_path
+    if args.data_file:
+        os.environ['TASK_DATA_FILE'] = args.data_file
 
     print(f"🔧 Starting Task Agent A2A server on {args.host}:{args.port}")
-    start_a2a_agent(host=args.host, port=args.port)
+    start_a2a_agent(host=args.host, port=args.port,
+                    fd=args.fd, ready_fd=args.ready_fd)
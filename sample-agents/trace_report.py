@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Summarize spans exported by the backend and the sample agents.
+
+Reads the JSON lines written to ``$TRACE_FILE`` and prints each trace as a
+tree with durations, followed by the self time (duration minus children) per
+hop across all traces, so the hop that dominates latency stands out.
+"""
+import argparse
+import collections
+import json
+import os
+import sys
+
+
+def load_spans(path):
+    spans = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                try:
+                    spans.append(json.loads(line))
+                except ValueError:
+                    print(f"⚠️  Skipping malformed line: {line[:80]}", file=sys.stderr)
+    return spans
+
+
+def print_tree(spans, children, span, depth=0):
+    attrs = span.get('attributes') or {}
+    detail = ', '.join(f"{k}={attrs[k]}" for k in ('route', 'template', 'cache', 'status', 'url')
+                       if k in attrs)
+    marker = ' ❌' if span.get('status') == 'error' else ''
+    print(f"{'  ' * depth}{span['duration_ms']:9.1f} ms  [{span['service']}] {span['name']}"
+          f"{f'  ({detail})' if detail else ''}{marker}")
+    for child in sorted(children.get(span['span_id'], []), key=lambda s: s['start']):
+        print_tree(spans, children, child, depth + 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('path', nargs='?', default=os.environ.get('TRACE_FILE'),
+                        help="Span file (default: $TRACE_FILE)")
+    parser.add_argument('--last', type=int, default=5,
+                        help="Number of most recent traces to print as trees")
+    args = parser.parse_args()
+    if not args.path:
+        parser.error("no span file given and $TRACE_FILE is not set")
+
+    spans = load_spans(args.path)
+    by_id = {s['span_id']: s for s in spans}
+    children = collections.defaultdict(list)
+    traces = collections.defaultdict(list)
+    for s in spans:
+        traces[s['trace_id']].append(s)
+        if s.get('parent_id') in by_id:
+            children[s['parent_id']].append(s)
+
+    recent = sorted(traces.values(), key=lambda t: min(s['start'] for s in t))[-args.last:]
+    for trace in recent:
+        roots = [s for s in trace if s.get('parent_id') not in by_id]
+        print(f"Trace {trace[0]['trace_id']} ({len(trace)} spans)")
+        for root in sorted(roots, key=lambda s: s['start']):
+            print_tree(spans, children, root, 1)
+        print()
+
+    self_time = collections.Counter()
+    calls = collections.Counter()
+    for s in spans:
+        key = (s['service'], s['name'])
+        nested = sum(c['duration_ms'] for c in children.get(s['span_id'], []))
+        self_time[key] += max(s['duration_ms'] - nested, 0.0)
+        calls[key] += 1
+    total = sum(self_time.values()) or 1.0
+    print(f"Self time by hop across {len(traces)} traces:")
+    for (service, name), ms in self_time.most_common(15):
+        print(f"   {ms:10.1f} ms {100 * ms / total:5.1f}%  {calls[(service, name)]:5d}x  "
+              f"[{service}] {name}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Lightweight distributed tracing for the A2A sample agents.
+
+Spans carry W3C ``traceparent`` context, so a request that arrives from the
+catalog backend with a ``traceparent`` header continues the backend's trace
+through ``handle_message``, the intent router, the LangChain ReAct loop, SQL
+tool calls and the LLM scheduler. Finished spans go to an exporter: a JSON
+lines file (``$TRACE_FILE``, shared with the backend if both point at the same
+path) or an in-memory collector for tests. With no exporter configured,
+``span()`` returns a shared no-op object and tracing costs almost nothing.
+
+``trace_report.py`` prints the collected traces as trees with per-hop timings.
+"""
+import json
+import os
+import re
+import secrets
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+_TRACEPARENT = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$')
+
+
+class Span:
+    """A timed operation within a trace."""
+
+    __slots__ = ('trace_id', 'span_id', 'parent_id', 'name', 'service', 'start',
+                 '_start', 'attributes', 'status', 'error', '_previous')
+
+    def __init__(self, name: str, service: str, trace_id: str, parent_id: Optional[str],
+                 attributes: Dict[str, Any]):
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.service = service
+        self.start = time.time()
+        self._start = time.perf_counter()
+        self.attributes = attributes
+        self.status = 'ok'
+        self.error: Optional[str] = None
+        self._previous: Optional['Span'] = None
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def fail(self, error: BaseException):
+        self.status = 'error'
+        self.error = f"{type(error).__name__}: {error}"
+
+    def finish(self) -> Dict[str, Any]:
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'service': self.service,
+            'start': self.start,
+            'duration_ms': round((time.perf_counter() - self._start) * 1000, 3),
+            'status': self.status,
+            'error': self.error,
+            'attributes': self.attributes,
+        }
+
+    # Entering makes the span current for this thread/context
+    def __enter__(self) -> 'Span':
+        self._previous = _current.get()
+        _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc is not None:
+            self.fail(exc)
+        _current.set(self._previous)
+        _tracer.export(self.finish())
+
+
+class _NoSpan:
+    """Stand-in returned while tracing is disabled."""
+
+    traceparent = None
+
+    def set(self, **attributes):
+        pass
+
+    def fail(self, error: BaseException):
+        pass
+
+    def __enter__(self) -> '_NoSpan':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        pass
+
+
+NO_SPAN = _NoSpan()
+
+
+class FileExporter:
+    """Appends finished spans to a JSON lines file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, record: Dict[str, Any]):
+        line = json.dumps(record, default=str) + '\n'
+        with self._lock, open(self.path, 'a', encoding='utf-8') as f:
+            f.write(line)
+
+
+class MemoryExporter:
+    """Keeps finished spans in memory, for tests and benchmarks."""
+
+    def __init__(self):
+        self.spans: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def export(self, record: Dict[str, Any]):
+        with self._lock:
+            self.spans.append(record)
+
+    def clear(self):
+        with self._lock:
+            self.spans.clear()
+
+
+class _Tracer:
+    def __init__(self):
+        self.exporter = None
+        self.service = 'sample-agents'
+
+    def export(self, record: Dict[str, Any]):
+        if self.exporter is not None:
+            self.exporter.export(record)
+
+
+_tracer = _Tracer()
+_current: ContextVar[Optional[Span]] = ContextVar('current_span', default=None)
+
+
+def configure(exporter=None, service: Optional[str] = None):
+    """Set the exporter (None disables tracing) and this process's service name."""
+    _tracer.exporter = exporter
+    if service:
+        _tracer.service = service
+
+
+def configure_from_env(service: str):
+    """Export to ``$TRACE_FILE`` if it is set."""
+    path = os.environ.get('TRACE_FILE')
+    configure(FileExporter(path) if path else None, service)
+
+
+def enabled() -> bool:
+    return _tracer.exporter is not None
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def parse_traceparent(header: Optional[str]):
+    """Return (trace_id, parent span_id) from a ``traceparent`` header, or None."""
+    m = _TRACEPARENT.match((header or '').strip().lower())
+    return (m.group(1), m.group(2)) if m else None
+
+
+def span(name: str, traceparent: Optional[str] = None, **attributes):
+    """Start a span, a child of the current span or of a remote ``traceparent``.
+
+    Use as a context manager; the span is exported when the block exits.
+    """
+    if _tracer.exporter is None:
+        return NO_SPAN
+    remote = parse_traceparent(traceparent) if traceparent else None
+    parent = _current.get()
+    if remote is not None:
+        trace_id, parent_id = remote
+    elif parent is not None:
+        trace_id, parent_id = parent.trace_id, parent.span_id
+    else:
+        trace_id, parent_id = secrets.token_hex(16), None
+    return Span(name, _tracer.service, trace_id, parent_id, attributes)
+
+
+class TraceMiddleware:
+    """WSGI middleware opening a server span per request, continuing ``traceparent``."""
+
+    def __init__(self, app, skip_paths=(), **attributes):
+        self.app = app
+        self.skip_paths = tuple(skip_paths)
+        self.attributes = attributes
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        if _tracer.exporter is None or path.startswith(self.skip_paths):
+            return self.app(environ, start_response)
+
+        request_span = span(f"{environ.get('REQUEST_METHOD')} {path}",
+                            traceparent=environ.get('HTTP_TRACEPARENT'),
+                            kind='server', path=path, **self.attributes)
+
+        def traced_start_response(status, headers, exc_info=None):
+            request_span.set(status=int(status.split(' ', 1)[0]))
+            return start_response(status, headers, exc_info)
+
+        previous = _current.get()
+        _current.set(request_span)
+        try:
+            body = self.app(environ, traced_start_response)
+        except BaseException as e:
+            request_span.fail(e)
+            _tracer.export(request_span.finish())
+            raise
+        finally:
+            _current.set(previous)
+        # Responses may stream, so the span ends when the server closes the body
+        return _FinishOnClose(body, request_span)
+
+
+class _FinishOnClose:
+    def __init__(self, body, request_span: Span):
+        self._body = body
+        self._span = request_span
+
+    def __iter__(self):
+        return iter(self._body)
+
+    def close(self):
+        try:
+            if hasattr(self._body, 'close'):
+                self._body.close()
+        finally:
+            _tracer.export(self._span.finish())
+
+
+def langchain_callbacks() -> List[Any]:
+    """Callback handlers that trace a LangChain run (empty while tracing is off)."""
+    if _tracer.exporter is None:
+        return []
+    return [_langchain_handler_class()()]
+
+
+_handler_class = None
+
+
+def _langchain_handler_class():
+    global _handler_class
+    if _handler_class is not None:
+        return _handler_class
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    class TracingCallbackHandler(BaseCallbackHandler):
+        """Maps LangChain chain, agent step, tool and LLM runs onto spans."""
+
+        def __init__(self):
+            self._spans: Dict[Any, Span] = {}
+
+        def _start(self, run_id, parent_run_id, name: str, **attributes):
+            parent = self._spans.get(parent_run_id) or _current.get()
+            s = span(name, **attributes)
+            if parent is not None:
+                s.trace_id, s.parent_id = parent.trace_id, parent.span_id
+            s._previous = _current.get()
+            # Current, so work done inside (e.g. SQL from a tool) nests under it
+            _current.set(s)
+            self._spans[run_id] = s
+
+        def _end(self, run_id, error: Optional[BaseException] = None, **attributes):
+            s = self._spans.pop(run_id, None)
+            if s is None:
+                return
+            s.set(**attributes)
+            if error is not None:
+                s.fail(error)
+            _current.set(s._previous)
+            _tracer.export(s.finish())
+
+        def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, **kwargs):
+            name = kwargs.get('name') or (serialized or {}).get('name') or 'chain'
+            self._start(run_id, parent_run_id, f"chain {name}")
+
+        def on_chain_end(self, outputs, *, run_id, **kwargs):
+            self._end(run_id)
+
+        def on_chain_error(self, error, *, run_id, **kwargs):
+            self._end(run_id, error)
+
+        def on_agent_action(self, action, *, run_id, **kwargs):
+            s = self._spans.get(run_id)
+            if s is not None:
+                steps = s.attributes.setdefault('steps', [])
+                steps.append(action.tool)
+
+        def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, **kwargs):
+            name = kwargs.get('name') or (serialized or {}).get('name') or 'tool'
+            self._start(run_id, parent_run_id, f"tool {name}", input=str(input_str)[:500])
+
+        def on_tool_end(self, output, *, run_id, **kwargs):
+            self._end(run_id)
+
+        def on_tool_error(self, error, *, run_id, **kwargs):
+            self._end(run_id, error)
+
+        def on_chat_model_start(self, serialized, messages, *, run_id,
+                                parent_run_id=None, **kwargs):
+            self._start(run_id, parent_run_id, 'llm',
+                        messages=sum(len(batch) for batch in messages))
+
+        def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, **kwargs):
+            self._start(run_id, parent_run_id, 'llm', prompts=len(prompts))
+
+        def on_llm_end(self, response, *, run_id, **kwargs):
+            usage = (response.llm_output or {}).get('token_usage') or {}
+            self._end(run_id, **({'token_usage': usage} if usage else {}))
+
+        def on_llm_error(self, error, *, run_id, **kwargs):
+            self._end(run_id, error)
+
+    _handler_class = TracingCallbackHandler
+    return _handler_class
+
+
+configure_from_env('sample-agents')